@@ -0,0 +1,155 @@
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from tpscanner.alerts import AlertEngine, OutboxSink, WebhookSink, load_alert_rules
+from tpscanner.core import Scanner, load_baskets
+from tpscanner.tpscanner import check_alerts, parse_command_line, setup_cli_parser
+
+
+def _offer(seller, price, link=None, delivery_price=5.0, free_delivery=None):
+    return {
+        "seller": seller,
+        "seller_link": f"https://www.trovaprezzi.it/negozi/{seller}",
+        "seller_reviews": 10,
+        "seller_reviews_link": f"https://www.trovaprezzi.it/opinioni/{seller}",
+        "seller_rating": 4.5,
+        "price": price,
+        "delivery_price": delivery_price,
+        "free_delivery": free_delivery,
+        "availability": True,
+        "total_price_plus_delivery": price + delivery_price,
+        "link": link or f"https://www.trovaprezzi.it/goto/{seller}",
+    }
+
+
+def test_product_alerts_are_deduplicated_and_cooled_down(tmp_path):
+    outbox = OutboxSink(str(tmp_path / "alerts.jsonl"))
+    engine = AlertEngine({"u": 20.0}, sinks=[outbox], cooldown=100)
+
+    assert engine.observe("u", "P", [_offer("A", 30.0)], timestamp=0) == []
+    alerts = engine.observe("u", "P", [_offer("A", 14.0)], timestamp=10)
+    assert [(a["seller"], a["price"]) for a in alerts] == [("A", 19.0)]
+    # nothing changed: the rules are not evaluated
+    assert engine.observe("u", "P", [_offer("A", 14.0)], timestamp=20) == []
+    assert engine.skipped == 1
+    # a new offer at a higher price, within the cooldown
+    offers = [_offer("A", 14.0), _offer("B", 14.5)]
+    assert engine.observe("u", "P", offers, timestamp=30) == []
+    # a lower price is sent anyway
+    offers = [_offer("A", 14.0), _offer("B", 12.0)]
+    assert len(engine.observe("u", "P", offers, timestamp=40)) == 1
+    # the price goes back above the target, then drops again
+    assert engine.observe("u", "P", [_offer("A", 30.0)], timestamp=50) == []
+    assert len(engine.observe("u", "P", [_offer("A", 14.0)], timestamp=60)) == 1
+
+    with open(outbox.filename) as f:
+        assert [json.loads(line)["price"] for line in f] == [19.0, 17.0, 19.0]
+
+
+def test_basket_alerts_and_state_across_runs(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"baskets": {"office": 50.0}}))
+    rules = load_alert_rules(str(rules_file))
+    basket_products = {"office": {"u1": 2, "u2": 1}}
+    state_file = str(tmp_path / "state.json")
+
+    engine = AlertEngine(
+        rules["products"], rules["baskets"], basket_products, state_file=state_file
+    )
+    assert engine.observe("u1", "P1", [_offer("A", 15.0), _offer("B", 10.0)]) == []
+    offers = [_offer("A", 10.0, free_delivery=40.0), _offer("B", 25.0)]
+    alerts = engine.observe("u2", "P2", offers)
+    # A: 2 x 15 + 10 with free delivery, B: 2 x 10 + 25 + 5
+    assert [(a["seller"], a["price"]) for a in alerts] == [("A", 40.0)]
+    engine.save()
+
+    engine = AlertEngine(
+        rules["products"], rules["baskets"], basket_products, state_file=state_file
+    )
+    assert engine.observe("u2", "P2", offers) == []
+    assert engine.skipped == 1
+    offers = [_offer("A", 10.0, free_delivery=40.0), _offer("B", 15.0)]
+    # B is now cheaper, at 40 with delivery, but not cheaper than the last alert
+    assert engine.observe("u2", "P2", offers) == []
+
+
+def test_webhook_receives_the_alerts():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            received.append(json.loads(self.rfile.read(length)))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        webhook = WebhookSink(f"http://127.0.0.1:{server.server_port}/hook")
+        engine = AlertEngine({"u": 20.0}, sinks=[webhook])
+        engine.observe("u", "P", [_offer("A", 10.0)])
+    finally:
+        server.shutdown()
+    assert [alert["price"] for alert in received] == [15.0]
+    assert not WebhookSink("http://127.0.0.1:9/hook", timeout=1).send(received[0])
+
+
+def test_basket_rules_need_their_baskets(monkeypatch, tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"baskets": {"office": 50.0}}))
+    urls_file = tmp_path / "urls.txt"
+    urls_file.write_text("https://www.trovaprezzi.it/a\n")
+    parser = setup_cli_parser()
+    for argv in (["--daemon"], ["-c"]):
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["tpscanner", "-f", str(urls_file), "--alerts", str(rules_file), *argv],
+        )
+        with pytest.raises(SystemExit):
+            parse_command_line(parser)
+
+
+def test_rules_and_baskets_match_the_canonical_urls(tmp_path):
+    url = "https://www.trovaprezzi.it/prezzo_mouse.aspx"
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"products": {f"{url}?utm_source=x": 20.0}}))
+    baskets_file = tmp_path / "baskets.json"
+    baskets_file.write_text(json.dumps({"office": {f"{url}/": 1, f"{url}#top": 2}}))
+
+    rules = load_alert_rules(str(rules_file))
+    assert rules["products"] == {url: 20.0}
+    assert load_baskets(str(baskets_file)) == {"office": {url: 3}}
+
+    engine = AlertEngine(rules["products"])
+    # the scanner and the daemon may observe the URL in another form
+    alerts = engine.observe(f"{url}/", "P", [_offer("A", 10.0)])
+    assert [(a["url"], a["price"]) for a in alerts] == [(url, 15.0)]
+
+
+def test_unavailable_offers_are_not_alerted(monkeypatch, tmp_path):
+    import tpscanner.alerts
+
+    outbox = OutboxSink(str(tmp_path / "alerts.jsonl"))
+    engine = AlertEngine({"u": 20.0}, sinks=[outbox])
+    monkeypatch.setattr(tpscanner.alerts, "create_alert_engine", lambda *_: engine)
+    scanner = Scanner("debug", ["u"], [1], 0, True, False, False)
+    scanner.product_names = {"u": "P"}
+    scanner.individual_deals = {"P": [_offer("A", 10.0), _offer("B", 12.0)]}
+    scanner.individual_deals["P"][0]["availability"] = False
+    args = argparse.Namespace(alerts={}, baskets=None, includena=False)
+
+    check_alerts(scanner, args)
+    # the alert is for the offer the best deals are computed from
+    with open(outbox.filename) as f:
+        assert [json.loads(line)["seller"] for line in f] == ["B"]
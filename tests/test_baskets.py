@@ -0,0 +1,44 @@
+import json
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.core import Scanner, basket_scanner, basket_union, load_baskets
+from tpscanner.scraper.scraper import save_pages
+
+A, B, C = (f"https://www.trovaprezzi.it/{c}" for c in "abc")
+
+
+def test_shared_products_are_scanned_once(tmp_path):
+    filename = tmp_path / "baskets.json"
+    filename.write_text(
+        json.dumps({"office": {A: 2, B: 1}, "home": [B, C], "spare": {A: 1}})
+    )
+    baskets = load_baskets(str(filename))
+    urls, quantities = basket_union(baskets)
+    assert urls == [A, B, C]
+    assert quantities == [1, 1, 1]
+
+    for i, url in enumerate(urls):
+        save_pages(
+            str(tmp_path),
+            url,
+            generate_listing_html(20, sellers=5, seed=i, name=f"Product {i}"),
+            generate_listing_html(20, sellers=5, seed=i, shipping_included=True),
+        )
+    scanner = Scanner(
+        "", urls, quantities, 0, False, False, False, replay_dir=str(tmp_path)
+    )
+    scanner.scan()
+
+    office = basket_scanner(scanner, "office", baskets["office"])
+    assert list(office.individual_deals) == ["Product 0", "Product 1"]
+    for single, double in zip(
+        scanner.individual_deals["Product 0"], office.individual_deals["Product 0"]
+    ):
+        assert double["quantity"] == 2
+        assert double["total_price"] == single["price"] * 2
+        assert single["quantity"] == 1
+    office.find_best_cumulative_deals()
+    assert office.best_cumulative_deals
+
+    home = basket_scanner(scanner, "home", baskets["home"])
+    assert list(home.individual_deals) == ["Product 1", "Product 2"]
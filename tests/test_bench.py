@@ -0,0 +1,84 @@
+from tpscanner.bench import (
+    compare,
+    generate_listing_html,
+    generate_raw_offers,
+    run_benchmarks,
+    save_baseline,
+)
+from tpscanner.bench.bench import load_baseline
+from tpscanner.scraper import OfferParser
+
+
+class TestSyntheticListings:
+    def test_listing_is_parsed_with_all_offers(self):
+        parser = OfferParser()
+        html_content = generate_listing_html(25, sellers=5, name="Product X")
+
+        name, items = parser.extract_prices_plus_shipping(html_content, 2)
+
+        assert name == "Product X"
+        assert len(items) == 25
+        assert {item["seller"] for item in items} <= {
+            f"Seller {i:05d}" for i in range(5)
+        }
+        assert [item["price"] for item in items] == sorted(
+            item["price"] for item in items
+        )
+        for item in items:
+            assert item["total_price"] == item["price"] * 2
+            assert item["link"].startswith("https://www.trovaprezzi.it/goto/")
+
+    def test_missing_fields(self):
+        rows = generate_raw_offers(200, sellers=20, missing_rate=1.0)
+        assert all(row["merchant_rating"] is None for row in rows)
+        assert all(row["free_delivery"] is None for row in rows)
+        assert all(row["availability"] == "not available" for row in rows)
+
+        parser = OfferParser()
+        html_content = generate_listing_html(20, sellers=5, missing_rate=1.0)
+        _, items = parser.extract_prices_plus_shipping(html_content, 1)
+        for item in items:
+            assert item["seller_rating"] is None
+            assert item["delivery_price"] == 0.0
+            assert item["free_delivery"] is None
+            assert item["availability"] is False
+
+    def test_shipping_included_listing(self):
+        parser = OfferParser()
+        html_content = generate_listing_html(5, shipping_included=True)
+        _, item = parser.extract_best_price_shipping_included(html_content, 1)
+        assert item["delivery_price"] == 0.0
+        assert item["link"] == "https://www.trovaprezzi.it/goto/0"
+
+    def test_listings_are_reproducible(self):
+        assert generate_listing_html(10, seed=3) == generate_listing_html(10, seed=3)
+        assert generate_listing_html(10, seed=3) != generate_listing_html(10, seed=4)
+
+
+class TestBenchmarks:
+    def test_run_and_compare_with_baseline(self, tmp_path):
+        results = run_benchmarks(sizes=[10], repeat=1)
+        assert set(results["results"]) == {
+            "extract_prices_plus_shipping",
+            "convert_data_types",
+            "convert_rows",
+            "find_best_individual_deals",
+            "find_best_cumulative_deals",
+            "rank_deals",
+            "find_topups",
+            "save_individual_deals",
+            "save_best_individual_deals",
+            "save_best_cumulative_deals",
+        }
+
+        baseline_file = str(tmp_path / "baseline.json")
+        assert all(row["delta"] is None for row in compare(results, {}))
+        save_baseline(baseline_file, results)
+        baseline = load_baseline(baseline_file)
+        rows = compare(results, baseline)
+        assert all(row["delta"] == 0 for row in rows)
+
+    def test_delta_in_percent(self):
+        results = {"results": {"bench": {"10": {"min": 1.5, "median": 1.5}}}}
+        baseline = {"results": {"bench": {"10": {"min": 1.0, "median": 1.0}}}}
+        assert compare(results, baseline)[0]["delta"] == 50.0
@@ -0,0 +1,65 @@
+import pytest
+
+from tpscanner.bench import generate_raw_offers, render_listing_html
+from tpscanner.config import config
+from tpscanner.scraper import OfferParser, Scraper
+from tpscanner.scraper.capture import capture_mode
+
+
+class FakeDriver:
+    page_source = "<html><body><div class='px-captcha'></div></body></html>"
+
+    def __init__(self, captured):
+        self.captured = captured
+
+    def execute_script(self, script, *args):
+        return self.captured
+
+
+def captured_rows(name, rows, shipping_included=False):
+    # the fields as returned by the capture script: missing elements are null
+    return {
+        "name_parts": [name],
+        "rows": [
+            dict(
+                row,
+                delivery_price=None if shipping_included else row["delivery_price"],
+                availability=None
+                if row["availability"] == "not available"
+                else row["availability"],
+            )
+            for row in rows
+        ],
+    }
+
+
+def test_captured_rows_give_the_same_offers_as_the_page():
+    parser = OfferParser()
+    rows = generate_raw_offers(40, sellers=8, missing_rate=0.3, seed=7)
+
+    assert parser.extract_prices_plus_shipping(
+        captured_rows("Product X", rows), 2
+    ) == parser.extract_prices_plus_shipping(render_listing_html("Product X", rows), 2)
+    assert parser.extract_best_price_shipping_included(
+        captured_rows("Product X", rows[:1], shipping_included=True), 2
+    ) == parser.extract_best_price_shipping_included(
+        render_listing_html("Product X", rows, shipping_included=True), 2
+    )
+
+
+def test_capture_falls_back_to_the_page_without_listing():
+    # a scraper without a browser
+    scraper = Scraper.__new__(Scraper)
+    scraper.capture = "rows"
+    scraper.driver = FakeDriver(None)
+
+    assert scraper._capture() == FakeDriver.page_source
+
+
+def test_rows_are_not_captured_when_recording(monkeypatch):
+    monkeypatch.setattr(config, "capture_mode", "rows", raising=False)
+    assert capture_mode() == "rows"
+    assert capture_mode(record=True) == "listing"
+    monkeypatch.setattr(config, "capture_mode", "dom", raising=False)
+    with pytest.raises(ValueError):
+        capture_mode()
@@ -0,0 +1,73 @@
+import os
+import sys
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.core import Scanner
+from tpscanner.io import Checkpoint
+from tpscanner.scraper.scraper import save_pages
+from tpscanner.tpscanner import parse_command_line, setup_cli_parser
+
+URLS = ["https://www.trovaprezzi.it/a", "https://www.trovaprezzi.it/b"]
+
+
+def _scanner(replay_dir, checkpoint, quantities=(1, 2)):
+    return Scanner(
+        "",
+        URLS,
+        list(quantities),
+        0,
+        False,
+        False,
+        False,
+        replay_dir=str(replay_dir),
+        checkpoint=checkpoint,
+    )
+
+
+def test_resume_loads_completed_products(tmp_path):
+    pages = tmp_path / "pages"
+    for i, url in enumerate(URLS):
+        save_pages(
+            str(pages),
+            url,
+            generate_listing_html(5, seed=i, name=f"Product {i}"),
+            generate_listing_html(5, seed=i, shipping_included=True),
+        )
+    filename = str(tmp_path / "checkpoint.jsonl")
+    scanner = _scanner(pages, Checkpoint(filename))
+    scanner.scan()
+
+    # simulate a crash while the next line was being written
+    with open(filename, "a") as f:
+        f.write('{"url": "https://www.trovaprezzi.it/c", "na')
+
+    # the pages are gone, so the offers can only come from the checkpoint
+    empty = tmp_path / "empty"
+    resumed = _scanner(empty, Checkpoint(filename, resume=True))
+    resumed.scan()
+    assert resumed.individual_deals == scanner.individual_deals
+
+    # URLs with a different quantity are scanned again
+    rescanned = _scanner(empty, Checkpoint(filename, resume=True), (1, 3))
+    rescanned.scan()
+    assert list(rescanned.individual_deals) == ["Product 0"]
+    assert rescanned.quarantined[URLS[1]]["kind"] == "unknown"
+
+    # without --resume the checkpoint is emptied
+    assert Checkpoint(filename).completed() == {}
+
+
+def test_each_input_gets_its_own_checkpoint(monkeypatch, tmp_path):
+    parser = setup_cli_parser()
+    checkpoints = []
+    for argv in (["-u", URLS[0]], ["-u", URLS[1]], ["-u", URLS[1]]):
+        monkeypatch.setattr(sys, "argv", ["tpscanner", *argv, "-c"])
+        checkpoints.append(parse_command_line(parser).checkpoint)
+    assert checkpoints[0] != checkpoints[1] == checkpoints[2]
+    assert os.path.basename(checkpoints[0]).startswith("checkpoint_")
+
+    filename = str(tmp_path / "run.jsonl")
+    monkeypatch.setattr(
+        sys, "argv", ["tpscanner", "-u", URLS[0], "--checkpoint", filename, "-c"]
+    )
+    assert parse_command_line(parser).checkpoint == filename
@@ -0,0 +1,22 @@
+from tpscanner.bench import generate_raw_offers
+from tpscanner.bench.bench import _convert_rows
+from tpscanner.scraper.convert import convert_rows, parse_rating, site_url
+
+
+def test_batch_conversion_is_identical_to_the_converter():
+    rows = generate_raw_offers(500, sellers=20, missing_rate=0.3, seed=3)
+    # fields missing as empty strings rather than None
+    rows[0]["free_delivery"] = ""
+    rows[1]["merchant_rating"] = ""
+
+    for quantity in (1, 3):
+        expected = _convert_rows(rows, quantity)
+        converted = convert_rows(rows, quantity)
+        assert converted == expected
+        assert [list(item) for item in converted] == [list(item) for item in expected]
+
+
+def test_field_parsers():
+    assert parse_rating("merchant_reviews rating_image rate45") == 4.5
+    assert site_url("/negozi/a") == "https://www.trovaprezzi.it/negozi/a"
+    assert site_url("/negozi/a") is site_url("/negozi/a")
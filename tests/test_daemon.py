@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+
+import pytest
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.daemon import (
+    Daemon,
+    VolatilityScheduler,
+    WatchlistEntry,
+    expected_staleness,
+    parse_watchlist,
+)
+from tpscanner.io import SnapshotStore
+from tpscanner.scraper.scraper import save_pages
+from tpscanner.utils import RateLimiter
+
+
+def test_parse_watchlist():
+    lines = [
+        "# products to watch",
+        "",
+        "https://www.trovaprezzi.it/a",
+        "https://www.trovaprezzi.it/b 3",
+        "https://www.trovaprezzi.it/c 2 15m 5",
+        "https://www.trovaprezzi.it/d 1 2h 0 49.90",
+        "https://www.trovaprezzi.it/e/?utm_source=x#top",
+    ]
+    assert parse_watchlist(lines, 3600) == [
+        WatchlistEntry("https://www.trovaprezzi.it/a", 1, 3600, 0),
+        WatchlistEntry("https://www.trovaprezzi.it/b", 3, 3600, 0),
+        WatchlistEntry("https://www.trovaprezzi.it/c", 2, 900, 5),
+        WatchlistEntry("https://www.trovaprezzi.it/d", 1, 7200, 0, 49.9),
+        WatchlistEntry("https://www.trovaprezzi.it/e", 1, 3600, 0),
+    ]
+
+
+def test_parse_watchlist_skips_invalid_lines():
+    lines = [
+        "https://www.trovaprezzi.it/a two",
+        "https://www.trovaprezzi.it/b 1 soon",
+        "https://www.trovaprezzi.it/c 0",
+        "https://www.trovaprezzi.it/d 1 1h",
+    ]
+    assert parse_watchlist(lines, 3600) == [
+        WatchlistEntry("https://www.trovaprezzi.it/d", 1, 3600, 0),
+    ]
+
+
+def test_unreadable_watchlist_keeps_previous_entries(tmp_path):
+    url = "https://www.trovaprezzi.it/a"
+    watchlist = tmp_path / "watchlist.txt"
+    watchlist.write_text(f"{url} 2\n")
+    daemon = Daemon(str(watchlist), 0, False, replay_dir=str(tmp_path))
+    assert daemon.reload_watchlist(force=True)
+
+    watchlist.write_bytes(b"\xff\xfe not a watchlist")
+    assert not daemon.reload_watchlist(force=True)
+    assert list(daemon.entries) == [url]
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(requests_per_minute=600)
+    start = time.monotonic()
+    for _ in range(3):
+        assert limiter.acquire()
+    assert time.monotonic() - start >= 0.2
+
+
+def test_daemon_rescans_and_reloads_watchlist(tmp_path):
+    urls = ["https://www.trovaprezzi.it/a", "https://www.trovaprezzi.it/b"]
+    for i, url in enumerate(urls):
+        save_pages(
+            str(tmp_path),
+            url,
+            generate_listing_html(5, seed=i, name=f"Product {i}"),
+            generate_listing_html(5, seed=i, shipping_included=True),
+        )
+    watchlist = tmp_path / "watchlist.txt"
+    watchlist.write_text(f"{urls[0]} 2 0.2s\n")
+    store = SnapshotStore(str(tmp_path / "snapshots.jsonl"))
+    daemon = Daemon(
+        str(watchlist),
+        0,
+        False,
+        replay_dir=str(tmp_path),
+        store=store,
+        requests_per_minute=6000,
+    )
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+    try:
+        time.sleep(0.5)
+        watchlist.write_text(f"{urls[1]} 1 1h\n")
+        daemon.reload()
+        time.sleep(0.5)
+    finally:
+        daemon.stop()
+        thread.join(timeout=5)
+
+    snapshots = list(store.iter_snapshots())
+    scanned = [snapshot["url"] for snapshot in snapshots]
+    assert scanned.count(urls[0]) >= 2
+    assert scanned.count(urls[1]) == 1
+    latest = store.latest()
+    assert latest[urls[0]]["name"] == "Product 0"
+    assert latest[urls[0]]["quantity"] == 2
+    assert len(latest[urls[1]]["items"]) == 5
+
+
+class _Resilience:
+    def __init__(self, result):
+        self.result = result
+
+    def call(self, function, url):
+        return self.result
+
+
+def test_excel_output_is_replaced_at_each_scan(monkeypatch, tmp_path):
+    from openpyxl import load_workbook
+
+    from tpscanner.config import config
+
+    monkeypatch.setattr(config, "output_dir", str(tmp_path / "out"), raising=False)
+    daemon = Daemon(
+        str(tmp_path / "watchlist.txt"),
+        0,
+        False,
+        excel_out=True,
+        replay_dir=str(tmp_path),
+        store=SnapshotStore(str(tmp_path / "snapshots.jsonl")),
+    )
+    entry = WatchlistEntry("https://www.trovaprezzi.it/a", 1, 3600, 0)
+    offer = dict(
+        _offers(10.0)[0],
+        seller_link="https://www.trovaprezzi.it/negozi/seller",
+        seller_reviews=10,
+        seller_reviews_link="https://www.trovaprezzi.it/opinioni/seller",
+        seller_rating=4.5,
+        quantity=1,
+        free_delivery=None,
+        total_price=10.0,
+        total_price_plus_delivery=10.0,
+        link="https://www.trovaprezzi.it/goto/seller",
+    )
+    for _ in range(3):
+        daemon.scan_entry(_Resilience(("Product 1", [offer])), entry)
+
+    assert os.listdir(tmp_path / "out") == ["watch_Product_1.xlsx"]
+    workbook = load_workbook(tmp_path / "out" / "watch_Product_1.xlsx")
+    assert workbook.sheetnames == ["Product 1"]
+
+
+def _offers(price):
+    return [
+        {
+            "seller": "Seller",
+            "price": price,
+            "delivery_price": 0.0,
+            "availability": True,
+        }
+    ]
+
+
+def test_volatile_products_get_more_of_the_budget():
+    scheduler = VolatilityScheduler(
+        requests_per_minute=1, min_interval=60, max_interval=86400
+    )
+    for i in range(10):
+        scheduler.observe("volatile", i * 600, _offers(10.0 + i))
+        scheduler.observe("stable", i * 600, _offers(10.0))
+        scheduler.observe("target", i * 600, _offers(10.0 + i % 2))
+    entries = [
+        WatchlistEntry("volatile", 1, 3600, 0),
+        WatchlistEntry("stable", 1, 3600, 0),
+        WatchlistEntry("target", 1, 3600, 0, target=10.5),
+    ]
+
+    intervals = scheduler.intervals(entries)
+    assert intervals["volatile"] < intervals["stable"]
+    assert intervals["target"] < intervals["volatile"]
+    assert sum(1 / interval for interval in intervals.values()) <= 1 / 60 + 1e-9
+
+    report = scheduler.report(entries)
+    assert {row["url"] for row in report} == {"volatile", "stable", "target"}
+    for row in report:
+        assert 0 <= row["expected_staleness"] < 1
+        assert row["expected_staleness"] == pytest.approx(
+            expected_staleness(row["changes_per_hour"] / 3600, row["interval"])
+        )
+
+
+def test_adaptive_intervals_are_computed_once_per_reload(tmp_path, monkeypatch):
+    watchlist = tmp_path / "watchlist.txt"
+    watchlist.write_text("https://www.trovaprezzi.it/a\nhttps://www.trovaprezzi.it/b\n")
+    daemon = Daemon(str(watchlist), 0, False, replay_dir=str(tmp_path), adaptive=True)
+    calls = []
+    intervals = daemon.scheduler.intervals
+    monkeypatch.setattr(
+        daemon.scheduler,
+        "intervals",
+        lambda entries: calls.append(1) or intervals(entries),
+    )
+    daemon.reload_watchlist(force=True)
+    for _ in range(3):
+        # as if the scans of all the products were done
+        daemon._sequence.clear()
+        for entry in daemon.entries.values():
+            daemon._reschedule(entry)
+    assert len(calls) == 1
+
+    daemon.reload_watchlist(force=True)
+    daemon._sequence.clear()
+    daemon._reschedule(daemon.entries["https://www.trovaprezzi.it/a"])
+    assert len(calls) == 2
@@ -0,0 +1,109 @@
+import threading
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.core import Scanner
+from tpscanner.distributed import Coordinator, Worker, WorkQueue
+from tpscanner.io import Checkpoint
+from tpscanner.scraper.scraper import save_pages
+
+
+def test_expired_leases_are_retried_then_failed(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), visibility_timeout=-1, max_attempts=2)
+    run_id = queue.submit(["https://www.trovaprezzi.it/a"], [2])
+
+    job = queue.lease("worker-1")
+    assert job["url"] == "https://www.trovaprezzi.it/a"
+    assert job["quantity"] == 2
+    # the lease expired at once, so another worker gets the job
+    assert queue.lease("worker-2")["attempt"] == 2
+    assert not queue.complete(job["id"], "worker-1", "A", [])
+    assert queue.lease("worker-3") is None
+    assert queue.status(run_id)["failed"] == 1
+
+
+def test_failed_attempts_are_retried(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    run_id = queue.submit(["https://www.trovaprezzi.it/a"], [1])
+
+    job = queue.lease("worker")
+    queue.fail(job["id"], "worker", "timeout")
+    assert queue.status(run_id)["pending"] == 1
+    job = queue.lease("worker")
+    assert queue.lease("worker") is None
+    assert queue.complete(job["id"], "worker", "A", [{"price": 1.0}])
+    assert queue.results(run_id)[0]["items"] == [{"price": 1.0}]
+
+
+def test_only_retryable_errors_are_retried(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), max_attempts=3)
+    # the page of the product was not recorded
+    run_id = queue.submit(["https://www.trovaprezzi.it/a"], [1])
+    worker = Worker(
+        queue,
+        Scanner("", [], [], 0, False, False, False, replay_dir=str(tmp_path)),
+        poll_interval=0.05,
+    )
+    assert worker.run(max_idle=0.2) == 0
+
+    [result] = queue.results(run_id)
+    assert result["state"] == "failed"
+    assert result["attempts"] == 1
+    assert not result["error"].startswith(("timeout", "captcha", "driver_crash"))
+
+    run_id = queue.submit(["https://www.trovaprezzi.it/b"], [1])
+    job = queue.lease("worker")
+    queue.fail(job["id"], "worker", "layout: No offers.", retry=False)
+    assert queue.status(run_id)["failed"] == 1
+
+
+def test_coordinator_collects_offers_from_workers(tmp_path):
+    urls = ["https://www.trovaprezzi.it/a", "https://www.trovaprezzi.it/b"]
+    for i, url in enumerate(urls):
+        save_pages(
+            str(tmp_path),
+            url,
+            generate_listing_html(5, seed=i, name=f"Product {i}"),
+            generate_listing_html(5, seed=i, shipping_included=True),
+        )
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    workers = [
+        Worker(
+            queue,
+            Scanner("", [], [], 0, False, False, False, replay_dir=str(tmp_path)),
+            poll_interval=0.05,
+        )
+        for _ in range(2)
+    ]
+    threads = [
+        threading.Thread(target=worker.run, kwargs={"max_idle": 1})
+        for worker in workers
+    ]
+    for thread in threads:
+        thread.start()
+
+    scanner = Scanner(
+        "", urls + ["https://www.trovaprezzi.it/c"], [1, 2, 1], 0, False, False, False
+    )
+    Coordinator(WorkQueue(str(tmp_path / "queue.db"), max_attempts=1), 0.05).scan(
+        scanner, timeout=10
+    )
+    for thread in threads:
+        thread.join()
+
+    assert set(scanner.individual_deals) == {"Product 0", "Product 1"}
+    assert all(item["quantity"] == 2 for item in scanner.individual_deals["Product 1"])
+
+
+def test_coordinator_resumes_and_quarantines_unreported_products(tmp_path):
+    urls = ["https://www.trovaprezzi.it/a", "https://www.trovaprezzi.it/b"]
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    checkpoint.append(urls[0], "Product 0", 1, [])
+    scanner = Scanner("", urls, [1, 1], 0, False, False, False, checkpoint=checkpoint)
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    # no worker is running, so the second product is never reported
+    run_id = Coordinator(queue, 0.05).scan(scanner, timeout=0.2)
+
+    assert [result["url"] for result in queue.results(run_id)] == [urls[1]]
+    assert queue.status(run_id)["failed"] == 1
+    assert scanner.product_names == {urls[0]: "Product 0"}
+    assert scanner.quarantined[urls[1]]["kind"] == "timeout"
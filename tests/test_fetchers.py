@@ -0,0 +1,126 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.core import Scanner, parse_offers
+from tpscanner.scraper import (
+    CacheFetcher,
+    FakeFetcher,
+    Fetcher,
+    HttpFetcher,
+    ReplayScraper,
+    Scraper,
+    create_fetcher,
+    fetcher_kind,
+)
+from tpscanner.scraper.resilience import BlockedError, classify_error
+
+URLS = [f"https://www.trovaprezzi.it/p{i}" for i in range(50)]
+
+
+def test_fetcher_kind():
+    assert fetcher_kind("http") == "http"
+    assert fetcher_kind("http", replay_dir="pages") == "replay"
+    assert fetcher_kind("fake", replay_dir="pages") == "fake"
+    with pytest.raises(ValueError):
+        fetcher_kind("curl")
+
+
+def test_fetchers_must_download_the_pages():
+    class NoDownload(Fetcher):
+        pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        NoDownload()
+    # the fetchers without a browser do not inherit the methods of the Scraper
+    for kind in ("http", "fake"):
+        fetcher = create_fetcher(kind, 0, False)
+        assert isinstance(fetcher, Fetcher)
+        assert not isinstance(fetcher, Scraper)
+    with pytest.raises(ValueError):
+        create_fetcher("replay", 0, False)
+
+
+def test_fake_fetcher_serves_stable_listings_with_failures():
+    fetcher = FakeFetcher(0, False, offers=10, failure_rate=0.2, crash_rate=0.1, seed=1)
+    kinds = {}
+    names = {}
+    for url in URLS * 4:
+        try:
+            pages = fetcher.download_html(url)
+        except Exception as e:
+            kind = classify_error(e)
+            kinds[kind] = kinds.get(kind, 0) + 1
+            continue
+        name, items = parse_offers(pages, 1)
+        assert len(items) >= 10
+        assert names.setdefault(url, name) == name
+    assert set(kinds) == {"timeout", "driver_crash"}
+    assert 20 <= sum(kinds.values()) <= 100
+
+
+def test_scanner_depends_on_the_fetcher_kind(tmp_path):
+    scanner = Scanner(urls=URLS, quantities=[1] * len(URLS), fetcher="fake")
+    assert isinstance(scanner.create_scraper(), FakeFetcher)
+    products = list(scanner.iter_scan())
+    assert len(products) == len(URLS)
+    assert isinstance(Scanner(replay_dir=str(tmp_path)).create_scraper(), ReplayScraper)
+
+
+@pytest.fixture
+def listing_server():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            if self.path == "/blocked":
+                self.send_response(429)
+                self.end_headers()
+                return
+            body = generate_listing_html(15, seed=3, name="Product 3").encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_fetcher(listing_server):
+    base, _ = listing_server
+    fetcher = HttpFetcher(0, False)
+    name, items = parse_offers(fetcher.download_html(f"{base}/product"), 2)
+    assert name == "Product 3"
+    assert len(items) == 15
+    assert items[0]["quantity"] == 2
+    with pytest.raises(BlockedError):
+        fetcher.download_html(f"{base}/blocked")
+
+
+def test_cache_fetcher_serves_fresh_pages_from_disk(listing_server, tmp_path):
+    base, requests = listing_server
+    created = []
+
+    def factory():
+        created.append(HttpFetcher(0, False, str(tmp_path)))
+        return created[-1]
+
+    fetcher = CacheFetcher(factory, str(tmp_path), ttl=60)
+    first = fetcher.download_html(f"{base}/product")
+    assert fetcher.download_html(f"{base}/product") == first
+    assert len(requests) == 1
+
+    # a new cache over the same directory does not create the fetcher at all
+    cached = CacheFetcher(factory, str(tmp_path), ttl=60)
+    assert cached.download_html(f"{base}/product") == first
+    assert len(created) == 1
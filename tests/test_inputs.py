@@ -0,0 +1,104 @@
+import io as stdio
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+from tpscanner.io import UrlInput, canonical_url, merge_inputs
+from tpscanner.tpscanner import parse_command_line, setup_cli_parser
+
+URL = "https://www.trovaprezzi.it/prezzo_mouse.aspx"
+
+
+def test_canonical_url():
+    assert canonical_url(URL) == URL
+    assert canonical_url(" HTTPS://WWW.Trovaprezzi.it:443/prezzo_mouse.aspx/ ") == URL
+    assert canonical_url(f"{URL}?utm_source=mail&fbclid=x#offers") == URL
+    assert canonical_url(f"{URL}?b=2&a=1&gclid=x") == f"{URL}?a=1&b=2"
+    assert canonical_url("http://localhost:8080/") == "http://localhost:8080"
+
+
+def test_file_is_deduplicated_and_quantities_merged(tmp_path):
+    filename = tmp_path / "urls.txt"
+    filename.write_text(
+        "# products\n"
+        f"{URL}   2\n"
+        "\n"
+        f"{URL}b\t1  \n"
+        f"{URL}/?utm_campaign=x 3\n"
+        + json.dumps({"url": f"{URL}c", "quantity": 4})
+        + "\n"
+        + json.dumps({"url": f"{URL}b"})
+        + "\n"
+    )
+    inputs = UrlInput(str(filename))
+    expected = [(URL, 5), (f"{URL}b", 2), (f"{URL}c", 4)]
+    assert len(inputs) == 3
+    assert list(inputs) == expected
+    # the file is read again at each iteration
+    assert list(zip(inputs.urls, inputs.quantities)) == expected
+
+
+def test_stdin_and_invalid_lines(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, "stdin", stdio.StringIO(f"{URL}\n{URL}#top 2\n"))
+    inputs = UrlInput("-")
+    assert list(inputs) == list(inputs) == [(URL, 3)]
+    inputs.close()
+
+    # the URLs and the quantities of stdin are read at the same time
+    monkeypatch.setattr(sys, "stdin", stdio.StringIO(f"{URL} 2\n{URL}b\n{URL}c 4\n"))
+    inputs = UrlInput("-")
+    spool = inputs._spool
+    assert list(zip(inputs.urls, inputs.quantities)) == [
+        (URL, 2),
+        (f"{URL}b", 1),
+        (f"{URL}c", 4),
+    ]
+    inputs.close()
+    assert not os.path.exists(spool)
+
+    filename = tmp_path / "urls.txt"
+    filename.write_text(f"{URL}\n{URL} 1 extra\n")
+    with pytest.raises(ValueError, match="line 2"):
+        UrlInput(str(filename))
+
+    # the copy of invalid stdin is removed
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "spool"))
+    os.makedirs(tempfile.tempdir)
+    monkeypatch.setattr(sys, "stdin", stdio.StringIO(f"{URL}\n{URL} 1 extra\n"))
+    with pytest.raises(ValueError, match="line 2"):
+        UrlInput("-")
+    assert os.listdir(tempfile.tempdir) == []
+
+
+def test_command_line_urls(monkeypatch, tmp_path):
+    filename = tmp_path / "urls.txt"
+    filename.write_text(f"{URL}  2\n{URL}/ 1\n")
+    parser = setup_cli_parser()
+    monkeypatch.setattr(sys, "argv", ["tpscanner", "-f", str(filename), "-c"])
+    args = parse_command_line(parser)
+    assert len(args.urls) == 1
+    assert list(zip(args.urls, args.quantities)) == [(URL, 3)]
+
+    assert merge_inputs([URL, f"{URL}/", f"{URL}b"], [1, 2, 1]) == (
+        [URL, f"{URL}b"],
+        [3, 1],
+    )
+
+
+def test_command_line_quantities_match_the_urls(monkeypatch):
+    parser = setup_cli_parser()
+    argv = ["tpscanner", "-u", URL, f"{URL}b", f"{URL}c", "-q", "2", "-c"]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit):
+        parse_command_line(parser)
+
+    monkeypatch.setattr(sys, "argv", [*argv[:-1], "1", "3", "-c"])
+    args = parse_command_line(parser)
+    assert list(zip(args.urls, args.quantities)) == [
+        (URL, 2),
+        (f"{URL}b", 1),
+        (f"{URL}c", 3),
+    ]
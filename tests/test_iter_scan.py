@@ -0,0 +1,64 @@
+import threading
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.core import Scanner, best_individual_deals, cumulative_deals
+from tpscanner.scraper import ReplayScraper
+from tpscanner.scraper.scraper import save_pages
+
+URLS = [f"https://www.trovaprezzi.it/{c}" for c in "abc"]
+
+
+def _record(directory):
+    for i, url in enumerate(URLS):
+        save_pages(
+            str(directory),
+            url,
+            generate_listing_html(40, seed=i, name=f"Product {i}"),
+            generate_listing_html(40, seed=i, shipping_included=True),
+        )
+
+
+def test_products_are_yielded_as_found(tmp_path):
+    _record(tmp_path)
+    scanner = Scanner(replay_dir=str(tmp_path))
+    done = []
+    products = scanner.iter_scan(iter(URLS), [1, 2, 1], progress=lambda: done.append(1))
+
+    first = next(products)
+    assert (first.url, first.name, first.quantity) == (URLS[0], "Product 0", 1)
+    assert len(done) == 1
+    assert [p.name for p in products] == ["Product 1", "Product 2"]
+    # the scanner does not keep the products
+    assert scanner.individual_deals == {}
+
+
+def test_scan_can_be_cancelled(tmp_path, monkeypatch):
+    _record(tmp_path)
+    closed = []
+    monkeypatch.setattr(ReplayScraper, "quit", lambda self: closed.append(self))
+    scanner = Scanner(urls=URLS, quantities=[1, 1, 1], replay_dir=str(tmp_path))
+
+    cancel = threading.Event()
+    names = []
+    for product in scanner.iter_scan(cancel=cancel):
+        names.append(product.name)
+        cancel.set()
+    assert names == ["Product 0"]
+    assert len(closed) == 1
+
+    for product in scanner.iter_scan():
+        break
+    assert len(closed) == 2
+
+
+def test_deals_computed_from_the_products_yielded(tmp_path):
+    _record(tmp_path)
+    scanner = Scanner(urls=URLS, quantities=[1, 2, 1], replay_dir=str(tmp_path))
+    scanner.scan()
+    scanner.find_best_individual_deals()
+    scanner.find_best_cumulative_deals()
+
+    streamed = Scanner(replay_dir=str(tmp_path))
+    products = [(p.name, p.items) for p in streamed.iter_scan(URLS, [1, 2, 1])]
+    assert list(best_individual_deals(products)) == scanner.best_individual_deals
+    assert cumulative_deals(iter(products)) == scanner.best_cumulative_deals
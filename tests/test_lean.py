@@ -0,0 +1,58 @@
+from tpscanner.config import config
+from tpscanner.metrics import metrics
+from tpscanner.scraper.lean import DEFAULT_BLOCK_URLS, LoadSavings, blocked_url_patterns
+
+
+class FakeDriver:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def execute_script(self, script):
+        return self.stats
+
+
+def test_allow_list_removes_blocked_patterns(monkeypatch):
+    monkeypatch.setattr(config, "lean_block_urls", None, raising=False)
+    monkeypatch.setattr(config, "lean_allow_urls", ["*.svg", "*hotjar*"], raising=False)
+    patterns = blocked_url_patterns()
+    assert "*.png" in patterns
+    assert "*.svg" not in patterns
+    assert "*hotjar.com*" not in patterns
+    assert len(patterns) == len(DEFAULT_BLOCK_URLS) - 2
+
+
+def test_savings_against_full_reference():
+    metrics.reset()
+    savings = LoadSavings()
+    savings.reference = {
+        "bytes": 3_000_000,
+        "requests": 150,
+        "dom_ms": 900,
+        "load_ms": 4000,
+    }
+    savings.record(
+        FakeDriver({"bytes": 500_000, "requests": 20, "dom_ms": 800, "load_ms": 0}),
+        "https://www.trovaprezzi.it/a",
+    )
+    assert metrics.counters["transfer_bytes"] == 500_000
+    assert metrics.counters["bytes_saved"] == 2_500_000
+    assert metrics.counters["ms_saved"] == 3200
+
+
+def test_concurrent_scrapers_get_separate_profiles(monkeypatch, tmp_path):
+    from tpscanner.scraper import Scraper
+
+    monkeypatch.setattr(
+        config, "user_data_dir", str(tmp_path / "profile"), raising=False
+    )
+    first = Scraper.__new__(Scraper)
+    first.driver = None
+    first.profile_dir = first._acquire_profile_dir()
+    second = Scraper.__new__(Scraper)
+    second.driver = None
+    second.profile_dir = second._acquire_profile_dir()
+    assert first.profile_dir == str(tmp_path / "profile")
+    assert second.profile_dir == str(tmp_path / "profile-1")
+    first.quit()
+    second.quit()
+    assert not Scraper._profiles_in_use
@@ -0,0 +1,93 @@
+import json
+import logging
+
+from tpscanner.logger import logger
+from tpscanner.logger.logger import JsonLinesHandler, MarkupFormatter
+
+
+class CountingArg:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "arg"
+
+
+class TestLazyLogging:
+    def test_disabled_level_does_not_format_arguments(self, caplog):
+        arg = CountingArg()
+        with caplog.at_level(logging.WARNING, logger="rich"):
+            logger.debug("value %s", arg)
+            logger.info("value %s", arg)
+        assert arg.calls == 0
+        assert not caplog.records
+
+    def test_enabled_level_formats_arguments(self, caplog):
+        arg = CountingArg()
+        with caplog.at_level(logging.INFO, logger="rich"):
+            logger.info("value %s", arg, product="Item 1")
+        assert arg.calls >= 1
+        assert caplog.records[0].getMessage() == "value arg"
+        assert caplog.records[0].fields == {"product": "Item 1"}
+
+    def test_markup_added_by_formatter(self):
+        record = logging.makeLogRecord(
+            {"msg": "Found %d deals", "args": (3,), "format_markup": "[cyan]"}
+        )
+        assert MarkupFormatter("%(message)s").format(record) == "[cyan]Found 3 deals[/]"
+
+
+class TestJsonLinesHandler:
+    def test_writes_structured_fields(self, tmp_path):
+        path = tmp_path / "log.jsonl"
+        handler = JsonLinesHandler(str(path))
+        tps_logger = logging.getLogger("rich")
+        tps_logger.addHandler(handler)
+        try:
+            previous_level = tps_logger.level
+            tps_logger.setLevel(logging.INFO)
+            logger.info(
+                "Found %d deals for `%s`.",
+                2,
+                "Item 1",
+                url="https://www.example.com",
+                product="Item 1",
+                phase="scan",
+                duration=1.5,
+            )
+        finally:
+            tps_logger.setLevel(previous_level)
+            tps_logger.removeHandler(handler)
+            handler.close()
+
+        entry = json.loads(path.read_text().splitlines()[0])
+        assert entry["level"] == "info"
+        assert entry["message"] == "Found 2 deals for `Item 1`."
+        assert entry["url"] == "https://www.example.com"
+        assert entry["product"] == "Item 1"
+        assert entry["phase"] == "scan"
+        assert entry["duration"] == 1.5
+        assert "[cyan]" not in entry["message"]
+
+    def test_set_log_level_replaces_the_handler(self, tmp_path):
+        tps_logger = logging.getLogger("rich")
+        previous_level = tps_logger.level
+        try:
+            for _ in range(3):
+                logger.set_log_level("warning", str(tmp_path / "log.jsonl"))
+            logger.info("Found %d deals.", 2)
+            handlers = [
+                handler
+                for handler in tps_logger.handlers
+                if isinstance(handler, JsonLinesHandler)
+            ]
+            assert len(handlers) == 1
+            handlers[0].flush()
+            assert len((tmp_path / "log.jsonl").read_text().splitlines()) == 1
+        finally:
+            logger.set_log_level("warning")
+            tps_logger.setLevel(previous_level)
+        assert not any(
+            isinstance(handler, JsonLinesHandler) for handler in tps_logger.handlers
+        )
@@ -0,0 +1,64 @@
+import importlib
+
+import pytest
+
+from tpscanner.metrics import metrics
+
+# the `metrics` instance shadows its module in the package
+metrics_module = importlib.import_module("tpscanner.metrics.metrics")
+
+URL = "https://www.trovaprezzi.it/a"
+
+
+def test_spans_are_aggregated_by_phase_and_url():
+    metrics.reset()
+    for _ in range(3):
+        with metrics.span("navigate", url=URL):
+            pass
+    with pytest.raises(ValueError):
+        with metrics.span("parse", url=URL):
+            raise ValueError("bad page")
+    with metrics.span("compute", step="individual"):
+        pass
+
+    report = metrics.report()
+    assert report["phases"]["navigate"]["count"] == 3
+    assert report["phases"]["navigate"]["errors"] == 0
+    assert report["phases"]["parse"]["errors"] == 1
+    assert set(report["urls"]) == {URL}
+    assert set(report["urls"][URL]) == {"navigate", "parse"}
+    assert report["urls"][URL]["navigate"] == pytest.approx(
+        report["phases"]["navigate"]["total"]
+    )
+
+
+def test_urls_are_bounded(monkeypatch):
+    monkeypatch.setattr(metrics_module, "MAX_URLS", 2)
+    metrics.reset()
+    for i in range(5):
+        with metrics.span("navigate", url=f"{URL}/{i}"):
+            pass
+    assert len(metrics.urls()) == 2
+    assert metrics.phases()["navigate"]["count"] == 5
+
+
+def test_prometheus_text_format(tmp_path):
+    metrics.reset()
+    metrics.incr("pages", 2)
+    with metrics.span("parse", url=URL):
+        pass
+    filename = tmp_path / "tpscanner.prom"
+    metrics.save_prometheus(str(filename))
+
+    lines = filename.read_text().splitlines()
+    assert "# TYPE tpscanner_pages gauge" in lines
+    assert "tpscanner_pages 2" in lines
+    assert "# TYPE tpscanner_phase_count gauge" in lines
+    assert 'tpscanner_phase_count{phase="parse"} 1' in lines
+    assert not any(line.startswith("# TYPE") and "counter" in line for line in lines)
+    # every sample is preceded by the HELP and TYPE of its metric
+    samples = [line for line in lines if not line.startswith("#")]
+    for sample in samples:
+        name = sample.split("{")[0].split(" ")[0]
+        assert f"# TYPE {name} gauge" in lines
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,49 @@
+from tpscanner.bench import generate_raw_offers, render_listing_html
+from tpscanner.core import Scanner
+from tpscanner.scraper.pagination import can_stop, has_offers, page_url_builder
+from tpscanner.scraper.scraper import save_pages
+
+
+def offer(price, delivery, quantity=2):
+    return {"price": price, "total_price_plus_delivery": price * quantity + delivery}
+
+
+def test_page_urls_from_the_more_offers_link():
+    page_url = page_url_builder(
+        "/prezzi_x.aspx?sort=price&page=2", "https://www.trovaprezzi.it/prezzi_x.aspx"
+    )
+    assert page_url(5) == "https://www.trovaprezzi.it/prezzi_x.aspx?sort=price&page=5"
+    assert page_url_builder("#", "https://www.trovaprezzi.it/") is None
+    assert page_url_builder("javascript:void(0)", "https://www.trovaprezzi.it/") is None
+    assert page_url_builder("/prezzi_x.aspx", "https://www.trovaprezzi.it/") is None
+
+
+def test_stop_once_the_remaining_offers_cannot_beat_the_best():
+    items = [offer(10, 8), offer(11, 0), offer(12, 9)]
+    # totals 28, 22 and 33, while any further offer costs at least 12 * 2 = 24
+    assert can_stop(items, 2, 1)
+    assert not can_stop(items, 2, 3)
+    assert not can_stop(items[:1], 2, 2)
+    assert not can_stop([], 1, 1)
+
+
+def test_recorded_offers_pages_are_replayed(tmp_path):
+    rows = generate_raw_offers(30, seed=1)
+    pages = [render_listing_html("Product", rows[i : i + 10]) for i in range(0, 30, 10)]
+    save_pages(
+        tmp_path,
+        "http://a",
+        pages[0],
+        render_listing_html("Product", rows, shipping_included=True),
+        *pages[1:],
+    )
+    assert has_offers(pages[2])
+    assert not has_offers(render_listing_html("Product", []))
+
+    scanner = Scanner(
+        "none", ["http://a"], [1], 0, False, False, False, replay_dir=tmp_path
+    )
+    scanner.scan()
+
+    links = {item["link"] for item in scanner.individual_deals["Product"]}
+    assert links == {f"https://www.trovaprezzi.it/goto/{i}" for i in range(30)}
@@ -0,0 +1,70 @@
+import pytest
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.config import config
+from tpscanner.core import Scanner
+from tpscanner.metrics import metrics
+from tpscanner.profiler import profiler
+from tpscanner.scraper.scraper import save_pages
+
+URLS = [f"https://www.trovaprezzi.it/{c}" for c in "abcd"]
+
+
+def _scan(replay_dir):
+    scanner = Scanner(
+        "", URLS, [1, 2, 3, 1], 0, False, False, False, replay_dir=str(replay_dir)
+    )
+    scanner.scan()
+    return scanner
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_pool_finds_the_same_offers_in_order(tmp_path, monkeypatch, executor):
+    for i, url in enumerate(URLS):
+        save_pages(
+            str(tmp_path),
+            url,
+            generate_listing_html(40, seed=i, name=f"Product {i}"),
+            generate_listing_html(40, seed=i, shipping_included=True),
+        )
+    # a page that cannot be parsed is quarantined
+    save_pages(str(tmp_path), URLS[2], "<html></html>", "<html></html>")
+    inline = _scan(tmp_path)
+
+    monkeypatch.setattr(config, "parse_workers", 2, raising=False)
+    monkeypatch.setattr(config, "parse_executor", executor, raising=False)
+    pooled = _scan(tmp_path)
+
+    assert list(pooled.individual_deals) == ["Product 0", "Product 1", "Product 3"]
+    assert pooled.individual_deals == inline.individual_deals
+    assert pooled.quarantined == inline.quarantined
+
+
+def test_process_pool_sees_runtime_settings_and_records_parsing(tmp_path, monkeypatch):
+    for i, url in enumerate(URLS):
+        save_pages(
+            str(tmp_path),
+            url,
+            generate_listing_html(40, seed=i, name=f"Product {i}"),
+            generate_listing_html(40, seed=i, shipping_included=True),
+        )
+    # weights set at run time, e.g. from the command line, and not in the file
+    monkeypatch.setattr(config, "rank_weight_rating", 5.0, raising=False)
+    monkeypatch.setattr(config, "rank_weight_cost", 0.1, raising=False)
+    inline = _scan(tmp_path)
+    prices = [item["price"] for item in inline.individual_deals["Product 0"]]
+    assert prices != sorted(prices)
+
+    monkeypatch.setattr(config, "parse_workers", 2, raising=False)
+    monkeypatch.setattr(config, "parse_executor", "process", raising=False)
+    metrics.reset()
+    profiler.reset()
+    profiler.enable()
+    try:
+        pooled = _scan(tmp_path)
+    finally:
+        profiler.disable()
+    assert pooled.individual_deals == inline.individual_deals
+    assert metrics.phases()["parse"]["count"] == len(URLS)
+    assert "Phase `parse`" in profiler.summary(top=3)
+    profiler.reset()
@@ -0,0 +1,59 @@
+import pytest
+
+from tpscanner.profiler import profiler
+
+
+@pytest.fixture
+def enabled_profiler():
+    profiler.reset()
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+    profiler.reset()
+
+
+def _allocate():
+    return [str(i) * 10 for i in range(10_000)]
+
+
+def test_snapshots_are_sampled(enabled_profiler, monkeypatch):
+    monkeypatch.setattr(enabled_profiler, "snapshot_every", 3)
+    for _ in range(7):
+        with enabled_profiler.phase("parse"):
+            _allocate()
+    memory = enabled_profiler.memory["parse"]
+    assert memory["entries"] == 7
+    # the first, the fourth and the seventh entry
+    assert memory["sampled"] == 3
+    assert memory["peak"] > 0
+    assert enabled_profiler.allocations["parse"]
+
+
+def test_nested_phases_are_not_profiled_separately(enabled_profiler):
+    with enabled_profiler.phase("compute"):
+        with enabled_profiler.phase("export"):
+            _allocate()
+    assert set(enabled_profiler.profiles) == {"compute"}
+
+
+def test_summary_and_saved_files(enabled_profiler, tmp_path):
+    with enabled_profiler.phase("scan"):
+        _allocate()
+    summary = enabled_profiler.summary(top=5)
+    assert "Phase `scan`: top 5 functions by cumulative time" in summary
+    assert "sampled on 1 entries" in summary
+
+    filenames = enabled_profiler.save(str(tmp_path), "test")
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "memory_scan_test.snapshot",
+        "profile_scan_test.prof",
+    ]
+    assert len(filenames) == 2
+
+
+def test_disabled_profiler_records_nothing():
+    profiler.reset()
+    with profiler.phase("scan"):
+        _allocate()
+    assert not profiler.profiles
+    assert not profiler.memory
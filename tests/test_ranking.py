@@ -0,0 +1,75 @@
+import math
+
+from tpscanner.bench.bench import _scanner, generate_individual_deals
+from tpscanner.core import rank_deals, rank_weights, score_deals
+
+
+def _offers():
+    return [item for items in generate_individual_deals(500).values() for item in items]
+
+
+def test_default_weights_rank_by_cost():
+    assert rank_weights() == {
+        "cost": 1.0,
+        "rating": 0.0,
+        "reviews": 0.0,
+        "availability": 0.0,
+    }
+    offers = _offers()
+    assert rank_deals(offers, "price") == sorted(offers, key=lambda x: x["price"])
+
+    individual_deals = generate_individual_deals(300, products=3)
+    scanner = _scanner(individual_deals)
+    scanner.find_best_cumulative_deals()
+    totals = [
+        deal["cumulative_price_plus_delivery"] for deal in scanner.best_cumulative_deals
+    ]
+    assert totals == sorted(totals)
+
+
+def test_weighted_criteria():
+    cheap = {
+        "price": 10.0,
+        "seller_rating": 2.0,
+        "seller_reviews": 3,
+        "availability": False,
+    }
+    trusted = {
+        "price": 11.0,
+        "seller_rating": 5.0,
+        "seller_reviews": 5000,
+        "availability": True,
+    }
+    assert rank_deals([trusted, cheap], "price") == [cheap, trusted]
+    # the whole range of costs is worth half the range of ratings
+    assert rank_deals([cheap, trusted], "price", {"rating": 2.0}) == [trusted, cheap]
+    assert rank_deals([cheap, trusted], "price", {"rating": 0.5}) == [cheap, trusted]
+    assert rank_deals([cheap, trusted], "price", {"reviews": 2.0}) == [trusted, cheap]
+    assert rank_deals([cheap, trusted], "price", {"availability": 2.0}) == [
+        trusted,
+        cheap,
+    ]
+    assert score_deals([cheap, trusted], "price", {"rating": 1.0}) == [
+        0.0 - 2.0 / 5.0,
+        1.0 - 5.0 / 5.0,
+    ]
+
+
+def test_scores_match_the_definition():
+    offers = _offers()
+    weights = {"cost": 2.0, "rating": 0.5, "reviews": 0.25, "availability": 0.1}
+    costs = [item["total_price_plus_delivery"] for item in offers]
+    max_log_reviews = max(math.log1p(item["seller_reviews"]) for item in offers)
+    expected = [
+        2.0
+        * (item["total_price_plus_delivery"] - min(costs))
+        / (max(costs) - min(costs))
+        - 0.5 * (item["seller_rating"] or 0) / 5.0
+        - 0.25 * math.log1p(item["seller_reviews"]) / max_log_reviews
+        - 0.1 * item["availability"]
+        for item in offers
+    ]
+    scores = score_deals(offers, "total_price_plus_delivery", weights)
+    assert all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(scores, expected))
+    ranked = rank_deals(offers, "total_price_plus_delivery", weights)
+    assert [expected[offers.index(item)] for item in ranked] == sorted(expected)
@@ -0,0 +1,132 @@
+import pytest
+
+from tpscanner.scraper import CircuitBreaker, Resilience, RetryPolicy
+from tpscanner.scraper.resilience import BlockedError, classify_error
+
+
+class TimeoutException(Exception):
+    pass
+
+
+class WebDriverException(Exception):
+    pass
+
+
+class FakeScraper:
+    def __init__(self, page_source="<html></html>"):
+        self.driver = self
+        self.page_source = page_source
+        self.closed = False
+
+    def save_screenshot(self, filename):
+        pass
+
+    def _save_screenshot(self):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+
+def _resilience(scrapers, max_attempts=3):
+    return Resilience(
+        lambda: scrapers.append(FakeScraper()) or scrapers[-1],
+        RetryPolicy(max_attempts, base_delay=0),
+        CircuitBreaker(window=10, threshold=0.5, cooldown=0),
+    )
+
+
+@pytest.mark.parametrize(
+    "error,page_source,kind",
+    [
+        (TimeoutException("timed out"), "<html></html>", "timeout"),
+        (TimeoutException("timed out"), '<div id="px-captcha"></div>', "captcha"),
+        (BlockedError("blocked"), "<html></html>", "captcha"),
+        (WebDriverException("invalid session id"), "<html></html>", "driver_crash"),
+        (IndexError("list index out of range"), "<html></html>", "layout"),
+        (FileNotFoundError("no page"), "<html></html>", "unknown"),
+    ],
+)
+def test_classify_error(error, page_source, kind):
+    assert classify_error(error, FakeScraper(page_source)) == kind
+
+
+def test_retries_until_success():
+    scrapers = []
+    resilience = _resilience(scrapers)
+    calls = []
+
+    def scan(scraper):
+        calls.append(scraper)
+        if len(calls) < 3:
+            raise TimeoutException("timed out")
+        return "ok"
+
+    assert resilience.call(scan, "url") == "ok"
+    assert len(calls) == 3
+    assert len(scrapers) == 1
+    assert not resilience.quarantined
+
+
+def test_driver_is_restarted_after_a_crash():
+    scrapers = []
+    resilience = _resilience(scrapers)
+
+    def scan(scraper):
+        if len(scrapers) == 1:
+            raise WebDriverException("chrome not reachable")
+        return "ok"
+
+    assert resilience.call(scan, "url") == "ok"
+    assert len(scrapers) == 2
+    assert scrapers[0].closed
+
+
+def test_browser_launch_failures_are_retried_and_quarantined():
+    launches = []
+
+    def factory():
+        launches.append(1)
+        raise WebDriverException("session not created")
+
+    resilience = Resilience(
+        factory,
+        RetryPolicy(2, base_delay=0),
+        CircuitBreaker(window=10, threshold=0.5, cooldown=0),
+    )
+    assert resilience.call(lambda scraper: "ok", "url") is None
+    assert len(launches) == 2
+    assert resilience.quarantined["url"] == {
+        "kind": "driver_crash",
+        "error": "session not created",
+        "attempts": 2,
+    }
+
+
+def test_persistent_failures_are_quarantined():
+    scrapers = []
+    resilience = _resilience(scrapers)
+
+    def layout(scraper):
+        raise IndexError("list index out of range")
+
+    def timeout(scraper):
+        raise TimeoutException("timed out")
+
+    assert resilience.call(layout, "a") is None
+    assert resilience.call(timeout, "b") is None
+    assert resilience.quarantined["a"]["attempts"] == 1
+    assert resilience.quarantined["b"] == {
+        "kind": "timeout",
+        "error": "timed out",
+        "attempts": 3,
+    }
+
+
+def test_circuit_breaker_opens_when_blocks_spike():
+    breaker = CircuitBreaker(window=4, threshold=0.5, cooldown=60)
+    breaker.record(False)
+    breaker.record(True)
+    assert not breaker.is_open
+    breaker.record(True)
+    assert breaker.is_open
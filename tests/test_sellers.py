@@ -0,0 +1,58 @@
+import pytest
+
+from tpscanner.bench.bench import _scanner, generate_individual_deals
+from tpscanner.core import SellerRegistry
+
+
+def test_each_seller_is_stored_once():
+    individual_deals = generate_individual_deals(300, products=3)
+    registry = SellerRegistry()
+    for items in individual_deals.values():
+        registry.register_all(items)
+
+    offers = [item for items in individual_deals.values() for item in items]
+    assert len(registry) == len({item["seller"] for item in offers})
+    for item in offers:
+        seller = registry[item["seller_id"]]
+        assert item["seller"] is seller.name
+        assert item["seller_link"] is seller.link
+
+
+def test_cumulative_deals_grouped_by_seller_id():
+    individual_deals = generate_individual_deals(300, products=3)
+    scanner = _scanner(individual_deals)
+    scanner.find_best_cumulative_deals()
+
+    common = set.intersection(
+        *({item["seller"] for item in items} for items in individual_deals.values())
+    )
+    assert {deal["seller"] for deal in scanner.best_cumulative_deals} == common
+    for deal in scanner.best_cumulative_deals:
+        assert deal["cumulative_price"] == pytest.approx(
+            sum(
+                item["total_price"]
+                for items in individual_deals.values()
+                for item in items
+                if item["seller"] == deal["seller"]
+            )
+        )
+    totals = [
+        deal["cumulative_price_plus_delivery"] for deal in scanner.best_cumulative_deals
+    ]
+    assert totals == sorted(totals)
+
+
+def test_offers_of_another_registry_are_registered_again():
+    individual_deals = generate_individual_deals(30, products=1)
+    items = next(iter(individual_deals.values()))
+    first = SellerRegistry()
+    first.register_all(items)
+    ids = [item["seller_id"] for item in items]
+    first.register_all(items)
+    assert [item["seller_id"] for item in items] == ids
+
+    # a registry that saw the sellers in another order gives other ids
+    second = SellerRegistry()
+    second.register_all(reversed(items))
+    for item in items:
+        assert second[item["seller_id"]].name == item["seller"]
@@ -0,0 +1,131 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import pytest
+
+from tpscanner.bench import generate_listing_html
+from tpscanner.core import Scanner
+from tpscanner.scraper.scraper import save_pages
+from tpscanner.server import (
+    ResultCache,
+    ScanFailed,
+    ScanService,
+    ServiceBusy,
+    create_server,
+)
+
+URLS = [f"https://www.trovaprezzi.it/{c}" for c in "ab"]
+
+
+def _record(directory):
+    for i, url in enumerate(URLS):
+        save_pages(
+            str(directory),
+            url,
+            generate_listing_html(20, seed=i, name=f"Product {i}"),
+            generate_listing_html(20, seed=i, shipping_included=True),
+        )
+
+
+def _service(directory, **kwargs):
+    return ScanService(
+        Scanner(wait=0, replay_dir=str(directory)),
+        workers=2,
+        requests_per_minute=6000,
+        **kwargs,
+    )
+
+
+def test_cache_expires_and_evicts_least_recently_used():
+    cache = ResultCache(size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    expired = ResultCache(size=2, ttl=0.01)
+    expired.put("a", 1)
+    threading.Event().wait(0.02)
+    assert expired.get("a") is None
+
+
+def test_requests_are_coalesced_and_cached(tmp_path):
+    _record(tmp_path)
+    service = _service(tmp_path)
+    # the same product requested twice before the workers start is scanned once
+    first, cached = service.submit(URLS[0], 2)
+    second, _ = service.submit(URLS[0] + "?utm_source=mail", 2)
+    assert second is first and not cached
+    assert service.coalesced == 1
+    service.start()
+    try:
+        product = first.result(10)
+        assert (product.name, product.quantity) == ("Product 0", 2)
+        assert service.scan(URLS[0], 2) == (product, True)
+        # another quantity is another scan
+        assert service.scan(URLS[0], 1)[1] is False
+    finally:
+        service.stop()
+
+
+def test_requests_after_stop_fail_right_away(tmp_path):
+    _record(tmp_path)
+    service = _service(tmp_path)
+    service.start()
+    product = service.scan(URLS[0])[0]
+    service.stop()
+    # the cached products are still served, the others are not queued
+    assert service.scan(URLS[0]) == (product, True)
+    with pytest.raises(ScanFailed):
+        service.submit(URLS[1])
+    assert service.stats()["queued"] == 0
+
+
+def test_full_queue_is_reported(tmp_path):
+    service = _service(tmp_path, queue_size=1)
+    service.submit(URLS[0])
+    with pytest.raises(ServiceBusy):
+        service.submit(URLS[1])
+
+
+def test_api_endpoints(tmp_path):
+    _record(tmp_path)
+    service = _service(tmp_path)
+    server = create_server(service, "127.0.0.1", 0)
+    service.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/scan?url={quote(URLS[1])}") as r:
+            product = json.load(r)
+        assert product["name"] == "Product 1" and product["items"]
+
+        request = urllib.request.Request(
+            f"{base}/basket",
+            data=json.dumps({"products": {URLS[0]: 2, URLS[1]: 1}}).encode(),
+            method="POST",
+        )
+        with urllib.request.urlopen(request) as r:
+            basket = json.load(r)
+        assert [p["name"] for p in basket["products"]] == ["Product 0", "Product 1"]
+        assert "best_cumulative_deals" in basket
+
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"{base}/scan")
+        assert e.value.code == 400
+
+        with urllib.request.urlopen(f"{base}/metrics") as r:
+            stats = json.load(r)
+        assert stats["endpoints"]["/scan"]["count"] == 2
+        assert stats["endpoints"]["/scan"]["errors"] == 1
+        assert stats["endpoints"]["/basket"]["count"] == 1
+        assert stats["cache"]["hits"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# modules that must only be imported by the code paths that use them
+HEAVY_MODULES = [
+    "selenium",
+    "undetected_chromedriver",
+    "openpyxl",
+    "rich",
+    "lxml",
+    "pretty_errors",
+]
+
+# generous budget for importing the CLI module, override to tighten it locally
+IMPORT_BUDGET_MS = float(os.environ.get("TPSCANNER_IMPORT_BUDGET_MS", 300))
+
+
+def _run_python(code, *args):
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def _loaded_heavy_modules(code):
+    code += (
+        "\nimport sys"
+        f"\nloaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]"
+        "\nprint('loaded:' + ','.join(loaded))"
+    )
+    result = _run_python(code)
+    assert result.returncode == 0, result.stderr
+    last_line = result.stdout.strip().splitlines()[-1]
+    return [m for m in last_line.removeprefix("loaded:").split(",") if m]
+
+
+class TestLazyImports:
+    def test_import_package_does_not_load_heavy_modules(self):
+        assert _loaded_heavy_modules("import tpscanner.tpscanner") == []
+
+    def test_import_scanner_does_not_load_heavy_modules(self):
+        assert _loaded_heavy_modules("from tpscanner.core import Scanner") == []
+
+    def test_help_does_not_load_heavy_modules(self):
+        code = (
+            "import sys\n"
+            "sys.argv = ['tpscanner', '--help']\n"
+            "from tpscanner import tpscanner\n"
+            "try:\n"
+            "    tpscanner.main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+        )
+        assert _loaded_heavy_modules(code) == []
+
+    def test_import_does_not_read_config(self, tmp_path):
+        code = "from tpscanner.config import config"
+        env = dict(os.environ, TPSCANNER_CONFIG=str(tmp_path / "missing.json"))
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=False,
+            env=env,
+        )
+        assert result.returncode == 0, result.stderr
+
+
+class TestImportTime:
+    def test_import_time_within_budget(self):
+        # -X importtime reports the cumulative import time in microseconds
+        result = _run_python("import tpscanner.tpscanner", "-X", "importtime")
+        assert result.returncode == 0, result.stderr
+        cumulative_us = None
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == "tpscanner.tpscanner":
+                cumulative_us = int(fields[1])
+        if cumulative_us is None:
+            pytest.skip("import time not reported by the interpreter")
+        assert cumulative_us / 1000 < IMPORT_BUDGET_MS
+
+
+class TestConfig:
+    def test_config_resolved_from_env(self, tmp_path, monkeypatch):
+        from tpscanner.config import Config
+
+        path = tmp_path / "config.json"
+        path.write_text('{"scraping": {"sleep_rate_limit": 7}}')
+        monkeypatch.setenv("TPSCANNER_CONFIG", str(path))
+        config = Config()
+        assert config.sleep_rate_limit == 7.0
+        assert config.missing_setting is None
+
+    def test_config_defaults_to_package_file(self, tmp_path, monkeypatch):
+        from tpscanner.config import resolve_config_path
+
+        monkeypatch.delenv("TPSCANNER_CONFIG", raising=False)
+        monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+        path = resolve_config_path()
+        assert path.name == "config.json"
+        assert path.parent.name == "config"
+        assert path.is_file()
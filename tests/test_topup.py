@@ -0,0 +1,136 @@
+import itertools
+import random
+
+import pytest
+
+from tpscanner.bench.bench import generate_individual_deals
+from tpscanner.config import config
+from tpscanner.core import SellerRegistry, TopUpSearch, find_topups
+
+
+def _offer(seller, price, quantity=1, delivery_price=5.0, free_delivery=50.0):
+    return {
+        "seller": seller,
+        "seller_link": f"https://www.trovaprezzi.it/{seller}",
+        "seller_reviews": 10,
+        "seller_reviews_link": f"https://www.trovaprezzi.it/{seller}/reviews",
+        "seller_rating": 4.5,
+        "price": price,
+        "quantity": quantity,
+        "delivery_price": delivery_price,
+        "total_price": price * quantity,
+        "free_delivery": free_delivery,
+        "total_price_plus_delivery": price * quantity + delivery_price,
+        "availability": True,
+        "link": f"https://www.trovaprezzi.it/goto/{seller}/{price}",
+    }
+
+
+def test_cheapest_amount_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(20):
+        products = [
+            (f"P{i}", round(rng.uniform(0.5, 30), 2), rng.randint(1, 4))
+            for i in range(rng.randint(1, 4))
+        ]
+        search = TopUpSearch(products, 40.0)
+        for amount in (0.01, 7.5, 19.99, 40.0):
+            best = min(
+                (
+                    round(
+                        sum(n * price for n, (_, price, _) in zip(units, products)), 2
+                    )
+                    for units in itertools.product(
+                        *(range(m + 1) for _, _, m in products)
+                    )
+                    if sum(n * price for n, (_, price, _) in zip(units, products))
+                    >= amount - 1e-9
+                ),
+                default=None,
+            )
+            found = search.cheapest(amount)
+            if best is None:
+                assert found is None
+                continue
+            price, units = found
+            assert price == pytest.approx(best)
+            prices = {name: (p, m) for name, p, m in products}
+            assert all(0 < n <= prices[name][1] for name, n in units.items())
+            assert sum(n * prices[name][0] for name, n in units.items()) == (
+                pytest.approx(price)
+            )
+
+
+def test_topups_use_the_products_of_the_same_seller():
+    individual_deals = {
+        "Mouse": [_offer("A", 40.0, delivery_price=16.0), _offer("B", 38.0)],
+        "Cable": [
+            _offer("A", 4.0, delivery_price=16.0),
+            _offer("B", 1.0),
+            _offer("C", 15.0, delivery_price=16.0, free_delivery=25.0),
+        ],
+        "Pad": [_offer("A", 9.0, delivery_price=16.0)],
+    }
+    topups = find_topups(individual_deals, SellerRegistry(), 2, 20.0)
+
+    mouse_a = next(t for t in topups if t["name"] == "Mouse" and t["seller"] == "A")
+    # 4 + 9 reaches the 10 missing, 2 x 4 does not
+    assert mouse_a["topup_price"] == pytest.approx(13.0)
+    assert mouse_a["topup"] == "1 x Pad, 1 x Cable"
+    cable_c = next(t for t in topups if t["seller"] == "C")
+    assert cable_c["topup"] == "1 x Cable"
+    # 2 cables are not enough for seller B, and one more mouse costs too much
+    assert not [t for t in topups if t["seller"] == "B"]
+    # so does filling a gap larger than the maximum price
+    assert not [t for t in topups if t["name"] == "Cable" and t["seller"] != "C"]
+    savings = [t["topup_saving"] for t in topups]
+    assert savings == sorted(savings, reverse=True)
+
+
+def test_topups_must_save_more_than_they_cost():
+    individual_deals = {
+        "Mouse": [_offer("A", 45.0, delivery_price=6.0)],
+        "Cable": [_offer("A", 6.0, delivery_price=6.0)],
+    }
+    # one cable reaches the threshold, but costs as much as the delivery
+    assert find_topups(individual_deals, SellerRegistry(), 2, 20.0) == []
+
+    individual_deals["Cable"][0]["delivery_price"] = 6.5
+    individual_deals["Mouse"][0]["delivery_price"] = 6.5
+    topups = find_topups(individual_deals, SellerRegistry(), 2, 20.0)
+    assert [t["name"] for t in topups] == ["Mouse"]
+    assert topups[0]["topup_saving"] == pytest.approx(0.5)
+
+
+def test_topups_reach_the_threshold():
+    individual_deals = generate_individual_deals(300, products=3)
+    # expensive deliveries, so that most top-ups are worth it
+    for items in individual_deals.values():
+        for item in items:
+            item["delivery_price"] = 25.0
+    topups = find_topups(individual_deals, SellerRegistry(), 2, 30.0)
+    assert topups
+    for topup in topups:
+        assert topup["topup_saving"] > 0
+        assert topup["total_price"] < topup["free_delivery"]
+        assert topup["total_price"] + topup["topup_price"] >= (
+            topup["free_delivery"] - 0.005
+        )
+        assert topup["topup_price"] <= 30.0
+
+
+def test_max_units_from_the_configuration(monkeypatch):
+    individual_deals = {
+        "Mouse": [_offer("A", 40.0, delivery_price=16.0)],
+        "Cable": [_offer("A", 2.5, delivery_price=16.0)],
+    }
+    # 4 cables reach the threshold; the configuration gives the numbers as floats
+    monkeypatch.setattr(config, "topup_max_units", 4.0, raising=False)
+    topups = find_topups(individual_deals, SellerRegistry(), max_price=20.0)
+    mouse = next(t for t in topups if t["name"] == "Mouse")
+    assert mouse["topup"] == "4 x Cable"
+    assert mouse["topup_price"] == pytest.approx(10.0)
+
+    monkeypatch.setattr(config, "topup_max_units", -1, raising=False)
+    with pytest.raises(ValueError):
+        find_topups(individual_deals, SellerRegistry(), max_price=20.0)
@@ -0,0 +1,8 @@
+"""Price alerts of TPScanner."""
+
+from .engine import (
+    AlertEngine,  # noqa: F401
+    create_alert_engine,  # noqa: F401
+    load_alert_rules,  # noqa: F401
+)
+from .sinks import OutboxSink, WebhookSink  # noqa: F401
@@ -0,0 +1,338 @@
+"""Price alerts, evaluated against the offers that changed since the last scan."""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from tpscanner.config import config
+from tpscanner.core import cumulative_deals
+from tpscanner.core.baskets import with_quantity
+from tpscanner.io import canonical_url
+from tpscanner.logger import logger
+
+from .sinks import OutboxSink, WebhookSink
+
+
+def default_state_file() -> str:
+    """Return the path of the alerts state set in the configuration.
+
+    Returns:
+        str: The path of the state file, relative to the output directory.
+
+    """
+    return os.path.join(
+        config.output_dir, config.alert_state_file or "alerts_state.json"
+    )
+
+
+def load_alert_rules(filename: str) -> Dict[str, Dict[str, float]]:
+    """Read the alert rules from a JSON file.
+
+    The file maps the URL of each product to the total price, delivery included,
+    below which an offer raises an alert, and the name of each basket to the
+    cumulative price below which its best cumulative deal raises an alert, e.g.
+    `{"products": {"https://...": 25.0}, "baskets": {"office": 120.0}}`.
+
+    Arguments:
+        filename (str): The JSON file of the rules.
+
+    Returns:
+        dict: The target prices of the `products`, by canonical URL, and of the
+            `baskets`, by name.
+
+    Raises:
+        ValueError: If the file does not contain any rule.
+
+    """
+    with open(filename, "r") as f:
+        data = json.load(f)
+    rules = {
+        "products": {
+            canonical_url(url): float(target)
+            for url, target in (data.get("products") or {}).items()
+        },
+        "baskets": {
+            name: float(target) for name, target in (data.get("baskets") or {}).items()
+        },
+    }
+    if not rules["products"] and not rules["baskets"]:
+        raise ValueError(f"No alert rules found in `{filename}`.")
+    return rules
+
+
+class AlertEngine:
+    """Alerts raised when products or baskets drop below their target price.
+
+    The engine keeps, for each product, the offers seen at its last scan, and
+    evaluates the rules only when they change: a product rule is checked against
+    the offers that are new or changed price, and a basket rule only when one of
+    its products changed. The offers seen are saved to a state file, so changes
+    are found across runs too.
+
+    An alert is not sent twice for the same offer at the same price, and, within
+    `cooldown` seconds of the last alert of a rule, only for a lower price. Once
+    the best price of a product rises above its target again, the rule is reset.
+
+    Attributes:
+        products (dict): The target price of each product, by URL.
+        baskets (dict): The target price of each basket, by name.
+        basket_products (dict): The quantity to buy of each URL, by basket name.
+        sinks (list): Where the alerts are sent, e.g. an `OutboxSink`.
+        state_file (str): The file where the offers seen and the alerts sent are
+            saved; None to keep them in memory only.
+        cooldown (float): The minimum number of seconds between two alerts of a
+            rule, unless the price drops further.
+        skipped (int): The number of scans without changes, for which no rule was
+            evaluated.
+
+    """
+
+    def __init__(
+        self,
+        products: Optional[Dict[str, float]] = None,
+        baskets: Optional[Dict[str, float]] = None,
+        basket_products: Optional[Dict[str, Dict[str, int]]] = None,
+        sinks: Optional[List] = None,
+        state_file: Optional[str] = None,
+        cooldown: Optional[float] = None,
+    ):
+        """Initialize the engine and load the state of the previous runs.
+
+        Arguments:
+            products (dict): The target price of each product, by URL.
+            baskets (dict): The target price of each basket, by name.
+            basket_products (dict): The quantity to buy of each URL, by basket name.
+            sinks (list): Where the alerts are sent.
+            state_file (str): The file where the state is saved; None to keep it
+                in memory only.
+            cooldown (float): The minimum number of seconds between two alerts of
+                a rule; `alert_cooldown` from the configuration if not provided.
+
+        """
+        self.products = products or {}
+        self.baskets = baskets or {}
+        self.basket_products = basket_products or {}
+        self.sinks = sinks or []
+        self.state_file = state_file
+        self.cooldown = float(
+            (config.alert_cooldown or 0) if cooldown is None else cooldown
+        )
+        self.skipped = 0
+        self._lock = threading.Lock()
+        # offers seen at the last scan of each product, as pairs of link and total
+        # price, and the cheapest offer of each seller for the baskets
+        self._offers: Dict[str, List] = {}
+        self._cheapest: Dict[str, Dict[str, Dict]] = {}
+        self._sent: Dict[str, Dict] = {}
+        self._baskets_of: Dict[str, List[str]] = {}
+        for name, urls in self.basket_products.items():
+            if name in self.baskets:
+                for url in urls:
+                    self._baskets_of.setdefault(url, []).append(name)
+        if state_file and os.path.exists(state_file):
+            with open(state_file, "r") as f:
+                state = json.load(f)
+            self._offers = state.get("offers", {})
+            self._cheapest = state.get("cheapest", {})
+            self._sent = state.get("sent", {})
+
+    def observe(
+        self, url: str, name: str, items: List[Dict], timestamp: Optional[float] = None
+    ) -> List[Dict]:
+        """Evaluate the rules affected by a new scan of a product.
+
+        Arguments:
+            url (str): The URL of the product, matched to the rules once made
+                canonical, e.g. as written in the watchlist of the daemon.
+            name (str): The name of the product.
+            items (list): The offers found.
+            timestamp (float): The time of the scan; the current time if not provided.
+
+        Returns:
+            list: The alerts sent.
+
+        """
+        url = canonical_url(url)
+        timestamp = time.time() if timestamp is None else timestamp
+        offers = {(item["link"], item["total_price_plus_delivery"]) for item in items}
+        with self._lock:
+            previous = {tuple(offer) for offer in self._offers.get(url, [])}
+            if offers == previous:
+                self.skipped += 1
+                return []
+            changed = [
+                item
+                for item in items
+                if (item["link"], item["total_price_plus_delivery"]) not in previous
+            ]
+            self._offers[url] = sorted(offers)
+            cheapest: Dict[str, Dict] = {}
+            for item in items:
+                offer = cheapest.get(item["seller"])
+                if offer is None or item["price"] < offer["price"]:
+                    cheapest[item["seller"]] = item
+            # copies without the id of the seller, which is only valid in this run
+            self._cheapest[url] = {
+                seller: {
+                    key: value for key, value in item.items() if key != "seller_id"
+                }
+                for seller, item in cheapest.items()
+            }
+
+            alerts = []
+            if url in self.products:
+                alert = self._check_product(url, name, changed, offers, timestamp)
+                if alert is not None:
+                    alerts.append(alert)
+            for basket in self._baskets_of.get(url, []):
+                alert = self._check_basket(basket, timestamp)
+                if alert is not None:
+                    alerts.append(alert)
+        for alert in alerts:
+            self._send(alert)
+        return alerts
+
+    def _check_product(
+        self,
+        url: str,
+        name: str,
+        changed: List[Dict],
+        offers: set,
+        timestamp: float,
+    ) -> Optional[Dict]:
+        target = self.products[url]
+        rule = f"product:{url}"
+        below = [i for i in changed if i["total_price_plus_delivery"] <= target]
+        if not below:
+            if not offers or min(total for _, total in offers) > target:
+                self._sent.pop(rule, None)
+            return None
+        best = min(below, key=lambda x: x["total_price_plus_delivery"])
+        return self._fire(
+            rule,
+            {
+                "rule": rule,
+                "kind": "product",
+                "name": name,
+                "url": url,
+                "target": target,
+                "price": best["total_price_plus_delivery"],
+                "seller": best["seller"],
+                "link": best["link"],
+                "timestamp": timestamp,
+            },
+        )
+
+    def _check_basket(self, basket: str, timestamp: float) -> Optional[Dict]:
+        products = self.basket_products[basket]
+        if any(url not in self._cheapest for url in products):
+            return None
+        # the best cumulative deal, as found for the basket by the scan
+        deals = cumulative_deals(
+            (
+                url,
+                [
+                    with_quantity(item, quantity)
+                    for item in self._cheapest[url].values()
+                ],
+            )
+            for url, quantity in products.items()
+        )
+        target = self.baskets[basket]
+        rule = f"basket:{basket}"
+        best = deals[0] if deals else None
+        if best is None or best["cumulative_price_plus_delivery"] > target:
+            self._sent.pop(rule, None)
+            return None
+        return self._fire(
+            rule,
+            {
+                "rule": rule,
+                "kind": "basket",
+                "name": basket,
+                "url": None,
+                "target": target,
+                "price": best["cumulative_price_plus_delivery"],
+                "seller": best["seller"],
+                "link": None,
+                "timestamp": timestamp,
+            },
+        )
+
+    def _fire(self, rule: str, alert: Dict) -> Optional[Dict]:
+        key = [alert["seller"], alert["link"], round(alert["price"], 2)]
+        sent = self._sent.get(rule)
+        if sent is not None:
+            if sent["key"] == key:
+                return None
+            if (
+                alert["timestamp"] - sent["timestamp"] < self.cooldown
+                and alert["price"] >= sent["price"]
+            ):
+                return None
+        self._sent[rule] = {
+            "key": key,
+            "price": alert["price"],
+            "timestamp": alert["timestamp"],
+        }
+        return alert
+
+    def _send(self, alert: Dict) -> None:
+        logger.info(
+            "Alert: `%s` at %.2f € (target %.2f €).",
+            alert["name"],
+            alert["price"],
+            alert["target"],
+            url=alert["url"],
+            phase="alerts",
+        )
+        for sink in self.sinks:
+            sink.send(alert)
+
+    def save(self) -> None:
+        """Save the offers seen and the alerts sent to the state file, if any."""
+        if not self.state_file:
+            return
+        with self._lock:
+            state = {
+                "offers": self._offers,
+                "cheapest": self._cheapest,
+                "sent": self._sent,
+            }
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            # write to a temporary file first, so that a crash does not lose the state
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_file, self.state_file)
+
+
+def create_alert_engine(
+    rules: Dict[str, Dict[str, float]],
+    basket_products: Optional[Dict[str, Dict[str, int]]] = None,
+) -> AlertEngine:
+    """Create an alert engine with the sinks and state file of the configuration.
+
+    The alerts are appended to the outbox file, and also posted to the webhook
+    if `alert_webhook` is set.
+
+    Arguments:
+        rules (dict): The rules returned by `load_alert_rules()`.
+        basket_products (dict): The quantity to buy of each URL, by basket name.
+
+    Returns:
+        AlertEngine: The alert engine.
+
+    """
+    sinks: List = [OutboxSink()]
+    if config.alert_webhook:
+        sinks.append(WebhookSink(config.alert_webhook))
+    return AlertEngine(
+        rules["products"],
+        rules["baskets"],
+        basket_products,
+        sinks,
+        default_state_file(),
+    )
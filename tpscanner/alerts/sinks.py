@@ -0,0 +1,101 @@
+"""Destinations of the alerts: a local outbox file or a webhook."""
+
+import json
+import os
+import threading
+import urllib.request
+from typing import Dict, Optional
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+
+
+def default_outbox_file() -> str:
+    """Return the path of the alerts outbox set in the configuration.
+
+    Returns:
+        str: The path of the outbox file, relative to the output directory.
+
+    """
+    return os.path.join(config.output_dir, config.alert_outbox or "alerts.jsonl")
+
+
+class OutboxSink:
+    """Outbox file where each alert is appended as a JSON line.
+
+    Attributes:
+        filename (str): The outbox file.
+
+    """
+
+    def __init__(self, filename: Optional[str] = None):
+        """Initialize the outbox.
+
+        Arguments:
+            filename (str): The outbox file. If not provided, it is taken from the
+                configuration.
+
+        """
+        self.filename = filename or default_outbox_file()
+        self._lock = threading.Lock()
+
+    def send(self, alert: Dict) -> bool:
+        """Append an alert to the outbox.
+
+        Arguments:
+            alert (dict): The alert.
+
+        Returns:
+            bool: True, once the alert is written.
+
+        """
+        line = json.dumps(alert) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+            with open(self.filename, "a") as f:
+                f.write(line)
+        return True
+
+
+class WebhookSink:
+    """Webhook to which each alert is posted as a JSON object.
+
+    Attributes:
+        url (str): The URL of the webhook.
+        timeout (float): The number of seconds to wait for the webhook.
+
+    """
+
+    def __init__(self, url: str, timeout: float = 10):
+        """Initialize the webhook.
+
+        Arguments:
+            url (str): The URL of the webhook.
+            timeout (float): The number of seconds to wait for the webhook.
+
+        """
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert: Dict) -> bool:
+        """Post an alert to the webhook.
+
+        Arguments:
+            alert (dict): The alert.
+
+        Returns:
+            bool: Whether the webhook accepted the alert.
+
+        """
+        request = urllib.request.Request(  # noqa S310
+            self.url,
+            data=json.dumps(alert).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:  # noqa S310
+                return 200 <= response.status < 300
+        except Exception as e:
+            logger.warn("Could not post alert to `%s`: %s", self.url, e, phase="alerts")
+            return False
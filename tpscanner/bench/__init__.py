@@ -0,0 +1,17 @@
+"""Benchmark suite with synthetic TrovaPrezzi listings."""
+
+from tpscanner.scraper.listings import (
+    generate_listing_html,  # noqa: F401
+    generate_raw_offers,  # noqa: F401
+    render_listing_html,  # noqa: F401
+)
+
+from .bench import (
+    BENCHMARKS,  # noqa: F401
+    compare,  # noqa: F401
+    format_comparison,  # noqa: F401
+    generate_individual_deals,  # noqa: F401
+    load_baseline,  # noqa: F401
+    run_benchmarks,  # noqa: F401
+    save_baseline,  # noqa: F401
+)
@@ -0,0 +1,70 @@
+"""Run the benchmark suite and compare the results with the stored baseline."""
+
+import argparse
+import sys
+
+from tpscanner.bench.bench import (
+    BASELINE_FILE,
+    BENCHMARKS,
+    SIZES,
+    compare,
+    format_comparison,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+)
+
+
+def main():
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="TrovaPrezzi Scanner benchmarks")
+    parser.add_argument(
+        "-b",
+        "--benchmark",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        help="Benchmarks to run (default all)",
+    )
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=SIZES,
+        help=f"Numbers of offers to run each benchmark at (default {SIZES})",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Timed runs per benchmark"
+    )
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE_FILE,
+        help=f"Baseline results file (default {BASELINE_FILE})",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        metavar="PCT",
+        help="Exit with an error if any benchmark is slower than the baseline by more than PCT percent",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.benchmark, args.sizes, args.repeat)
+    rows = compare(results, load_baseline(args.baseline))
+    print(format_comparison(rows))
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline saved to `{args.baseline}`.")
+    if args.fail_above is not None and any(
+        row["delta"] is not None and row["delta"] > args.fail_above for row in rows
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""Benchmark suite for the parsing, deal computation and export hot paths."""
+
+import json
+import os
+import platform
+import re
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from tpscanner.scraper.listings import generate_listing_html, generate_raw_offers
+
+# default sizes of the benchmarks, in number of offers
+SIZES = [10, 1000, 100000]
+# default file where the baseline results are stored
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+# number of products the offers are spread over for the deal and export benchmarks
+PRODUCTS = 10
+# number of distinct sellers in the synthetic listings
+SELLERS = 50
+
+# registry of the benchmarks: name -> function that takes the size and returns a
+# `prepare()` function, which in turn returns the zero-argument callable to time
+BENCHMARKS: Dict[str, Callable[[int], Callable[[], Callable]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """Register a benchmark under the given name.
+
+    Arguments:
+        name (str): The name of the benchmark.
+
+    Returns:
+        Callable: The decorator that registers the benchmark setup function.
+
+    """
+
+    def decorator(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _parser():
+    from tpscanner.scraper import OfferParser
+
+    return OfferParser()
+
+
+def _scanner(individual_deals: Dict):
+    from tpscanner.core import Scanner
+
+    urls = list(individual_deals)
+    scanner = Scanner("none", urls, [1] * len(urls), 0, False, False, False)
+    scanner.individual_deals = individual_deals
+    return scanner
+
+
+def _reference_convert_data_types(
+    merchant,
+    merchant_link,
+    merchant_reviews,
+    merchant_reviews_link,
+    merchant_rating,
+    price,
+    quantity,
+    delivery_price,
+    free_delivery,
+    availability,
+    offer_link,
+):
+    # the conversion of one offer at a time, as done by the Scraper before the
+    # batch `convert_rows()`, kept as is to benchmark and check it against
+    number_pattern = re.compile(r"\b\d+[,.]?\d*\b")
+    item = {}
+
+    item["seller"] = merchant
+    item["seller_link"] = "https://www.trovaprezzi.it" + merchant_link
+    merchant_reviews = number_pattern.search(merchant_reviews).group()
+    item["seller_reviews"] = int(merchant_reviews.replace(".", ""))
+    item["seller_reviews_link"] = "https://www.trovaprezzi.it" + merchant_reviews_link
+    price = number_pattern.search(price).group()
+    if merchant_rating:
+        merchant_rating = merchant_rating.split(" ")[2].replace("rate", "")
+        merchant_rating = int(merchant_rating) / 10.0
+    item["seller_rating"] = merchant_rating
+    item["price"] = float(price.replace(",", "."))
+    item["quantity"] = quantity
+    if delivery_price:
+        delivery_price = number_pattern.search(delivery_price).group()
+        item["delivery_price"] = float(delivery_price.replace(",", "."))
+    else:
+        item["delivery_price"] = 0.0
+    item["total_price"] = item["price"] * quantity
+    if free_delivery:
+        free_delivery = number_pattern.search(free_delivery).group()
+        item["free_delivery"] = float(free_delivery.replace(",", "."))
+    else:
+        item["free_delivery"] = free_delivery
+    if free_delivery and item["total_price"] >= item["free_delivery"]:
+        item["total_price_plus_delivery"] = item["total_price"]
+    else:
+        item["total_price_plus_delivery"] = item["total_price"] + item["delivery_price"]
+    item["availability"] = True if availability == "available" else False
+    item["link"] = "https://www.trovaprezzi.it" + offer_link
+
+    return item
+
+
+def _convert_rows(rows: List[Dict], quantity: int) -> List[Dict]:
+    return [
+        _reference_convert_data_types(
+            row["merchant"],
+            row["merchant_link"],
+            row["merchant_reviews"],
+            row["merchant_reviews_link"],
+            row["merchant_rating"],
+            row["price"],
+            quantity,
+            row["delivery_price"],
+            row["free_delivery"],
+            row["availability"],
+            row["offer_link"],
+        )
+        for row in rows
+    ]
+
+
+def generate_individual_deals(size: int, products: int = PRODUCTS) -> Dict:
+    """Generate the individual deals of a run with `size` offers in total.
+
+    Arguments:
+        size (int): The total number of offers.
+        products (int): The number of products the offers are spread over.
+
+    Returns:
+        dict: The offers of each product, as stored in `Scanner.individual_deals`.
+
+    """
+    from tpscanner.scraper.convert import convert_rows
+
+    products = max(1, min(products, size))
+    individual_deals = {}
+    for p in range(products):
+        offers = size // products + (1 if p < size % products else 0)
+        rows = generate_raw_offers(offers, SELLERS, seed=p)
+        individual_deals[f"Product {p}"] = convert_rows(rows, 1 + p % 3)
+    return individual_deals
+
+
+@benchmark("extract_prices_plus_shipping")
+def _bench_extract_prices_plus_shipping(size: int) -> Callable:
+    parser = _parser()
+    html_content = generate_listing_html(size, SELLERS)
+
+    def prepare():
+        return lambda: parser.extract_prices_plus_shipping(html_content, 2)
+
+    return prepare
+
+
+@benchmark("convert_data_types")
+def _bench_convert_data_types(size: int) -> Callable:
+    rows = generate_raw_offers(size, SELLERS)
+
+    def prepare():
+        return lambda: _convert_rows(rows, 2)
+
+    return prepare
+
+
+@benchmark("convert_rows")
+def _bench_convert_rows(size: int) -> Callable:
+    from tpscanner.scraper.convert import convert_rows
+
+    rows = generate_raw_offers(size, SELLERS)
+
+    def prepare():
+        return lambda: convert_rows(rows, 2)
+
+    return prepare
+
+
+@benchmark("find_best_individual_deals")
+def _bench_find_best_individual_deals(size: int) -> Callable:
+    individual_deals = generate_individual_deals(size)
+
+    def prepare():
+        return _scanner(individual_deals).find_best_individual_deals
+
+    return prepare
+
+
+@benchmark("find_best_cumulative_deals")
+def _bench_find_best_cumulative_deals(size: int) -> Callable:
+    individual_deals = generate_individual_deals(size)
+
+    def prepare():
+        return _scanner(individual_deals).find_best_cumulative_deals
+
+    return prepare
+
+
+@benchmark("rank_deals")
+def _bench_rank_deals(size: int) -> Callable:
+    from tpscanner.core import rank_deals
+
+    items = [
+        item for items in generate_individual_deals(size).values() for item in items
+    ]
+    weights = {"cost": 1.0, "rating": 0.5, "reviews": 0.2, "availability": 0.3}
+
+    def prepare():
+        return lambda: rank_deals(items, "total_price_plus_delivery", weights)
+
+    return prepare
+
+
+@benchmark("find_topups")
+def _bench_find_topups(size: int) -> Callable:
+    individual_deals = generate_individual_deals(size)
+
+    def prepare():
+        return _scanner(individual_deals).find_topups
+
+    return prepare
+
+
+@benchmark("save_individual_deals")
+def _bench_save_individual_deals(size: int) -> Callable:
+    from tpscanner import io
+
+    individual_deals = generate_individual_deals(size)
+
+    def prepare():
+        filename = f"bench_{time.perf_counter_ns()}.xlsx"
+        return lambda: io.save_individual_deals(filename, individual_deals)
+
+    return prepare
+
+
+@benchmark("save_best_individual_deals")
+def _bench_save_best_individual_deals(size: int) -> Callable:
+    from tpscanner import io
+
+    scanner = _scanner(generate_individual_deals(size))
+    # all the offers are saved, not only the ones unlocking free delivery
+    best_deals = [
+        dict(item, name=name)
+        for name, items in scanner.individual_deals.items()
+        for item in items
+    ]
+
+    def prepare():
+        filename = f"bench_{time.perf_counter_ns()}.xlsx"
+        return lambda: io.save_best_individual_deals(filename, "Best", best_deals)
+
+    return prepare
+
+
+@benchmark("save_best_cumulative_deals")
+def _bench_save_best_cumulative_deals(size: int) -> Callable:
+    from tpscanner import io
+
+    # the cumulative deals are one row per common seller, so the size is the
+    # number of rows written rather than the number of offers
+    scanner = _scanner(generate_individual_deals(max(size, SELLERS * PRODUCTS)))
+    scanner.find_best_cumulative_deals()
+    rows = scanner.best_cumulative_deals
+    cumulative_deals = [rows[i % len(rows)] for i in range(size)] if rows else []
+
+    def prepare():
+        filename = f"bench_{time.perf_counter_ns()}.xlsx"
+        return lambda: io.save_best_cumulative_deals(filename, "Best", cumulative_deals)
+
+    return prepare
+
+
+def run_benchmarks(
+    names: Optional[Iterable[str]] = None,
+    sizes: Iterable[int] = SIZES,
+    repeat: int = 3,
+) -> Dict:
+    """Run the benchmarks.
+
+    Excel files are written to a temporary output directory, which is removed
+    afterwards.
+
+    Arguments:
+        names (Iterable[str]): The benchmarks to run; all of them if not provided.
+        sizes (Iterable[int]): The sizes to run each benchmark at.
+        repeat (int): The number of timed runs for each benchmark and size.
+
+    Returns:
+        dict: The results, with the min and median time in seconds of each
+            benchmark and size.
+
+    """
+    from tpscanner.config import config
+
+    results: Dict[str, Dict] = {}
+    previous_output_dir = config.output_dir
+    with tempfile.TemporaryDirectory() as output_dir:
+        # the settings are dynamic attributes, which mypy only sees when read
+        setattr(config, "output_dir", output_dir)
+        try:
+            for name in names or BENCHMARKS:
+                for size in sizes:
+                    prepare = BENCHMARKS[name](size)
+                    timings = []
+                    for _ in range(repeat):
+                        func = prepare()
+                        start = time.perf_counter()
+                        func()
+                        timings.append(time.perf_counter() - start)
+                    results.setdefault(name, {})[str(size)] = {
+                        "min": min(timings),
+                        "median": statistics.median(timings),
+                    }
+        finally:
+            setattr(config, "output_dir", previous_output_dir)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> List[Dict]:
+    """Compare the results with a baseline.
+
+    Arguments:
+        results (dict): The results returned by `run_benchmarks()`.
+        baseline (dict): The baseline results, in the same format.
+
+    Returns:
+        list: One dict per benchmark and size, with the current and baseline min
+            time and the delta in percent (None if not in the baseline).
+
+    """
+    rows = []
+    for name, sizes in results["results"].items():
+        for size, timing in sizes.items():
+            base = baseline.get("results", {}).get(name, {}).get(size)
+            delta = None
+            if base and base["min"] > 0:
+                delta = (timing["min"] - base["min"]) / base["min"] * 100
+            rows.append(
+                {
+                    "name": name,
+                    "size": int(size),
+                    "min": timing["min"],
+                    "baseline": base["min"] if base else None,
+                    "delta": delta,
+                }
+            )
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Format the comparison with the baseline as a text table.
+
+    Arguments:
+        rows (list): The rows returned by `compare()`.
+
+    Returns:
+        str: The table.
+
+    """
+    lines = [
+        f"{'benchmark':<30} {'offers':>8} {'time (ms)':>12} {'baseline':>12} {'delta':>9}"
+    ]
+    for row in rows:
+        baseline = (
+            f"{row['baseline'] * 1000:12.3f}" if row["baseline"] else f"{'-':>12}"
+        )
+        delta = f"{row['delta']:+8.1f}%" if row["delta"] is not None else f"{'-':>9}"
+        lines.append(
+            f"{row['name']:<30} {row['size']:>8} {row['min'] * 1000:12.3f} {baseline} {delta}"
+        )
+    return "\n".join(lines)
+
+
+def load_baseline(filename: str) -> Dict:
+    """Load the baseline results.
+
+    Arguments:
+        filename (str): The baseline file.
+
+    Returns:
+        dict: The baseline results, empty if the file does not exist.
+
+    """
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(filename: str, results: Dict) -> None:
+    """Save the results as the new baseline.
+
+    Results of benchmarks and sizes that were not run are kept from the
+    previous baseline.
+
+    Arguments:
+        filename (str): The baseline file.
+        results (dict): The results returned by `run_benchmarks()`.
+
+    """
+    baseline = load_baseline(filename)
+    merged = dict(results, results=baseline.get("results", {}))
+    for name, sizes in results["results"].items():
+        merged["results"].setdefault(name, {}).update(sizes)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(merged, f, indent=2)
@@ -1,9 +1,6 @@
 """This module is used to initialize the configuration for the application."""
 
-import os
+from .config import Config, configure_pretty_errors, resolve_config_path
 
-from .config import Config
-
-config = Config("tpscanner/config/config.json")
-
-os.makedirs(config.output_dir, exist_ok=True)
+# the configuration file is read on first access to one of its settings
+config = Config()
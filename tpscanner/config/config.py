@@ -1,46 +1,113 @@
 """This module is responsible for reading the configuration file and setting the attributes of the Config class."""
 
 import json
+import os
+from pathlib import Path
 
-import pretty_errors
+# name of the configuration file looked up in the user and package directories
+CONFIG_FILENAME = "config.json"
+# environment variable that can point to a custom configuration file
+CONFIG_ENV_VAR = "TPSCANNER_CONFIG"
 
-pretty_errors.configure(
-    separator_character="*",
-    filename_display=pretty_errors.FILENAME_EXTENDED,
-    line_number_first=True,
-    display_link=True,
-    lines_before=5,
-    lines_after=2,
-    line_color=pretty_errors.RED + "> " + pretty_errors.default_config.line_color,
-    code_color="  " + pretty_errors.default_config.line_color,
-    truncate_code=True,
-    display_locals=True,
-)
+
+def resolve_config_path() -> Path:
+    """Resolve the path of the configuration file to load.
+
+    The file is searched, in order, in the path set by the `TPSCANNER_CONFIG`
+    environment variable, in the user configuration directory
+    (`$XDG_CONFIG_HOME/tpscanner/config.json`, defaulting to `~/.config`), and
+    finally next to this module, where the default configuration is shipped.
+
+    Returns:
+        Path: The path of the configuration file.
+
+    """
+    env_path = os.environ.get(CONFIG_ENV_VAR)
+    if env_path:
+        return Path(env_path).expanduser()
+    config_home = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+    user_path = Path(config_home) / "tpscanner" / CONFIG_FILENAME
+    if user_path.is_file():
+        return user_path
+    return Path(__file__).parent / CONFIG_FILENAME
+
+
+def configure_pretty_errors() -> None:
+    """Configure `pretty_errors` to display readable tracebacks.
+
+    This is only needed by the command line application, so it is not done at
+    import time.
+    """
+    import pretty_errors
+
+    pretty_errors.configure(
+        separator_character="*",
+        filename_display=pretty_errors.FILENAME_EXTENDED,
+        line_number_first=True,
+        display_link=True,
+        lines_before=5,
+        lines_after=2,
+        line_color=pretty_errors.RED + "> " + pretty_errors.default_config.line_color,
+        code_color="  " + pretty_errors.default_config.line_color,
+        truncate_code=True,
+        display_locals=True,
+    )
 
 
 class Config:
-    """Class to read the configuration file and set the attributes of the Config class."""
-
-    def __init__(self, filename):
-        """Initialize the Config class."""
-        # ensure a file exists and is actually read
-        if filename:
-            try:
-                with open(filename, "r") as f:
-                    self._config = json.load(f)
-                    for key, val in self._config.items():
-                        if isinstance(val, dict):
-                            for subkey, subval in val.items():
-                                if str(subval).isdigit():
-                                    subval = float(subval)
-                                setattr(self, subkey, subval)
-                        else:
-                            if str(val).isdigit():
-                                val = float(val)
-                            setattr(self, key, val)
-            except FileNotFoundError:
-                raise (f"Config file {filename} not found.")
-
-    def __getattr__(self, _):
-        """Return None if the attribute is not found."""
+    """Class to read the configuration file and set the attributes of the Config class.
+
+    The file is read lazily, the first time a setting is accessed, so that
+    importing the package does not touch the filesystem.
+    """
+
+    def __init__(self, filename=None):
+        """Initialize the Config class.
+
+        Arguments:
+            filename (str): The configuration file to read. If not provided, it
+                is resolved with `resolve_config_path()` on first access.
+
+        """
+        self._filename = filename
+        self._config = None
+
+    def load(self) -> None:
+        """Read the configuration file and set the attributes."""
+        filename = self._filename or resolve_config_path()
+        try:
+            with open(filename, "r") as f:
+                self._config = json.load(f)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Config file {filename} not found.") from e
+        # settings assigned before the file is loaded take precedence
+        for key, val in self._config.items():
+            if isinstance(val, dict):
+                for subkey, subval in val.items():
+                    if str(subval).isdigit():
+                        subval = float(subval)
+                    self.__dict__.setdefault(subkey, subval)
+            else:
+                if str(val).isdigit():
+                    val = float(val)
+                self.__dict__.setdefault(key, val)
+
+    def settings(self) -> dict:
+        """Return all the settings, including those assigned at run time.
+
+        Returns:
+            dict: The value of each setting, e.g. to set them in a spawned process.
+
+        """
+        if self._config is None:
+            self.load()
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+    def __getattr__(self, name):
+        """Return the setting, loading the file first; None if the setting is not found."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._config is None:
+            self.load()
+            return self.__dict__.get(name)
         return None
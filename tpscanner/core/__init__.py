@@ -1,3 +1,9 @@
 """Core module for TPScanner."""
 
-from .scanner import Scanner  # noqa: F401
+from .baskets import basket_scanner, basket_union, load_baskets  # noqa: F401
+from .deals import best_individual_deals, cumulative_deals  # noqa: F401
+from .parsing import ParsePool, parse_offers  # noqa: F401
+from .ranking import rank_deals, rank_weights, score_deals  # noqa: F401
+from .scanner import ProductOffers, Scanner, available_items  # noqa: F401
+from .sellers import Seller, SellerRegistry  # noqa: F401
+from .topup import TopUpSearch, find_topups  # noqa: F401
@@ -0,0 +1,119 @@
+"""Baskets of products, evaluated against the offers found by a single scan."""
+
+import json
+from typing import Dict, List, Tuple
+
+from tpscanner.io import merge_inputs
+from tpscanner.logger import logger
+
+from .scanner import Scanner
+
+
+def load_baskets(filename: str) -> Dict[str, Dict[str, int]]:
+    """Read the baskets from a JSON file.
+
+    The file maps the name of each basket to its products, either as a mapping
+    of each URL to the quantity to buy, or as a list of URLs to buy one of, e.g.
+    `{"office": {"https://...": 2, "https://...": 1}, "home": ["https://..."]}`.
+
+    Arguments:
+        filename (str): The JSON file of the baskets.
+
+    Returns:
+        dict: The quantity to buy of each canonical URL, by basket name; the
+            quantities of the URLs that are the same once made canonical are
+            added up.
+
+    Raises:
+        ValueError: If the file does not describe any basket.
+
+    """
+    with open(filename, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not data:
+        raise ValueError(f"No baskets found in `{filename}`.")
+    baskets = {}
+    for name, products in data.items():
+        if isinstance(products, list):
+            products = {url: 1 for url in products}
+        if not isinstance(products, dict) or not products:
+            raise ValueError(f"Basket `{name}` in `{filename}` has no products.")
+        baskets[name] = dict(zip(*merge_inputs(products, products.values())))
+    return baskets
+
+
+def basket_union(baskets: Dict[str, Dict[str, int]]) -> Tuple[List[str], List[int]]:
+    """Return the products of all the baskets, each once.
+
+    Arguments:
+        baskets (dict): The quantity to buy of each URL, by basket name.
+
+    Returns:
+        tuple: The URLs, in the order they first appear, and the smallest quantity
+            to buy of each, with which they are scanned.
+
+    """
+    union: Dict[str, int] = {}
+    for products in baskets.values():
+        for url, quantity in products.items():
+            union[url] = min(quantity, union.get(url, quantity))
+    return list(union), list(union.values())
+
+
+def with_quantity(item: Dict, quantity: int) -> Dict:
+    """Return a copy of an offer for another quantity to buy.
+
+    Arguments:
+        item (dict): The offer.
+        quantity (int): The quantity to buy.
+
+    Returns:
+        dict: The offer, with the quantity and the total prices updated.
+
+    """
+    item = dict(item, quantity=quantity, total_price=item["price"] * quantity)
+    if item["free_delivery"] and item["total_price"] >= item["free_delivery"]:
+        item["total_price_plus_delivery"] = item["total_price"]
+    else:
+        item["total_price_plus_delivery"] = item["total_price"] + item["delivery_price"]
+    return item
+
+
+def basket_scanner(scanner: Scanner, name: str, products: Dict[str, int]) -> Scanner:
+    """Return a scanner with the offers of the products of a basket.
+
+    The offers are taken from the scanner of all the baskets, for the quantities
+    of this basket, so that the best deals can be found for each basket without
+    scanning the products again. Products that could not be scanned are left out.
+
+    Arguments:
+        scanner (Scanner): The scanner of all the baskets, after the scan.
+        name (str): The name of the basket.
+        products (dict): The quantity to buy of each URL of the basket.
+
+    Returns:
+        Scanner: The scanner of the basket, with its `individual_deals` set.
+
+    """
+    urls = [url for url in products if url in scanner.product_names]
+    for url in products:
+        if url not in scanner.product_names:
+            logger.warn("No offers for `%s` in basket `%s`.", url, name, url=url)
+    basket = Scanner(
+        scanner.level,
+        urls,
+        [products[url] for url in urls],
+        scanner.wait,
+        scanner.headless,
+        scanner.console_out,
+        scanner.excel_out,
+    )
+    basket.sellers = scanner.sellers
+    for url in urls:
+        product = scanner.product_names[url]
+        basket.product_names[url] = product
+        basket.individual_deals[product] = [
+            with_quantity(item, products[url])
+            for item in scanner.individual_deals[product]
+        ]
+    return basket
@@ -0,0 +1,99 @@
+"""Best deals among the offers of several products, computed in a single pass."""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ranking import rank_deals
+from .sellers import SellerRegistry
+
+
+def best_individual_deals(
+    products: Iterable[Tuple[str, Iterable[Dict]]],
+) -> Iterator[Dict]:
+    """Yield the offers whose total price reaches the free delivery threshold.
+
+    Arguments:
+        products (Iterable[Tuple[str, Iterable[Dict]]]): The name and the offers
+            of each product, e.g. `Scanner.individual_deals.items()`, or the
+            products yielded by `Scanner.iter_scan()` as `(p.name, p.items)`.
+
+    Yields:
+        dict: The offers unlocking free delivery, with the product name set in
+            `name`, in the order of the products and of their offers.
+
+    """
+    for name, items in products:
+        for item in items:
+            # if the seller indicates a free delivery threshold and the cumulative price is greater than or equal to the threshold
+            if item["free_delivery"] and item["total_price"] >= item["free_delivery"]:
+                item["name"] = name
+                yield item
+
+
+def cumulative_deals(
+    products: Iterable[Tuple[str, Iterable[Dict]]],
+    sellers: Optional[SellerRegistry] = None,
+) -> List[Dict]:
+    """Return the cumulative price of the products for each seller selling all of them.
+
+    The products are read once, keeping a running total for each seller, so
+    that the offers do not need to be held in memory. The delivery price is
+    added to the cumulative price of a seller unless it reaches the free
+    delivery threshold.
+
+    Arguments:
+        products (Iterable[Tuple[str, Iterable[Dict]]]): The name and the offers
+            of each product, e.g. `Scanner.individual_deals.items()`, or the
+            products yielded by `Scanner.iter_scan()` as `(p.name, p.items)`.
+        sellers (SellerRegistry): The registry identifying the sellers of the
+            offers; a new one if not provided.
+
+    Returns:
+        list: The cumulative deals, ranked by `rank_deals()`, i.e. sorted by
+            cumulative price plus delivery with the default weights.
+
+    """
+    sellers = SellerRegistry() if sellers is None else sellers
+    deals: Dict[int, Dict] = {}
+    # number of products sold by each seller
+    counts: Dict[int, int] = {}
+    count = 0
+    for item_name, items in products:
+        count += 1
+        seen = set()
+        for item in items:
+            seller_id = sellers.register(item)
+            if seller_id not in seen:
+                seen.add(seller_id)
+                counts[seller_id] = counts.get(seller_id, 0) + 1
+            deal = deals.get(seller_id)
+            if deal is None:
+                seller = sellers[seller_id]
+                deal = deals[seller_id] = {
+                    "name": item_name,
+                    "seller": seller.name,
+                    "seller_link": seller.link,
+                    "seller_reviews": seller.reviews,
+                    "seller_reviews_link": seller.reviews_link,
+                    "seller_rating": seller.rating,
+                }
+            deal["name"] = item_name
+            deal["delivery_price"] = item["delivery_price"]
+            deal["free_delivery"] = item["free_delivery"]
+            deal["availability"] = item["availability"]
+            deal["link"] = item["link"]
+            # total_price is quantity * price
+            deal["cumulative_price"] = (
+                deal.get("cumulative_price", 0) + item["total_price"]
+            )
+
+    # only the sellers of all the products make a cumulative deal
+    common = [deal for seller_id, deal in deals.items() if counts[seller_id] == count]
+    for deal in common:
+        # add the delivery price unless the cumulative price reaches the free delivery threshold
+        if deal["free_delivery"] and deal["cumulative_price"] >= deal["free_delivery"]:
+            deal["cumulative_price_plus_delivery"] = deal["cumulative_price"]
+        else:
+            deal["cumulative_price_plus_delivery"] = (
+                deal["cumulative_price"] + deal["delivery_price"]
+            )
+    return rank_deals(common, "cumulative_price_plus_delivery")
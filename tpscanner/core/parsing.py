@@ -0,0 +1,196 @@
+"""Parsing of the downloaded pages, inline or in a pool of processes or threads."""
+
+import multiprocessing
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from tpscanner.config import config
+from tpscanner.metrics import metrics
+from tpscanner.profiler import profiler
+
+from .ranking import rank_deals
+
+# kinds of pools the pages can be parsed in: processes scale across cores, while
+# threads avoid copying the pages and suit builds where lxml releases the GIL
+PARSE_EXECUTORS = ["process", "thread"]
+
+# the parser of the pages, one per process of the pool
+_parser = None
+
+
+def _get_parser():
+    global _parser
+    if _parser is None:
+        from tpscanner.scraper import OfferParser
+
+        _parser = OfferParser()
+    return _parser
+
+
+def parse_offers(pages: tuple, quantity: int, parser=None) -> Tuple[str, List[Dict]]:
+    """Extract the offers of a product from its downloaded pages.
+
+    Arguments:
+        pages (tuple): The pages returned by `Scraper.download_html()`: the page
+            with prices plus shipping costs, the page with prices shipping included,
+            possibly empty, and the further offers pages, if any.
+        quantity (int): The quantity to buy.
+        parser (OfferParser): The parser extracting the offers; a shared one if
+            not provided.
+
+    Returns:
+        tuple: A tuple containing the item name and the list of offers, ranked by
+            `rank_deals()`, i.e. sorted by price with the default weights.
+
+    """
+    parser = parser or _get_parser()
+    html_plus_shipping, html_shipping_included, *html_more = pages
+    name, items = parser.extract_prices_plus_shipping(html_plus_shipping, quantity)
+    # further offers pages, loaded with `full_offers`
+    links = {item["link"] for item in items}
+    for page in html_more:
+        for item in parser.extract_prices_plus_shipping(page, quantity)[1]:
+            if item["link"] not in links:
+                links.add(item["link"])
+                items.append(item)
+    # fetchers that cannot sort the offers shipping included leave the page empty
+    if html_shipping_included:
+        _, item = parser.extract_best_price_shipping_included(
+            html_shipping_included, quantity
+        )
+        if item not in items:
+            items.append(item)
+    # rank the list of items, by price unless other criteria are weighted
+    return name, rank_deals(items, "price")
+
+
+def _init_worker(settings: Dict) -> None:
+    # spawned processes read the configuration file again, without the settings
+    # assigned at run time, e.g. from the command line
+    for key, value in settings.items():
+        setattr(config, key, value)
+
+
+def _parse_compact(pages: tuple, quantity: int, profile: bool = False) -> tuple:
+    # the offers go back to the scanner as rows of values, without repeating the
+    # field names of each offer, with the time spent and the CPU profile, if any
+    start = time.perf_counter()
+    if profile:
+        import cProfile
+
+        cpu_profile = cProfile.Profile()
+        name, items = cpu_profile.runcall(parse_offers, pages, quantity)
+        cpu_profile.create_stats()
+        stats = cpu_profile.stats
+    else:
+        name, items = parse_offers(pages, quantity)
+        stats = None
+    fields = tuple(items[0]) if items else ()
+    rows = [tuple(item.values()) for item in items]
+    return name, fields, rows, time.perf_counter() - start, stats
+
+
+class ParsePool:
+    """Pool parsing the downloaded pages while the browser loads the next ones.
+
+    With no workers, pages are parsed inline, in the thread driving the browser.
+    The parsing time of each product is added to the `parse` phase of the metrics
+    and, when profiling, the CPU profiles of the processes to the `parse` phase of
+    the profiler; the threads of a thread pool are not profiled, as only one
+    profiler can be active at a time.
+
+    Attributes:
+        workers (int): The number of processes or threads parsing the pages.
+        executor (str): The kind of pool, `process` or `thread`.
+
+    """
+
+    def __init__(self, workers: Optional[int] = None, executor: Optional[str] = None):
+        """Initialize the pool, with defaults taken from the configuration.
+
+        Arguments:
+            workers (int): The number of processes or threads parsing the pages;
+                `parse_workers` from the configuration if not provided.
+            executor (str): The kind of pool, `process` or `thread`;
+                `parse_executor` from the configuration if not provided.
+
+        Raises:
+            ValueError: If the kind of pool is not valid.
+
+        """
+        if workers is None:
+            workers = config.parse_workers
+        self.workers = int(workers or 0)
+        self.executor = executor or config.parse_executor or "process"
+        if self.executor not in PARSE_EXECUTORS:
+            raise ValueError(
+                f"Invalid parse executor `{self.executor}`, "
+                f"expected one of {', '.join(PARSE_EXECUTORS)}."
+            )
+        self._pool: Optional[Executor] = None
+        if self.workers > 0 and self.executor == "process":
+            # spawned processes do not inherit the threads of the progress bar
+            self._pool = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(config.settings(),),
+            )
+        elif self.workers > 0:
+            self._pool = ThreadPoolExecutor(self.workers)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether pages are parsed in the pool rather than inline."""
+        return self._pool is not None
+
+    def submit(self, pages: tuple, quantity: int) -> Future:
+        """Parse the pages of a product in the pool.
+
+        Arguments:
+            pages (tuple): The pages returned by `Scraper.download_html()`.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            Future: The future of the parsing, to pass to `result()`.
+
+        Raises:
+            RuntimeError: If the pool is not enabled, or closed.
+
+        """
+        if self._pool is None:
+            raise RuntimeError("The parse pool is not enabled.")
+        profile = profiler.enabled and self.executor == "process"
+        return self._pool.submit(_parse_compact, pages, quantity, profile)
+
+    @staticmethod
+    def result(future: Future, url: Optional[str] = None) -> Tuple[str, List[Dict]]:
+        """Wait for the parsing of a product and return its offers.
+
+        Arguments:
+            future (Future): The future returned by `submit()`.
+            url (str): The URL of the product, to break down the metrics, if any.
+
+        Returns:
+            tuple: A tuple containing the item name and the list of offers, sorted by price.
+
+        Raises:
+            Exception: The error raised while parsing the pages.
+
+        """
+        try:
+            name, fields, rows, duration, stats = future.result()
+        except Exception:
+            metrics.record("parse", 0.0, error=True, url=url)
+            raise
+        metrics.record("parse", duration, url=url)
+        if stats is not None:
+            profiler.add_stats("parse", stats)
+        return name, [dict(zip(fields, row)) for row in rows]
+
+    def close(self) -> None:
+        """Wait for the pages being parsed and stop the pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,130 @@
+"""Ranking of the offers and deals by a weighted score of several criteria."""
+
+import math
+from operator import itemgetter
+from typing import Dict, List, Optional
+
+from tpscanner.config import config
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the scores are then computed in Python
+    np = None
+
+# criteria of the score, each weighted by `rank_weight_<criterion>` in the config
+RANK_CRITERIA = ["cost", "rating", "reviews", "availability"]
+# default weights, ranking by cost alone
+DEFAULT_WEIGHTS = {"cost": 1.0, "rating": 0.0, "reviews": 0.0, "availability": 0.0}
+# number of deals from which the scores are computed with numpy
+NUMPY_MIN_DEALS = 256
+
+
+def rank_weights() -> Dict[str, float]:
+    """Return the weights of the criteria set in the configuration.
+
+    Returns:
+        dict: The weight of each criterion, from `rank_weight_cost`,
+            `rank_weight_rating`, `rank_weight_reviews` and
+            `rank_weight_availability`; ranking by cost alone if not set.
+
+    """
+    weights = {}
+    for criterion in RANK_CRITERIA:
+        weight = getattr(config, f"rank_weight_{criterion}")
+        weights[criterion] = (
+            DEFAULT_WEIGHTS[criterion] if weight is None else float(weight)
+        )
+    return weights
+
+
+def _weights(weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+    if weights is None:
+        return rank_weights()
+    return dict(DEFAULT_WEIGHTS, **weights)
+
+
+def score_deals(
+    items: List[Dict], cost_key: str, weights: Optional[Dict[str, float]] = None
+) -> List[float]:
+    """Return the score of each deal, lower being better.
+
+    Each criterion is scaled to the range 0-1 over all the deals: the cost from
+    the cheapest to the most expensive deal, the rating out of 5 stars (0 if the
+    seller has none), the logarithm of the number of reviews from none to the
+    most reviewed seller, and the availability as 1 or 0. The score is the cost
+    minus the other criteria, each times its weight, so that a weight of 1 on
+    the rating trades the whole range of costs for the whole range of ratings.
+
+    Arguments:
+        items (list): The deals, e.g. the offers of a product or the best
+            cumulative deals.
+        cost_key (str): The field holding the cost of each deal, e.g. `price`.
+        weights (dict): The weight of each criterion, the ones not given being
+            the default ones; the ones set in the configuration if not provided.
+
+    Returns:
+        list: The score of each deal, in the order of the deals.
+
+    """
+    if not items:
+        return []
+    weights = _weights(weights)
+    costs = [item[cost_key] for item in items]
+    ratings = [item["seller_rating"] or 0.0 for item in items]
+    reviews = [item["seller_reviews"] or 0 for item in items]
+    available = [1.0 if item["availability"] else 0.0 for item in items]
+    if np is not None and len(items) >= NUMPY_MIN_DEALS:
+        cost = np.asarray(costs, dtype=np.float64)
+        cost_range = cost.max() - cost.min()
+        log_reviews = np.log1p(np.asarray(reviews, dtype=np.float64))
+        max_log_reviews = log_reviews.max()
+        score = (
+            weights["cost"] * (cost - cost.min()) / (cost_range or 1.0)
+            - weights["rating"] * np.asarray(ratings, dtype=np.float64) / 5.0
+            - weights["reviews"] * log_reviews / (max_log_reviews or 1.0)
+            - weights["availability"] * np.asarray(available, dtype=np.float64)
+        )
+        return score.tolist()
+    min_cost = min(costs)
+    cost_range = (max(costs) - min_cost) or 1.0
+    log_reviews = [math.log1p(count) for count in reviews]
+    max_log_reviews = max(log_reviews) or 1.0
+    return [
+        weights["cost"] * (cost - min_cost) / cost_range
+        - weights["rating"] * rating / 5.0
+        - weights["reviews"] * log_count / max_log_reviews
+        - weights["availability"] * is_available
+        for cost, rating, log_count, is_available in zip(
+            costs, ratings, log_reviews, available
+        )
+    ]
+
+
+def rank_deals(
+    items: List[Dict], cost_key: str, weights: Optional[Dict[str, float]] = None
+) -> List[Dict]:
+    """Return the deals sorted by score, best first.
+
+    With the default weights, the deals are sorted by cost alone, as a plain sort
+    on `cost_key`. Deals with the same score keep their order.
+
+    Arguments:
+        items (list): The deals, e.g. the offers of a product or the best
+            cumulative deals.
+        cost_key (str): The field holding the cost of each deal, e.g. `price`.
+        weights (dict): The weight of each criterion, the ones not given being
+            the default ones; the ones set in the configuration if not provided.
+
+    Returns:
+        list: The deals, sorted by score.
+
+    """
+    weights = _weights(weights)
+    if not any(weights[criterion] for criterion in RANK_CRITERIA[1:]):
+        if weights["cost"] > 0:
+            return sorted(items, key=itemgetter(cost_key))
+        if weights["cost"] == 0:
+            return list(items)
+    scores = score_deals(items, cost_key, weights)
+    order = sorted(range(len(items)), key=scores.__getitem__)
+    return [items[i] for i in order]
@@ -1,14 +1,67 @@
 """This module contains the Scanner class that is responsible for scanning the URLs and extracting the prices and shipping costs."""
 
 import datetime
-
-from rich.progress import Progress
+import itertools
+import time
+from collections import deque
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+)
 
 from tpscanner.config import config
 from tpscanner.logger import logger
-from tpscanner.scraper import Scraper
+from tpscanner.metrics import metrics
+from tpscanner.profiler import profiler
 from tpscanner.utils import sleep
 
+from .deals import best_individual_deals, cumulative_deals
+from .parsing import ParsePool, parse_offers
+from .sellers import SellerRegistry
+from .topup import find_topups
+
+
+def available_items(items: List[Dict]) -> List[Dict]:
+    """Return the offers not marked as unavailable.
+
+    The offers sold by Amazon are always kept.
+
+    Arguments:
+        items (list): The offers of a product.
+
+    Returns:
+        list: The available offers, in the same order.
+
+    """
+    return [
+        item
+        for item in items
+        if item["availability"] is not False or "Amazon" in item["seller"]
+    ]
+
+
+class ProductOffers(NamedTuple):
+    """The offers found for a product, as yielded by `Scanner.iter_scan()`.
+
+    Attributes:
+        url (str): The URL of the product.
+        name (str): The name of the product.
+        quantity (int): The quantity to buy.
+        items (list): The offers, sorted by price.
+
+    """
+
+    url: str
+    name: str
+    quantity: int
+    items: List[Dict]
+
 
 class Scanner:
     """Scanner class that is responsible for scanning the URLs and extracting the prices and shipping costs.
@@ -25,18 +78,47 @@ class Scanner:
         best_individual_deals (list): The list of best individual deals.
         best_cumulative_deals (dict): The dictionary of best cumulative deals.
         formatted_datetime (str): The formatted datetime string.
+        record_dir (str): The directory where to record the downloaded pages.
+        replay_dir (str): The directory of the recorded pages to replay instead of using the browser.
+        checkpoint (Checkpoint): The checkpoint where each product is saved as soon as it is scanned.
+        fetcher (str): The kind of fetcher downloading the pages: `browser`, `http`, `replay` or `fake`.
+        quarantined (dict): The URLs that could not be scanned, with the kind of error, the error and the number of attempts.
+        sellers (SellerRegistry): The sellers of the offers found, each stored once.
+        product_names (dict): The name of the product found at each URL scanned.
+        topups (list): The extra items reaching the free delivery threshold of the sellers.
 
     Methods:
+        create_scraper(): Creates the fetcher used to download the pages.
+        download_url(scraper, url, quantity): Downloads the pages of a URL.
+        scan_url(scraper, url, quantity): Downloads the pages of a URL and extracts its offers.
+        iter_scan(urls, quantities, cancel, progress): Yields the offers of each URL as soon as they are found.
         scan(): Scans the URLs and extracts the prices and shipping costs.
         remove_unavailable_items(): Removes the unavailable items from the individual deals.
         find_best_individual_deals(): Finds the best individual deals.
         find_best_cumulative_deals(): Finds the best cumulative deals.
+        find_topups(): Finds the extra items reaching the free delivery threshold of the sellers.
 
     """
 
-    def __init__(self, level, urls, quantities, wait, headless, console_out, excel_out):
+    def __init__(
+        self,
+        level="",
+        urls=None,
+        quantities=None,
+        wait=5,
+        headless=False,
+        console_out=False,
+        excel_out=False,
+        record_dir=None,
+        replay_dir=None,
+        checkpoint=None,
+        fetcher=None,
+    ):
         """Initialize the Scanner object with the specified parameters.
 
+        Only the URLs and quantities are needed to scan; the other arguments have
+        defaults, so the scanner can be used as a library, e.g. with `iter_scan()`.
+
         Arguments:
             level (str): The level of the scanner.
             urls (list): The list of URLs to scan.
@@ -45,11 +127,18 @@ class Scanner:
             headless (bool): The headless mode of the browser.
             console_out (bool): The console output flag.
             excel_out (bool): The Excel output flag.
+            record_dir (str): The directory where to record the downloaded pages.
+            replay_dir (str): The directory of the recorded pages to replay instead of using the browser.
+            checkpoint (Checkpoint): The checkpoint where to save each product scanned, if any.
+            fetcher (str): The kind of fetcher downloading the pages; `fetcher` from the
+                configuration if not provided, or `replay` if `replay_dir` is set.
 
         """
+        from tpscanner.scraper.fetchers import fetcher_kind
+
         self.level = level
-        self.urls = urls
-        self.quantities = quantities
+        self.urls = [] if urls is None else urls
+        self.quantities = [] if quantities is None else quantities
         self.wait = wait
         self.headless = headless
         self.console_out = console_out
@@ -58,54 +147,247 @@ class Scanner:
         self.best_individual_deals = []
         self.best_cumulative_deals = {}
         self.formatted_datetime = datetime.datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
+        self.record_dir = record_dir
+        self.replay_dir = replay_dir
+        self.checkpoint = checkpoint
+        self.fetcher = fetcher_kind(fetcher, replay_dir)
+        self.quarantined = {}
+        self.sellers = SellerRegistry()
+        self.product_names = {}
+        self.topups = []
+
+    def create_scraper(self):
+        """Create the fetcher used to download the pages.
+
+        Returns:
+            Fetcher: The fetcher of the kind set in `fetcher`, e.g. a Scraper
+                driving the browser, or a ReplayScraper if replaying recorded pages.
+
+        """
+        from tpscanner.scraper import create_fetcher
+
+        return create_fetcher(
+            self.fetcher, self.wait, self.headless, self.record_dir, self.replay_dir
+        )
+
+    def download_url(self, scraper, url: str, quantity: int) -> tuple:
+        """Download the pages of a URL.
+
+        Arguments:
+            scraper (Fetcher): The fetcher used to download the pages.
+            url (str): The URL of the product.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: The pages returned by `Fetcher.download_html()`.
+
+        """
+        # download prices plus shipping costs and best prices with shipping costs included (html2)
+        with metrics.span("download", url=url), profiler.phase("scan"):
+            return scraper.download_html(url, quantity)
+
+    def scan_url(self, scraper, url: str, quantity: int) -> tuple:
+        """Download the pages of a URL and extract its offers.
+
+        Arguments:
+            scraper (Fetcher): The fetcher used to download the pages.
+            url (str): The URL of the product.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: A tuple containing the item name and the list of offers, sorted by price.
+
+        """
+        start_time = time.perf_counter()
+        pages = self.download_url(scraper, url, quantity)
+        with metrics.span("parse", url=url), profiler.phase("parse"):
+            try:
+                name, items = parse_offers(pages, quantity)
+            except Exception:
+                # the page of the browser, if any, shows what could not be parsed
+                scraper._save_screenshot()
+                raise
+        self._log_found(url, name, items, start_time)
+        return name, items
+
+    def _log_found(self, url: str, name: str, items: list, start_time: float) -> None:
+        metrics.incr("offers", len(items))
+        logger.info(
+            "Found %d deals for `%s`.",
+            len(items),
+            name,
+            url=url,
+            product=name,
+            phase="scan",
+            duration=time.perf_counter() - start_time,
+        )
+
+    def _found(self, url: str, quantity: int, name: str, items: list) -> ProductOffers:
+        self.sellers.register_all(items)
+        if self.checkpoint is not None:
+            self.checkpoint.append(url, name, quantity, items)
+        return ProductOffers(url, name, quantity, items)
+
+    def _collect(
+        self, pool, url: str, quantity: int, future, start_time
+    ) -> Optional[ProductOffers]:
+        from tpscanner.scraper.resilience import classify_error
+
+        try:
+            name, items = pool.result(future, url)
+        except Exception as e:
+            kind = classify_error(e)
+            metrics.incr("errors")
+            logger.error(
+                "Failed to parse the pages of `%s` (%s): %s",
+                url,
+                kind,
+                e,
+                url=url,
+                phase="parse",
+                error=kind,
+            )
+            self.quarantined[url] = {"kind": kind, "error": str(e), "attempts": 1}
+            return None
+        self._log_found(url, name, items, start_time)
+        return self._found(url, quantity, name, items)
+
+    def iter_scan(
+        self,
+        urls: Optional[Iterable[str]] = None,
+        quantities: Optional[Iterable] = None,
+        cancel=None,
+        progress: Optional[Callable[[], None]] = None,
+    ) -> Iterator[ProductOffers]:
+        """Scan the URLs and yield the offers of each product as soon as they are found.
+
+        The products are yielded in the order of the URLs and are not kept by the
+        scanner, so the caller decides what to hold in memory. URLs that cannot be
+        scanned are skipped and reported in `quarantined`, and the URLs already in
+        the checkpoint, if set, are yielded from it without being scanned again.
+
+        The scan can be cancelled between two URLs by setting `cancel`, or by
+        closing the generator, e.g. by breaking out of the loop over it: the
+        browser and the parse pool are closed in both cases.
+
+        Arguments:
+            urls (Iterable[str]): The URLs to scan; `urls` of the scanner if not
+                provided.
+            quantities (Iterable): The quantity to buy for each URL; `quantities`
+                of the scanner if not provided, or 1 for each URL if `urls` is
+                provided without quantities.
+            cancel (threading.Event): The event cancelling the scan when set, if any.
+            progress (Callable): The function called once for each URL done, be it
+                scanned, resumed or skipped, if any.
+
+        Yields:
+            ProductOffers: The URL, name, quantity to buy and offers of each product.
+
+        """
+        from tpscanner.scraper import Resilience
+        from tpscanner.scraper.fetchers import OFFLINE_FETCHERS
+
+        if urls is None:
+            urls, quantities = self.urls, self.quantities
+        if quantities is None:
+            quantities = itertools.repeat(1)
+        progress = progress or (lambda: None)
+
+        completed = {}
+        if self.checkpoint is not None:
+            completed = self.checkpoint.completed()
+            if completed:
+                logger.info("Resuming %d products from checkpoint.", len(completed))
+        # the browser is only opened if some URL still has to be scanned
+        resilience = Resilience(self.create_scraper)
+        pool = ParsePool()
+        # products downloaded and being parsed in the pool, in the order of the URLs
+        pending: Deque[tuple] = deque()
+        try:
+            for url, quantity in zip(urls, quantities):
+                if cancel is not None and cancel.is_set():
+                    logger.info("Scan cancelled.")
+                    return
+                quantity = int(quantity)
+                snapshot = completed.get(url)
+                if snapshot is not None and snapshot["quantity"] == quantity:
+                    self.sellers.register_all(snapshot["items"])
+                    progress()
+                    yield ProductOffers(
+                        url, snapshot["name"], quantity, snapshot["items"]
+                    )
+                    continue
+                if pool.enabled:
+                    start_time = time.perf_counter()
+                    pages = resilience.call(
+                        lambda scraper: self.download_url(scraper, url, quantity),
+                        url,
+                    )
+                    if pages is None:
+                        progress()
+                        continue
+                    future = pool.submit(pages, quantity)
+                    pending.append((url, quantity, future, start_time))
+                    while pending and pending[0][2].done():
+                        product = self._collect(pool, *pending.popleft())
+                        progress()
+                        if product is not None:
+                            yield product
+                else:
+                    result = resilience.call(
+                        lambda scraper: self.scan_url(scraper, url, quantity), url
+                    )
+                    progress()
+                    if result is None:
+                        continue
+                    yield self._found(url, quantity, *result)
+                # wait seconds before next URL to avoid being blocked and captcha
+                if self.fetcher not in OFFLINE_FETCHERS:
+                    sleep(config.sleep_rate_limit)
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    logger.info("Scan cancelled.")
+                    return
+                product = self._collect(pool, *pending.popleft())
+                progress()
+                if product is not None:
+                    yield product
+        finally:
+            for *_, future in pending:
+                future.cancel()
+            resilience.close()
+            pool.close()
+            self.quarantined.update(resilience.quarantined)
 
     def scan(self):
         """Scan the URLs and extracts the prices and shipping costs.
 
         This method iterates over the list of URLs and performs the following steps for each URL:
-        1. Creates an instance of the Scraper class with the specified wait time and headless mode.
-        2. Downloads the HTML content for the URL, including prices plus shipping costs and best prices with shipping costs included.
-        3. Extracts the item name and a list of items with their respective prices and shipping costs.
-        4. Extracts the best price with shipping costs included.
-        5. If the best price is not already in the list of items, it is added.
-        6. Sorts the list of items by price.
-        7. Stores the list of items in the individual_deals dictionary with the item name as the key.
-        8. Logs the number of deals found for the item.
-        9. Waits for a specified amount of time before processing the next URL.
+        1. Downloads the HTML content for the URL, including prices plus shipping costs and best prices with shipping costs included.
+        2. Extracts the item name and a list of items with their respective prices and shipping costs.
+        3. Extracts the best price with shipping costs included.
+        4. If the best price is not already in the list of items, it is added.
+        5. Sorts the list of items by price.
+        6. Stores the list of items in the individual_deals dictionary with the item name as the key.
+        7. Logs the number of deals found for the item.
+        8. Waits for a specified amount of time before processing the next URL.
+
+        The URLs are scanned by `iter_scan()`, which sets how failures, checkpoints
+        and the parse pool are handled; this method stores the products it yields
+        in `individual_deals` and `product_names`.
 
         Note: This method uses the Progress class from the rich.progress module to display a progress bar during the scanning process.
 
         """
-        i = 0
+        from rich.progress import Progress
+
         with Progress() as progress:
             task = progress.add_task("Processing items:", total=len(self.urls))
-
-            for url in self.urls:
-                scraper = Scraper(self.wait, self.headless)
-                if progress.finished:
-                    break
-                quantity = int(self.quantities[i])
-                i += 1
-                # download prices plus shipping costs and best prices with shipping costs included (html2)
-                (
-                    html_deals_plus_shipping,
-                    html_deals_shipping_inclued,
-                ) = scraper.download_html(url)
-                name, items = scraper.extract_prices_plus_shipping(
-                    html_deals_plus_shipping, quantity
-                )
-                _, item = scraper.extract_best_price_shipping_included(
-                    html_deals_shipping_inclued, quantity
-                )
-                if item not in items:
-                    items.append(item)
-                # sort the list of items by price
-                items.sort(key=lambda x: x["price"])
-                self.individual_deals[name] = items
-                logger.info(f"Found {len(items)} deals for `{name}`.")
-                # wait seconds before next URL to avoid being blocked and captcha
-                sleep(config.sleep_rate_limit)
-                progress.update(task, advance=1)
+            for product in self.iter_scan(
+                progress=lambda: progress.update(task, advance=1)
+            ):
+                self.individual_deals[product.name] = product.items
+                self.product_names[product.url] = product.name
 
     def remove_unavailable_items(self) -> int:
         """Remove the unavailable items from the individual deals.
@@ -115,87 +397,42 @@ class Scanner:
 
         """
         count = 0
-        for _, items in self.individual_deals.items():
-            for item in items:
-                if item["availability"] is False and "Amazon" not in item["seller"]:
-                    items.remove(item)
-                    count += 1
+        for items in self.individual_deals.values():
+            available = available_items(items)
+            count += len(items) - len(available)
+            items[:] = available
         return count
 
     def find_best_individual_deals(self):
         """Find the best individual deals.
 
-        This method iterates over the items in the `individual_deals` dictionary and checks if the seller indicates a free delivery
-        threshold and if the cumulative price is greater than or equal to the threshold. If both conditions are met, the item is
-        considered as one of the best individual deals and is added to the `best_individual_deals` list.
+        This method checks, with `best_individual_deals()`, which items of the `individual_deals` dictionary come from a seller
+        indicating a free delivery threshold and have a cumulative price greater than or equal to the threshold. Those items are
+        considered as the best individual deals and are added to the `best_individual_deals` list.
 
         """
-        for item_name, items_list in self.individual_deals.items():
-            for item in items_list:
-                # if the seller indicates a free delivery threshold and the cumulative price is greater than or equal to the threshold
-                if (
-                    item["free_delivery"]
-                    and item["total_price"] >= item["free_delivery"]
-                ):
-                    item["name"] = item_name
-                    self.best_individual_deals.append(item)
+        self.best_individual_deals.extend(
+            best_individual_deals(self.individual_deals.items())
+        )
 
     def find_best_cumulative_deals(self):
         """Find the best cumulative deals.
 
-        This method iterates over the items in the `individual_deals` dictionary and checks if the seller indicates a free delivery
-        threshold and if the cumulative price is greater than or equal to the threshold. If both conditions are met, the item is
-        considered as one of the best individual deals and is added to the `best_individual_deals` list.
-
+        This method computes, with `cumulative_deals()`, the cumulative price of all the items for each seller selling all of
+        them, adding the delivery price unless the cumulative price reaches the free delivery threshold of the seller, and
+        stores the deals, ranked by price, in `best_cumulative_deals`.
 
         """
-        # find the common sellers
-        common_sellers = []
-        for _, items in self.individual_deals.items():
-            common_sellers.append([item["seller"] for item in items])
-        common_sellers = set(common_sellers[0]).intersection(*common_sellers)
-
-        # for each common seller find, find the cumulative price of all items sold by that seller
-        # and sort the items by price
-        for seller in common_sellers:
-            best_deal_items = {}
-            for item_name, items_list in self.individual_deals.items():
-                for item in items_list:
-                    if item["seller"] == seller:
-                        best_deal_items["name"] = item_name
-                        best_deal_items["seller"] = item["seller"]
-                        best_deal_items["seller_link"] = item["seller_link"]
-                        best_deal_items["seller_reviews"] = item["seller_reviews"]
-                        best_deal_items["seller_reviews_link"] = item[
-                            "seller_reviews_link"
-                        ]
-                        best_deal_items["seller_rating"] = item["seller_rating"]
-                        best_deal_items["delivery_price"] = item["delivery_price"]
-                        best_deal_items["free_delivery"] = item["free_delivery"]
-                        best_deal_items["availability"] = item["availability"]
-                        best_deal_items["link"] = item["link"]
-                        best_deal_items["cumulative_price"] = (
-                            best_deal_items.get("cumulative_price", 0)
-                            + item["total_price"]  # total_price is quantity * price
-                        )
-            self.best_cumulative_deals[seller] = best_deal_items
-
-        # add the delivery price to the cumulative price if the cumulative price is less than the free delivery price threshold
-        for seller, item in self.best_cumulative_deals.items():
-            # if the seller indicates a free delivery threshold and the cumulative price is greater than or equal to the threshold
-            if (
-                item["free_delivery"]
-                and item["cumulative_price"] >= item["free_delivery"]
-            ):
-                item["cumulative_price_plus_delivery"] = item["cumulative_price"]
-            else:
-                item["cumulative_price_plus_delivery"] = (
-                    item["cumulative_price"] + item["delivery_price"]
-                )
-            self.best_cumulative_deals[seller] = item
-
-        # sort best deals by price
-        self.best_cumulative_deals = sorted(
-            self.best_cumulative_deals.values(),
-            key=lambda x: x["cumulative_price_plus_delivery"],
+        self.best_cumulative_deals = cumulative_deals(
+            self.individual_deals.items(), self.sellers
         )
+
+    def find_topups(self):
+        """Find the cheapest extra items reaching the free delivery threshold.
+
+        For each offer below the free delivery threshold of its seller, this method
+        finds the cheapest extra units of the products of the basket sold by the
+        same seller that reach the threshold, and stores them in `topups`.
+
+        """
+        self.topups = find_topups(self.individual_deals, self.sellers)
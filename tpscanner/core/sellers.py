@@ -0,0 +1,95 @@
+"""Registry of the sellers found during a run."""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class Seller(NamedTuple):
+    """A seller, as shown in its offers."""
+
+    name: str
+    link: str
+    reviews: int
+    reviews_link: str
+    rating: Optional[float]
+
+
+class SellerRegistry:
+    """Sellers of a run, each stored once and identified by a small integer id.
+
+    The same seller appears in the offers of many products: the registry keeps
+    its details the first time it is seen, and every offer of the seller then
+    refers to the same objects, plus the id of the seller in `seller_id`, which is
+    cheaper to compare and group by than the name.
+
+    The seller fields are kept on the offers, as references to the objects of the
+    registry, rather than replaced by the id alone: the offers are written as they
+    are to the checkpoint, the snapshot store, the queue and the exports, which
+    would otherwise all need the registry of the run to read them back.
+
+    Attributes:
+        sellers (list): The sellers, indexed by id.
+
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.sellers: List[Seller] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of sellers."""
+        return len(self.sellers)
+
+    def __getitem__(self, seller_id: int) -> Seller:
+        """Return the seller with the given id."""
+        return self.sellers[seller_id]
+
+    def register(self, item: Dict) -> int:
+        """Register the seller of an offer, if new, and link the offer to it.
+
+        Arguments:
+            item (dict): The offer; its seller fields are replaced with the ones
+                stored in the registry, and its `seller_id` is set.
+
+        Returns:
+            int: The id of the seller.
+
+        """
+        # offers already registered, e.g. by a previous deal computation
+        seller_id = item.get("seller_id")
+        if (
+            seller_id is not None
+            and seller_id < len(self.sellers)
+            and self.sellers[seller_id].name is item["seller"]
+        ):
+            return seller_id
+        seller_id = self._ids.get(item["seller"])
+        if seller_id is None:
+            seller_id = self._ids[item["seller"]] = len(self.sellers)
+            self.sellers.append(
+                Seller(
+                    item["seller"],
+                    item["seller_link"],
+                    item["seller_reviews"],
+                    item["seller_reviews_link"],
+                    item["seller_rating"],
+                )
+            )
+        seller = self.sellers[seller_id]
+        item["seller"] = seller.name
+        item["seller_link"] = seller.link
+        item["seller_reviews"] = seller.reviews
+        item["seller_reviews_link"] = seller.reviews_link
+        item["seller_rating"] = seller.rating
+        item["seller_id"] = seller_id
+        return seller_id
+
+    def register_all(self, items: Iterable[Dict]) -> None:
+        """Register the sellers of several offers.
+
+        Arguments:
+            items (Iterable[Dict]): The offers.
+
+        """
+        for item in items:
+            self.register(item)
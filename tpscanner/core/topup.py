@@ -0,0 +1,167 @@
+"""Top-ups reaching the free delivery threshold of the sellers."""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from tpscanner.config import config
+
+from .sellers import SellerRegistry
+
+
+def _cents(value: float) -> int:
+    return int(round(value * 100))
+
+
+class TopUpSearch:
+    """Cheapest amounts reachable with extra units of some products.
+
+    A bounded knapsack where the weight of each unit is its price: the amounts
+    reachable are kept as the bits of an integer, one bit per cent, and the units
+    of each product are added in chunks of 1, 2, 4, ... units, so that a product
+    with up to `n` extra units takes about `log2(n)` shifts. The amounts reachable
+    before each chunk are kept to tell which units make up an amount.
+
+    Attributes:
+        products (list): The products, as tuples of the name, the unit price and
+            the maximum number of extra units.
+
+    """
+
+    def __init__(self, products: List[Tuple[str, float, int]], max_amount: float):
+        """Find the amounts reachable with the extra units of the products.
+
+        Arguments:
+            products (list): The products, as tuples of the name, the unit price
+                and the maximum number of extra units.
+            max_amount (float): The largest amount to reach; larger amounts are
+                not tracked.
+
+        """
+        self.products = products
+        self._chunks: List[Tuple[int, int, int]] = []  # product, units, cents
+        for i, (_, price, max_units) in enumerate(products):
+            units = 1
+            while max_units > 0:
+                units = min(units, max_units)
+                self._chunks.append((i, units, units * _cents(price)))
+                max_units -= units
+                units *= 2
+        # a cheapest top-up is below the amount to reach plus its cheapest unit
+        price_limit = max((cents for _, _, cents in self._chunks), default=0)
+        self._mask = (1 << (_cents(max_amount) + price_limit + 1)) - 1
+        self._reachable = [1]
+        for _, _, cents in self._chunks:
+            reachable = self._reachable[-1]
+            self._reachable.append((reachable | (reachable << cents)) & self._mask)
+
+    def cheapest(self, amount: float) -> Optional[Tuple[float, Dict[str, int]]]:
+        """Return the cheapest extra units costing at least an amount.
+
+        Arguments:
+            amount (float): The amount to reach, e.g. the gap from a free delivery
+                threshold.
+
+        Returns:
+            tuple: The price of the extra units and the number of units of each
+                product; None if the amount cannot be reached.
+
+        """
+        target = max(_cents(amount), 0)
+        above = self._reachable[-1] >> target
+        if not above:
+            return None
+        target += (above & -above).bit_length() - 1
+        price = target / 100
+        units: Dict[str, int] = {}
+        for chunk in range(len(self._chunks), 0, -1):
+            if not self._reachable[chunk - 1] >> target & 1:
+                product, chunk_units, cents = self._chunks[chunk - 1]
+                name = self.products[product][0]
+                units[name] = units.get(name, 0) + chunk_units
+                target -= cents
+        return price, units
+
+
+def find_topups(
+    individual_deals: Dict[str, List[Dict]],
+    sellers: SellerRegistry,
+    max_units: Optional[int] = None,
+    max_price: Optional[float] = None,
+) -> List[Dict]:
+    """Find the cheapest extra items reaching the free delivery threshold.
+
+    For each offer whose total is below the free delivery threshold of its seller,
+    the extra units of the same product or of the other products of the basket
+    sold by the same seller are searched for the cheapest ones reaching the
+    threshold. The search is done once per seller, for all of its offers. Top-ups
+    costing at least as much as the delivery price they save are left out.
+
+    Arguments:
+        individual_deals (dict): The offers of each product.
+        sellers (SellerRegistry): The registry of the sellers of the offers.
+        max_units (int): The maximum number of extra units of each product;
+            `topup_max_units` from the configuration if not provided.
+        max_price (float): The maximum price of the extra units;
+            `topup_max_price` from the configuration if not provided.
+
+    Returns:
+        list: The top-ups, as copies of the offers with the extra units in `topup`
+            and their price in `topup_price`, sorted by the price of the extra
+            units minus the delivery price saved.
+
+    Raises:
+        ValueError: If the maximum number of extra units is less than 1.
+
+    """
+    # the configuration gives the numbers as floats
+    max_units = int(max_units or config.topup_max_units or 3)
+    if max_units < 1:
+        raise ValueError(f"Expected at least 1 extra unit, found {max_units}.")
+    max_price = max_price or config.topup_max_price or 20.0
+
+    # the cheapest unit price of each product of each seller
+    prices: Dict[int, Dict[str, float]] = defaultdict(dict)
+    below: List[Tuple[str, Dict]] = []
+    for name, items in individual_deals.items():
+        for item in items:
+            seller_id = sellers.register(item)
+            price = prices[seller_id].get(name)
+            if price is None or item["price"] < price:
+                prices[seller_id][name] = item["price"]
+            if (
+                item["free_delivery"]
+                and item["delivery_price"] > 0
+                and 0 < item["free_delivery"] - item["total_price"] <= max_price
+            ):
+                below.append((name, item))
+
+    searches: Dict[int, TopUpSearch] = {}
+    topups = []
+    for name, item in below:
+        seller_id = item["seller_id"]
+        search = searches.get(seller_id)
+        if search is None:
+            products = [
+                (product, price, max_units)
+                for product, price in prices[seller_id].items()
+            ]
+            search = searches[seller_id] = TopUpSearch(products, max_price)
+        found = search.cheapest(item["free_delivery"] - item["total_price"])
+        if found is None or found[0] > max_price:
+            continue
+        price, units = found
+        if price >= item["delivery_price"]:
+            continue
+        topups.append(
+            dict(
+                item,
+                name=name,
+                topup=", ".join(
+                    f"{count} x {product}" for product, count in units.items()
+                ),
+                topup_price=price,
+                topup_saving=item["delivery_price"] - price,
+            )
+        )
+    topups.sort(key=lambda x: -x["topup_saving"])
+    return topups
@@ -0,0 +1,4 @@
+"""Daemon mode of TPScanner."""
+
+from .daemon import Daemon, WatchlistEntry, parse_watchlist  # noqa F401
+from .volatility import VolatilityScheduler, expected_staleness  # noqa F401
@@ -0,0 +1,420 @@
+"""Daemon that keeps the browsers warm and rescans the products of a watchlist."""
+
+import heapq
+import json
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+from tpscanner.utils import RateLimiter, safe_filename
+
+from .volatility import VolatilityScheduler
+
+# suffixes accepted for the rescan interval of a watchlist entry, in seconds
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class WatchlistEntry(NamedTuple):
+    """A product of the watchlist.
+
+    Attributes:
+        url (str): The URL of the product.
+        quantity (int): The quantity to buy.
+        interval (float): The number of seconds between two scans of the product.
+        priority (int): The priority of the product; higher priority products are
+            scanned first when several are due.
+        target (float): The target price of the product, if any.
+
+    """
+
+    url: str
+    quantity: int
+    interval: float
+    priority: int
+    target: Optional[float] = None
+
+
+def parse_interval(value: str) -> float:
+    """Parse a rescan interval, in seconds or with a `s`, `m`, `h` or `d` suffix.
+
+    Arguments:
+        value (str): The interval, e.g. `900`, `15m` or `2h`.
+
+    Returns:
+        float: The interval in seconds.
+
+    """
+    unit = value[-1].lower()
+    if unit in INTERVAL_UNITS:
+        return float(value[:-1]) * INTERVAL_UNITS[unit]
+    return float(value)
+
+
+def parse_watchlist(lines: List[str], default_interval: float) -> List[WatchlistEntry]:
+    """Parse the lines of a watchlist file.
+
+    Each line contains a URL, optionally followed by the quantity to buy, the
+    rescan interval, the priority and the target price, separated by whitespaces. Empty lines and
+    lines starting with `#` are ignored, and invalid lines are logged and skipped,
+    so that a typo does not stop the daemon. The URLs are made canonical, so that
+    they match the snapshots and the alerts of the same product in another form.
+
+    Arguments:
+        lines (list): The lines of the watchlist file.
+        default_interval (float): The rescan interval of entries that do not set it.
+
+    Returns:
+        list: The entries of the watchlist.
+
+    """
+    from tpscanner.io import canonical_url
+
+    entries = []
+    for number, line in enumerate(lines, start=1):
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        url = canonical_url(fields[0])
+        try:
+            quantity = int(fields[1]) if len(fields) > 1 else 1
+            interval = (
+                parse_interval(fields[2]) if len(fields) > 2 else default_interval
+            )
+            priority = int(fields[3]) if len(fields) > 3 else 0
+            target = float(fields[4]) if len(fields) > 4 else None
+            if quantity < 1 or interval <= 0:
+                raise ValueError("the quantity and the interval must be positive")
+        except ValueError as e:
+            logger.error("Skipping line %d of the watchlist: %s", number, e, url=url)
+            continue
+        entries.append(WatchlistEntry(url, quantity, interval, priority, target))
+    return entries
+
+
+class Daemon:
+    """Daemon that rescans the products of a watchlist as they become due.
+
+    Each worker thread keeps its own scraper, and thus its own browser, open for
+    the whole life of the daemon. Products are held in a schedule ordered by the
+    time they are due and by priority, and all workers share the same rate limit.
+    The watchlist file is reloaded when it changes, or on `SIGHUP`; new products
+    are scanned right away, removed ones are dropped from the schedule. The offers
+    found are appended to the snapshot store, checked against the price alerts, if
+    any, and, if requested, saved to Excel, in a workbook per product overwritten
+    at each scan.
+
+    In adaptive mode, the rescan intervals are not taken from the watchlist but
+    set by a `VolatilityScheduler`, which learns how often the offers of each
+    product change from the snapshots in the store and spreads the rate budget
+    accordingly. The resulting schedule, with the expected staleness of each
+    product, is saved to `schedule.json` in the output directory.
+
+    Attributes:
+        watchlist_file (str): The watchlist file.
+        scanner (Scanner): The scanner used to scan each product.
+        store (SnapshotStore): The store where the offers are saved.
+        workers (int): The number of worker threads.
+        rate_limiter (RateLimiter): The rate limit shared by all the workers.
+        entries (dict): The entries of the watchlist, by URL.
+        breaker (CircuitBreaker): The circuit breaker shared by all the workers.
+        scheduler (VolatilityScheduler): The scheduler of the rescan intervals in
+            adaptive mode, None otherwise.
+        alerts (AlertEngine): The engine evaluating the price alerts, if any.
+
+    """
+
+    def __init__(
+        self,
+        watchlist_file: str,
+        wait: int,
+        headless: bool,
+        excel_out: bool = False,
+        record_dir: Optional[str] = None,
+        replay_dir: Optional[str] = None,
+        store=None,
+        workers: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        adaptive: bool = False,
+        alerts=None,
+    ):
+        """Initialize the daemon.
+
+        Arguments:
+            watchlist_file (str): The watchlist file.
+            wait (int): The number of seconds to wait for the pages to load.
+            headless (bool): The headless mode of the browser.
+            excel_out (bool): Whether to also save the latest offers of each
+                product to Excel.
+            record_dir (str): The directory where to record the downloaded pages.
+            replay_dir (str): The directory of the recorded pages to replay instead of using the browser.
+            store (SnapshotStore): The store where the offers are saved; the one set
+                in the configuration if not provided.
+            workers (int): The number of worker threads; `daemon_workers` from the
+                configuration if not provided.
+            requests_per_minute (float): The global rate limit; `requests_per_minute`
+                from the configuration if not provided.
+            adaptive (bool): Whether to set the rescan intervals according to how
+                often the offers of each product change.
+            alerts (AlertEngine): The engine evaluating the price alerts against
+                each scan, if any.
+
+        """
+        from tpscanner.core import Scanner
+        from tpscanner.io import SnapshotStore
+        from tpscanner.scraper import CircuitBreaker
+
+        self.watchlist_file = watchlist_file
+        self.scanner = Scanner(
+            "", [], [], wait, headless, False, excel_out, record_dir, replay_dir
+        )
+        self.store = store or SnapshotStore()
+        self.workers = int(workers or config.daemon_workers or 1)
+        requests_per_minute = requests_per_minute or config.requests_per_minute or 20
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.scheduler = VolatilityScheduler(requests_per_minute) if adaptive else None
+        self.alerts = alerts
+        self.entries: Dict[str, WatchlistEntry] = {}
+        self.breaker = CircuitBreaker()
+        self._schedule: List = []
+        self._sequence: Dict[str, int] = {}
+        self._counter = 0
+        self._mtime: Optional[float] = None
+        self._intervals: Optional[Dict[str, float]] = None
+        self._condition = threading.Condition()
+        self._export_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reload = threading.Event()
+
+    def reload_watchlist(self, force: bool = False) -> bool:
+        """Reload the watchlist file if it changed since the last load.
+
+        Arguments:
+            force (bool): Whether to reload the file even if it did not change.
+
+        If the file cannot be read, the previous entries are kept.
+
+        Returns:
+            bool: True if the watchlist was reloaded.
+
+        """
+        try:
+            mtime = os.stat(self.watchlist_file).st_mtime
+        except FileNotFoundError:
+            logger.error("Watchlist `%s` not found.", self.watchlist_file)
+            return False
+        if not force and mtime == self._mtime:
+            return False
+        try:
+            with open(self.watchlist_file, "r") as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error("Cannot read the watchlist `%s`: %s", self.watchlist_file, e)
+            return False
+        entries = parse_watchlist(lines, float(config.rescan_interval or 3600))
+        now = time.monotonic()
+        with self._condition:
+            self._mtime = mtime
+            previous = self.entries
+            self.entries = {entry.url: entry for entry in entries}
+            self._intervals = None
+            for url, entry in self.entries.items():
+                if url not in previous:
+                    self._push(entry, now)
+                elif url in self._sequence and previous[url] != entry:
+                    # reorder it with the new priority, and bring it forward if
+                    # the new interval makes it due earlier
+                    due = next(
+                        (
+                            item[0]
+                            for item in self._schedule
+                            if item[3] == url and item[2] == self._sequence[url]
+                        ),
+                        now,
+                    )
+                    self._push(entry, min(due, now + self._interval(entry)))
+            for url in set(previous) - set(self.entries):
+                self._sequence.pop(url, None)
+            self._condition.notify_all()
+        logger.info(
+            "Loaded %d products from `%s`.", len(self.entries), self.watchlist_file
+        )
+        return True
+
+    def _interval(self, entry: WatchlistEntry) -> float:
+        if self.scheduler is None:
+            return entry.interval
+        # splitting the budget takes all the entries into account, so it is only
+        # done again when the watchlist or the change rates are updated
+        if self._intervals is None or entry.url not in self._intervals:
+            self._intervals = self.scheduler.intervals(self.entries.values())
+        return self._intervals[entry.url]
+
+    def _push(self, entry: WatchlistEntry, due: float) -> None:
+        # entries superseded by a later push are skipped when popped
+        self._counter += 1
+        self._sequence[entry.url] = self._counter
+        heapq.heappush(self._schedule, (due, -entry.priority, self._counter, entry.url))
+
+    def _next_due(self) -> Optional[WatchlistEntry]:
+        """Wait for the next product that is due, None if the daemon is stopping."""
+        with self._condition:
+            while not self._stop.is_set():
+                if not self._schedule:
+                    self._condition.wait()
+                    continue
+                due, _, sequence, url = self._schedule[0]
+                if self._sequence.get(url) != sequence:
+                    heapq.heappop(self._schedule)
+                    continue
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._schedule)
+                # not scheduled again until the scan is done
+                del self._sequence[url]
+                return self.entries[url]
+        return None
+
+    def _reschedule(self, entry: WatchlistEntry) -> None:
+        with self._condition:
+            current = self.entries.get(entry.url)
+            # removed from the watchlist, or already scheduled by a reload
+            if current is None or entry.url in self._sequence:
+                return
+            self._push(current, time.monotonic() + self._interval(current))
+            self._condition.notify_all()
+
+    def scan_entry(self, resilience, entry: WatchlistEntry) -> None:
+        """Scan a product and save the offers found.
+
+        Products that cannot be scanned are tried again when they are next due.
+
+        Arguments:
+            resilience (Resilience): The resilience layer holding the scraper.
+            entry (WatchlistEntry): The product to scan.
+
+        """
+        result = resilience.call(
+            lambda scraper: self.scanner.scan_url(scraper, entry.url, entry.quantity),
+            entry.url,
+        )
+        if result is None:
+            resilience.quarantined.pop(entry.url, None)
+            return
+        name, items = result
+        snapshot = self.store.append(entry.url, name, entry.quantity, items)
+        if self.scheduler is not None:
+            if self.scheduler.observe(entry.url, snapshot["timestamp"], items):
+                logger.info("Offers changed for `%s`.", name, url=entry.url)
+        if self.alerts is not None:
+            self.alerts.observe(entry.url, name, items, snapshot["timestamp"])
+            self.alerts.save()
+        if self.scanner.excel_out:
+            from tpscanner import io
+
+            # one workbook per product, replaced at each scan, so that the output
+            # directory does not grow with the number of scans
+            filename = f"watch_{safe_filename(name)}.xlsx"
+            with self._export_lock:
+                path = os.path.join(config.output_dir, filename)
+                if os.path.exists(path):
+                    os.remove(path)
+                io.save_individual_deals(filename, {name: items})
+
+    def _work(self) -> None:
+        from tpscanner.scraper import Resilience
+
+        resilience = Resilience(self.scanner.create_scraper, breaker=self.breaker)
+        try:
+            while True:
+                entry = self._next_due()
+                if entry is None:
+                    break
+                if not self.rate_limiter.acquire(self._stop):
+                    break
+                try:
+                    self.scan_entry(resilience, entry)
+                finally:
+                    self._reschedule(entry)
+        finally:
+            resilience.close()
+
+    def run(self) -> None:
+        """Run the daemon until it is stopped with `stop()`, `SIGTERM` or `SIGINT`."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+            signal.signal(signal.SIGINT, lambda *_: self.stop())
+            if hasattr(signal, "SIGHUP"):
+                signal.signal(signal.SIGHUP, lambda *_: self._reload.set())
+        if self.scheduler is not None:
+            self.scheduler.fit(self.store.iter_snapshots())
+        self._check_watchlist(force=True)
+        threads = [
+            threading.Thread(target=self._work, name=f"worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info("Daemon started with %d workers.", self.workers)
+        reload_interval = float(config.watchlist_reload_interval or 30)
+        while not self._stop.is_set():
+            force = self._reload.wait(reload_interval)
+            self._reload.clear()
+            if not self._stop.is_set():
+                self._check_watchlist(force=force)
+        for thread in threads:
+            thread.join()
+        logger.info("Daemon stopped.")
+
+    def _check_watchlist(self, force: bool) -> None:
+        # the daemon keeps scanning the previous entries if anything goes wrong
+        try:
+            self.reload_watchlist(force=force)
+            if self.scheduler is not None:
+                # pick up the change rates observed since the last check
+                with self._condition:
+                    self._intervals = None
+                self.save_schedule_report()
+        except Exception as e:
+            logger.error("Cannot reload the watchlist `%s`: %s", self.watchlist_file, e)
+
+    def save_schedule_report(self, filename: Optional[str] = None) -> List[Dict]:
+        """Save the schedule of each product and its expected staleness.
+
+        Arguments:
+            filename (str): The file where to save the report; `schedule.json` in
+                the output directory if not provided.
+
+        Returns:
+            list: The report, as returned by `VolatilityScheduler.report()`.
+
+        Raises:
+            ValueError: If the daemon is not in adaptive mode.
+
+        """
+        if self.scheduler is None:
+            raise ValueError("The schedule is only reported in adaptive mode.")
+        with self._condition:
+            entries = list(self.entries.values())
+        report = self.scheduler.report(entries)
+        filename = filename or os.path.join(config.output_dir, "schedule.json")
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        with open(filename, "w") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def stop(self) -> None:
+        """Stop the daemon once the scans in progress are done."""
+        self._stop.set()
+        self._reload.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def reload(self) -> None:
+        """Reload the watchlist at the next check, even if it did not change."""
+        self._reload.set()
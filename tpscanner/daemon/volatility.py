@@ -0,0 +1,282 @@
+"""Scheduler that spreads the scan budget according to how often prices change."""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from tpscanner.config import config
+
+
+def offers_signature(items: List[Dict]) -> frozenset:
+    """Return what identifies the offers of a scan, to tell whether they changed.
+
+    Arguments:
+        items (list): The offers of a scan.
+
+    Returns:
+        frozenset: The seller, price, delivery price and availability of each offer.
+
+    """
+    return frozenset(
+        (
+            item["seller"],
+            item["price"],
+            item["delivery_price"],
+            item["availability"],
+        )
+        for item in items
+    )
+
+
+def best_price(items: List[Dict]) -> Optional[float]:
+    """Return the lowest price of the offers of a scan, None if there are none."""
+    return min((item["price"] for item in items), default=None)
+
+
+def estimate_change_rate(changes: int, scans: int, mean_interval: float) -> float:
+    """Estimate how often the offers of a product change.
+
+    The estimate assumes that changes follow a Poisson process observed at
+    regular intervals, where at most one change is seen between two scans, and
+    is bias-corrected so that it stays finite when every scan saw a change.
+
+    Arguments:
+        changes (int): The number of scans whose offers differed from the previous scan.
+        scans (int): The number of pairs of successive scans compared.
+        mean_interval (float): The mean number of seconds between two scans.
+
+    Returns:
+        float: The estimated number of changes per second.
+
+    """
+    return -math.log((scans - changes + 0.5) / (scans + 0.5)) / mean_interval
+
+
+def expected_staleness(change_rate: float, interval: float) -> float:
+    """Return the expected fraction of time the last scan of a product is out of date.
+
+    Arguments:
+        change_rate (float): The number of changes per second.
+        interval (float): The number of seconds between two scans.
+
+    Returns:
+        float: The expected staleness, between 0 and 1.
+
+    """
+    x = change_rate * interval
+    if x <= 0:
+        return 0.0
+    return 1 - (1 - math.exp(-x)) / x
+
+
+class VolatilityScheduler:
+    """Scheduler that learns how often the offers of each product change.
+
+    Each product gets a share of the scan budget proportional to the square root
+    of its weight, which is its estimated change rate, boosted when its best price
+    is close to the target price set by the user. Volatile products, and those
+    about to reach their target, are thus scanned more often than stable ones,
+    while the total number of scans stays within the budget.
+
+    Attributes:
+        budget (float): The number of scans per second shared by all the products.
+        min_interval (float): The minimum number of seconds between two scans of a product.
+        max_interval (float): The maximum number of seconds between two scans of a product.
+        default_interval (float): The interval assumed for products never scanned twice.
+        target_margin (float): How close to the target price, as a fraction of it,
+            a product starts being boosted.
+        target_boost (float): The weight multiplier of a product at its target price.
+
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        default_interval: Optional[float] = None,
+        target_margin: Optional[float] = None,
+        target_boost: Optional[float] = None,
+    ):
+        """Initialize the scheduler, with defaults taken from the configuration.
+
+        Arguments:
+            requests_per_minute (float): The number of scans per minute shared by all the products.
+            min_interval (float): The minimum number of seconds between two scans of a product.
+            max_interval (float): The maximum number of seconds between two scans of a product.
+            default_interval (float): The interval assumed for products never scanned twice.
+            target_margin (float): How close to the target price, as a fraction of
+                it, a product starts being boosted.
+            target_boost (float): The weight multiplier of a product at its target price.
+
+        """
+        self.budget = requests_per_minute / 60
+        self.min_interval = float(min_interval or config.min_rescan_interval or 60)
+        self.max_interval = float(max_interval or config.max_rescan_interval or 86400)
+        self.default_interval = float(
+            default_interval or config.rescan_interval or 3600
+        )
+        self.target_margin = float(target_margin or config.target_margin or 0.1)
+        self.target_boost = float(target_boost or config.target_boost or 4)
+        self._history: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, url: str, timestamp: float, items: List[Dict]) -> bool:
+        """Record the offers found by a scan of a product.
+
+        Arguments:
+            url (str): The URL of the product.
+            timestamp (float): The time of the scan, in seconds since the epoch.
+            items (list): The offers found.
+
+        Returns:
+            bool: True if the offers changed since the previous scan.
+
+        """
+        signature = offers_signature(items)
+        with self._lock:
+            history = self._history.setdefault(
+                url,
+                {"scans": 0, "changes": 0, "elapsed": 0.0, "last": None},
+            )
+            changed = False
+            if history["last"] is not None:
+                last_timestamp, last_signature = history["last"]
+                if timestamp <= last_timestamp:
+                    return False
+                changed = signature != last_signature
+                history["scans"] += 1
+                history["changes"] += changed
+                history["elapsed"] += timestamp - last_timestamp
+            history["last"] = (timestamp, signature)
+            history["best_price"] = best_price(items)
+        return changed
+
+    def fit(self, snapshots: Iterable[Dict]) -> None:
+        """Learn the change rates from past snapshots, oldest first.
+
+        Arguments:
+            snapshots (Iterable): The snapshots, as stored by `SnapshotStore`.
+
+        """
+        for snapshot in snapshots:
+            self.observe(snapshot["url"], snapshot["timestamp"], snapshot["items"])
+
+    def change_rate(self, url: str) -> float:
+        """Return the estimated number of changes per second of a product.
+
+        Arguments:
+            url (str): The URL of the product.
+
+        Returns:
+            float: The change rate. Until the product is scanned several times, it
+                is pulled towards one change per default interval.
+
+        """
+        prior = 1 / self.default_interval
+        history = self._history.get(url)
+        if not history or not history["scans"]:
+            return prior
+        scans = history["scans"]
+        rate = estimate_change_rate(
+            history["changes"], scans, history["elapsed"] / scans
+        )
+        return (rate * scans + prior) / (scans + 1)
+
+    def weight(self, url: str, target: Optional[float] = None) -> float:
+        """Return the weight of a product in the split of the budget.
+
+        Arguments:
+            url (str): The URL of the product.
+            target (float): The target price of the product, if any.
+
+        Returns:
+            float: The change rate, boosted if the best price is close to the target.
+
+        """
+        weight = self.change_rate(url)
+        price = self._history.get(url, {}).get("best_price")
+        if target and price is not None:
+            distance = max(0.0, price - target) / (target * self.target_margin)
+            closeness = max(0.0, 1 - distance)
+            weight *= 1 + (self.target_boost - 1) * closeness
+        return weight
+
+    def intervals(self, entries: Iterable) -> Dict[str, float]:
+        """Split the budget among the products of the watchlist.
+
+        Each product is scanned at a frequency proportional to the square root of
+        its weight, within the minimum and the maximum interval; the intervals set
+        in the watchlist are not used. The budget freed or consumed by the products
+        hitting these bounds is spread over the other ones.
+
+        Arguments:
+            entries (Iterable): The watchlist entries.
+
+        Returns:
+            dict: The number of seconds between two scans, by URL.
+
+        """
+        entries = list(entries)
+        roots = {
+            entry.url: math.sqrt(self.weight(entry.url, entry.target))
+            for entry in entries
+        }
+        bounds = (1 / self.max_interval, 1 / self.min_interval)
+        frequencies: Dict[str, float] = {}
+        free = set(roots)
+        budget = self.budget
+        # bound the products outside the limits until the split is stable
+        while free:
+            total = sum(roots[url] for url in free)
+            if total <= 0:
+                for url in free:
+                    frequencies[url] = bounds[0]
+                break
+            split = {url: budget * roots[url] / total for url in free}
+            clamped = {
+                url: min(max(f, bounds[0]), bounds[1])
+                for url, f in split.items()
+                if not bounds[0] <= f <= bounds[1]
+            }
+            if not clamped:
+                frequencies.update(split)
+                break
+            frequencies.update(clamped)
+            free -= set(clamped)
+            budget = max(0.0, budget - sum(clamped.values()))
+        return {url: 1 / f for url, f in frequencies.items()}
+
+    def report(self, entries: Iterable) -> List[Dict]:
+        """Report the schedule of each product and its expected staleness.
+
+        Arguments:
+            entries (Iterable): The watchlist entries.
+
+        Returns:
+            list: One dict per product, with the URL, the number of scans compared,
+                the change rate per hour, the best price, the target price, the
+                interval in seconds and the expected staleness, most stale first.
+
+        """
+        entries = list(entries)
+        intervals = self.intervals(entries)
+        rows = []
+        for entry in entries:
+            history = self._history.get(entry.url, {})
+            rate = self.change_rate(entry.url)
+            rows.append(
+                {
+                    "url": entry.url,
+                    "scans": history.get("scans", 0),
+                    "changes_per_hour": rate * 3600,
+                    "best_price": history.get("best_price"),
+                    "target": entry.target,
+                    "interval": intervals[entry.url],
+                    "expected_staleness": expected_staleness(
+                        rate, intervals[entry.url]
+                    ),
+                }
+            )
+        rows.sort(key=lambda row: row["expected_staleness"], reverse=True)
+        return rows
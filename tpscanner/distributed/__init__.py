@@ -0,0 +1,4 @@
+"""Distributed scanning of the URLs through a shared work queue."""
+
+from .nodes import Coordinator, Worker  # noqa F401
+from .queue import WorkQueue  # noqa F401
@@ -0,0 +1,223 @@
+"""Coordinator and worker nodes scanning the URLs of a run through a shared queue."""
+
+import signal
+import threading
+import time
+from typing import Optional
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+from tpscanner.utils import sleep
+
+from .queue import WorkQueue, worker_id
+
+
+class Coordinator:
+    """Node that submits the URLs of a run and collects the offers found by the workers.
+
+    Attributes:
+        queue (WorkQueue): The queue shared with the workers.
+        poll_interval (float): The number of seconds between two checks of the queue.
+
+    """
+
+    def __init__(self, queue: WorkQueue, poll_interval: float = 1):
+        """Initialize the coordinator.
+
+        Arguments:
+            queue (WorkQueue): The queue shared with the workers.
+            poll_interval (float): The number of seconds between two checks of the queue.
+
+        """
+        self.queue = queue
+        self.poll_interval = poll_interval
+
+    def scan(self, scanner, timeout: Optional[float] = None) -> str:
+        """Scan the URLs of the scanner on the workers and store their offers in it.
+
+        The URLs are submitted as a new run, and the coordinator waits until every
+        job is either done or failed after the maximum number of attempts, then
+        fills `scanner.individual_deals` as `Scanner.scan()` would. Products that
+        could not be scanned are left out and reported in `scanner.quarantined`.
+
+        If the scanner has a checkpoint, the products already in it, with the same
+        quantity, are not submitted again, and the products found by the workers
+        are added to it, so that an interrupted run can be resumed.
+
+        Arguments:
+            scanner (Scanner): The scanner with the URLs and quantities of the run.
+            timeout (float): The maximum number of seconds to wait for the next
+                product to be reported; `queue_timeout` from the configuration if
+                not provided. The products not reported in time are quarantined.
+
+        Returns:
+            str: The identifier of the run.
+
+        """
+        from rich.progress import Progress
+
+        timeout = float(timeout or config.queue_timeout or 900)
+        completed = {}
+        if scanner.checkpoint is not None:
+            completed = scanner.checkpoint.completed()
+        urls, quantities = [], []
+        for url, quantity in zip(scanner.urls, scanner.quantities):
+            snapshot = completed.get(url)
+            if snapshot is not None and snapshot["quantity"] == int(quantity):
+                self._store(scanner, url, snapshot["name"], snapshot["items"])
+                continue
+            urls.append(url)
+            quantities.append(quantity)
+        if len(urls) < len(scanner.urls):
+            logger.info(
+                "Resuming %d products from checkpoint.", len(scanner.urls) - len(urls)
+            )
+
+        run_id = self.queue.submit(urls, quantities)
+        logger.info("Submitted %d URLs as run `%s`.", len(urls), run_id)
+        reported, last_report = 0, time.monotonic()
+        with Progress() as progress:
+            task = progress.add_task("Processing items:", total=len(urls))
+            while True:
+                status = self.queue.status(run_id)
+                finished = status["done"] + status["failed"]
+                progress.update(task, completed=finished)
+                if finished == len(urls):
+                    break
+                if finished > reported:
+                    reported, last_report = finished, time.monotonic()
+                elif time.monotonic() - last_report > timeout:
+                    cancelled = self.queue.cancel(
+                        run_id, f"timeout: Not reported in {timeout:g} seconds."
+                    )
+                    logger.error(
+                        "Run `%s`: no product reported in %g seconds, %d cancelled.",
+                        run_id,
+                        timeout,
+                        cancelled,
+                    )
+                    break
+                time.sleep(self.poll_interval)
+        for result in self.queue.results(run_id):
+            url = result["url"]
+            if result["state"] != "done":
+                # the workers report the kind of error before the error itself
+                kind, separator, error = (result["error"] or "").partition(": ")
+                if not separator:
+                    kind, error = "unknown", result["error"]
+                logger.error("Failed to scan `%s`: %s", url, error, url=url, error=kind)
+                scanner.quarantined[url] = {
+                    "kind": kind,
+                    "error": error,
+                    "attempts": result["attempts"],
+                }
+                continue
+            metrics.incr("offers", len(result["items"]))
+            if scanner.checkpoint is not None:
+                scanner.checkpoint.append(
+                    url, result["name"], result["quantity"], result["items"]
+                )
+            self._store(scanner, url, result["name"], result["items"])
+        return run_id
+
+    @staticmethod
+    def _store(scanner, url: str, name: str, items: list) -> None:
+        scanner.sellers.register_all(items)
+        scanner.individual_deals[name] = items
+        scanner.product_names[url] = name
+
+
+class Worker:
+    """Node that leases URLs from the queue, scans them and pushes the offers back.
+
+    The worker keeps the same scraper, and thus the same browser, for all the jobs.
+
+    Attributes:
+        queue (WorkQueue): The queue shared with the coordinator.
+        scanner (Scanner): The scanner used to scan each URL.
+        name (str): The name identifying the worker.
+        poll_interval (float): The number of seconds to wait when the queue is empty.
+
+    """
+
+    def __init__(self, queue: WorkQueue, scanner, poll_interval: float = 2):
+        """Initialize the worker.
+
+        Arguments:
+            queue (WorkQueue): The queue shared with the coordinator.
+            scanner (Scanner): The scanner used to scan each URL.
+            poll_interval (float): The number of seconds to wait when the queue is empty.
+
+        """
+        self.queue = queue
+        self.scanner = scanner
+        self.name = worker_id()
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def run(self, max_idle: Optional[float] = None) -> int:
+        """Process jobs until stopped with `stop()`, `SIGTERM` or `SIGINT`.
+
+        Arguments:
+            max_idle (float): Stop after the queue has been empty for this number
+                of seconds, if provided.
+
+        Returns:
+            int: The number of jobs done.
+
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+            signal.signal(signal.SIGINT, lambda *_: self.stop())
+        logger.info("Worker `%s` started.", self.name)
+        from tpscanner.scraper import Resilience, RetryPolicy
+        from tpscanner.scraper.fetchers import OFFLINE_FETCHERS
+        from tpscanner.scraper.resilience import RETRYABLE
+
+        done = 0
+        idle_since = time.monotonic()
+        # failed jobs are retried through the queue, possibly by another worker, if
+        # the error can go away by trying again
+        resilience = Resilience(self.scanner.create_scraper, RetryPolicy(1))
+        try:
+            while not self._stop.is_set():
+                job = self.queue.lease(self.name)
+                if job is None:
+                    if (
+                        max_idle is not None
+                        and time.monotonic() - idle_since >= max_idle
+                    ):
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                result = resilience.call(
+                    lambda scraper: self.scanner.scan_url(
+                        scraper, job["url"], job["quantity"]
+                    ),
+                    job["url"],
+                )
+                if result is None:
+                    failure = resilience.quarantined.pop(job["url"])
+                    self.queue.fail(
+                        job["id"],
+                        self.name,
+                        f"{failure['kind']}: {failure['error']}",
+                        retry=failure["kind"] in RETRYABLE,
+                    )
+                elif self.queue.complete(job["id"], self.name, *result):
+                    done += 1
+                else:
+                    logger.warn("Lease on `%s` expired.", job["url"], url=job["url"])
+                idle_since = time.monotonic()
+                # wait before the next URL to avoid being blocked
+                if self.scanner.fetcher not in OFFLINE_FETCHERS:
+                    sleep(config.sleep_rate_limit)
+        finally:
+            resilience.close()
+        logger.info("Worker `%s` stopped after %d jobs.", self.name, done)
+        return done
+
+    def stop(self) -> None:
+        """Stop the worker once the job in progress is done."""
+        self._stop.set()
@@ -0,0 +1,274 @@
+"""Work queue shared by the coordinator and the workers, stored in SQLite."""
+
+import json
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from tpscanner.config import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    worker TEXT,
+    name TEXT,
+    items TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id);
+"""
+
+# states of a job: waiting to be leased, leased by a worker, done, or failed after
+# the maximum number of attempts
+STATES = ["pending", "leased", "done", "failed"]
+
+
+def worker_id() -> str:
+    """Return a name identifying this worker across the nodes."""
+    return f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+class WorkQueue:
+    """Queue of the URLs to scan, with leases that expire and failed jobs retried.
+
+    A worker leases a job for a visibility timeout: if it does not complete the
+    job in time, e.g. because it crashed, the job becomes visible again to the
+    other workers. Failed jobs are retried until they reach the maximum number of
+    attempts. The queue is a SQLite database, so it can be shared by the nodes
+    through a shared filesystem; every operation is a short transaction, and
+    leases are taken with an immediate lock so two workers never get the same job.
+
+    Attributes:
+        filename (str): The SQLite database file.
+        visibility_timeout (float): The number of seconds a job is leased for.
+        max_attempts (int): The number of attempts before a job is marked as failed.
+
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        visibility_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        """Open the queue, creating the database if needed.
+
+        Arguments:
+            filename (str): The SQLite database file.
+            visibility_timeout (float): The number of seconds a job is leased for;
+                `queue_visibility_timeout` from the configuration if not provided.
+            max_attempts (int): The number of attempts before a job is marked as
+                failed; `queue_max_attempts` from the configuration if not provided.
+
+        """
+        self.filename = filename
+        self.visibility_timeout = float(
+            visibility_timeout or config.queue_visibility_timeout or 300
+        )
+        self.max_attempts = int(max_attempts or config.queue_max_attempts or 3)
+        db = sqlite3.connect(self.filename, timeout=30)
+        try:
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False):
+        db = sqlite3.connect(self.filename, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def submit(self, urls: List[str], quantities: List) -> str:
+        """Add the URLs of a run to the queue.
+
+        Arguments:
+            urls (list): The URLs to scan.
+            quantities (list): The quantity to buy for each URL.
+
+        Returns:
+            str: The identifier of the run.
+
+        """
+        run_id = uuid.uuid4().hex
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO jobs (run_id, position, url, quantity) VALUES (?, ?, ?, ?)",
+                (
+                    (run_id, i, url, int(quantity))
+                    for i, (url, quantity) in enumerate(zip(urls, quantities))
+                ),
+            )
+        return run_id
+
+    def lease(self, worker: str) -> Optional[Dict]:
+        """Lease the oldest job that is pending or whose lease expired.
+
+        Arguments:
+            worker (str): The name of the worker taking the lease.
+
+        Returns:
+            dict: The id, URL, quantity and attempt number of the job, None if
+                there is no job to do.
+
+        """
+        now = time.time()
+        with self._transaction(immediate=True) as db:
+            # jobs whose last attempt timed out are not retried forever
+            db.execute(
+                "UPDATE jobs SET state = 'failed', "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = db.execute(
+                "SELECT id, url, quantity, attempts FROM jobs "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET state = 'leased', lease_until = ?, worker = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (now + self.visibility_timeout, worker, row["id"]),
+            )
+        return {
+            "id": row["id"],
+            "url": row["url"],
+            "quantity": row["quantity"],
+            "attempt": row["attempts"] + 1,
+        }
+
+    def complete(self, job_id: int, worker: str, name: str, items: List[Dict]) -> bool:
+        """Store the offers found for a job and mark it as done.
+
+        Arguments:
+            job_id (int): The id of the job.
+            worker (str): The name of the worker holding the lease.
+            name (str): The name of the product.
+            items (list): The offers found.
+
+        Returns:
+            bool: False if the lease was lost to another worker, whose result is kept.
+
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET state = 'done', name = ?, items = ?, error = NULL "
+                "WHERE id = ? AND state = 'leased' AND worker = ?",
+                (name, json.dumps(items), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str, retry: bool = True) -> None:
+        """Release a job after a failed attempt, so that it can be retried.
+
+        The job is marked as failed once it reaches the maximum number of attempts,
+        or at once if it must not be retried.
+
+        Arguments:
+            job_id (int): The id of the job.
+            worker (str): The name of the worker holding the lease.
+            error (str): The error that made the attempt fail.
+            retry (bool): Whether the job can be retried, i.e. whether the error
+                can go away by trying again.
+
+        """
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET error = ?, lease_until = NULL, "
+                "state = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE id = ? AND state = 'leased' AND worker = ?",
+                (error, not retry, self.max_attempts, job_id, worker),
+            )
+
+    def cancel(self, run_id: str, error: str) -> int:
+        """Mark the jobs of a run that are not finished yet as failed.
+
+        Workers holding a lease on one of them cannot complete it anymore.
+
+        Arguments:
+            run_id (str): The identifier of the run.
+            error (str): The error recorded for the cancelled jobs.
+
+        Returns:
+            int: The number of jobs cancelled.
+
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET state = 'failed', error = ?, lease_until = NULL "
+                "WHERE run_id = ? AND state IN ('pending', 'leased')",
+                (error, run_id),
+            )
+        return cursor.rowcount
+
+    def status(self, run_id: str) -> Dict[str, int]:
+        """Count the jobs of a run in each state.
+
+        Arguments:
+            run_id (str): The identifier of the run.
+
+        Returns:
+            dict: The number of jobs in each state.
+
+        """
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT state, COUNT(*) AS count FROM jobs WHERE run_id = ? GROUP BY state",
+                (run_id,),
+            ).fetchall()
+        counts = {state: 0 for state in STATES}
+        counts.update({row["state"]: row["count"] for row in rows})
+        return counts
+
+    def results(self, run_id: str) -> List[Dict]:
+        """Return the jobs of a run, in the order the URLs were submitted.
+
+        Arguments:
+            run_id (str): The identifier of the run.
+
+        Returns:
+            list: The URL, quantity, state, number of attempts, product name,
+                offers and last error of each job.
+
+        """
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT url, quantity, state, attempts, name, items, error FROM jobs "
+                "WHERE run_id = ? ORDER BY position",
+                (run_id,),
+            ).fetchall()
+        return [
+            {
+                "url": row["url"],
+                "quantity": row["quantity"],
+                "state": row["state"],
+                "attempts": row["attempts"],
+                "name": row["name"],
+                "items": json.loads(row["items"]) if row["items"] else [],
+                "error": row["error"],
+            }
+            for row in rows
+        ]
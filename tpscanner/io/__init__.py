@@ -1,7 +1,11 @@
 """This module contains functions to save the results of the scanner."""
 
+from .checkpoint import Checkpoint, default_checkpoint_file  # noqa: F401
+from .inputs import UrlInput, canonical_url, merge_inputs  # noqa: F401
 from .save_results import (
     save_best_cumulative_deals,  # noqa: F401
     save_best_individual_deals,  # noqa: F401
     save_individual_deals,  # noqa: F401
+    save_topups,  # noqa: F401
 )
+from .store import SnapshotStore  # noqa: F401
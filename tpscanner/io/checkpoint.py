@@ -0,0 +1,92 @@
+"""Module to save the products of a run as they are scanned, so that it can be resumed."""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from tpscanner.config import config
+
+from .store import SnapshotStore
+
+
+def default_checkpoint_file(source: Optional[str] = None) -> str:
+    """Return the path of the checkpoint file set in the configuration.
+
+    Arguments:
+        source (str): The input of the run, e.g. the path of the URLs file. If
+            provided, a hash of it is added to the name of the file, so that runs
+            of different inputs, possibly at the same time, do not overwrite each
+            other's checkpoint.
+
+    Returns:
+        str: The path of the checkpoint file, relative to the output directory.
+
+    """
+    filename = config.checkpoint_file or "checkpoint.jsonl"
+    if source is not None:
+        root, extension = os.path.splitext(filename)
+        digest = hashlib.sha1(
+            source.encode("utf-8"), usedforsecurity=False
+        ).hexdigest()[:10]
+        filename = f"{root}_{digest}{extension}"
+    return os.path.join(config.output_dir, filename)
+
+
+class Checkpoint(SnapshotStore):
+    """Snapshot store holding the products of the current run.
+
+    Each product is written to disk as soon as it is scanned, so an interrupted
+    run loses at most the URL being scanned, and can be resumed from the products
+    already in the checkpoint.
+    """
+
+    sync = True
+
+    def __init__(self, filename: Optional[str] = None, resume: bool = False):
+        """Open the checkpoint.
+
+        Arguments:
+            filename (str): The checkpoint file. If not provided, it is taken from
+                the configuration.
+            resume (bool): Whether to keep the products of the previous run; if
+                False, the checkpoint is emptied.
+
+        """
+        super().__init__(filename or default_checkpoint_file())
+        if not resume:
+            self.clear()
+        elif os.path.exists(self.filename):
+            # terminate a line left partially written, so that it is skipped
+            with open(self.filename, "rb+") as f:
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+
+    def clear(self) -> None:
+        """Remove all the products from the checkpoint."""
+        with self._lock:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+
+    def completed(self) -> Dict[str, Dict]:
+        """Return the products already scanned.
+
+        Lines partially written, e.g. when the run crashed, are ignored.
+
+        Returns:
+            dict: The snapshot of each product, by URL.
+
+        """
+        completed: Dict[str, Dict] = {}
+        if not os.path.exists(self.filename):
+            return completed
+        with open(self.filename, "r") as f:
+            for line in f:
+                try:
+                    snapshot = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                completed[snapshot["url"]] = snapshot
+        return completed
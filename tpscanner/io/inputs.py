@@ -0,0 +1,218 @@
+"""Module to read the URLs to scan, with their quantities, from a file or stdin."""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# query parameters added by newsletters, ads and social networks, which do not
+# change the product a URL points to
+TRACKING_PARAMETERS = ("utm_", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid")
+# default ports, dropped from the URLs
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """Return the canonical form of a URL, shared by the URLs of the same page.
+
+    The scheme and host are lowercased, the default port, the fragment, the
+    tracking parameters and the trailing slash of the path are dropped, and the
+    other query parameters are sorted.
+
+    Arguments:
+        url (str): The URL.
+
+    Returns:
+        str: The canonical URL.
+
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{parts.port}"
+    path = parts.path.rstrip("/") if parts.path != "/" else ""
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMETERS)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def parse_input_line(line: str) -> Optional[Tuple[str, int]]:
+    """Parse a line of a file of URLs.
+
+    A line is either a URL, optionally followed by the quantity to buy, separated
+    by any whitespace, or a JSON object with the `url` and, optionally, the
+    `quantity`. Empty lines and lines starting with `#` are ignored.
+
+    Arguments:
+        line (str): The line.
+
+    Returns:
+        tuple: The URL and the quantity to buy; None if the line is ignored.
+
+    Raises:
+        ValueError: If the line is not valid.
+
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        entry = json.loads(line)
+        return entry["url"], int(entry.get("quantity", 1))
+    fields = line.split()
+    if len(fields) > 2:
+        raise ValueError(f"Expected a URL and a quantity, found `{line}`.")
+    return fields[0], int(fields[1]) if len(fields) > 1 else 1
+
+
+def read_inputs(lines: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    """Parse the lines of a file of URLs, one at a time.
+
+    Arguments:
+        lines (Iterable[str]): The lines, e.g. an open file.
+
+    Yields:
+        tuple: The URL and the quantity to buy of each line not ignored.
+
+    Raises:
+        ValueError: If a line is not valid, with its number.
+
+    """
+    for number, line in enumerate(lines, start=1):
+        try:
+            entry = parse_input_line(line)
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid line {number}: {e}") from e
+        if entry is not None:
+            yield entry
+
+
+def _digest(url: str) -> bytes:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+def merge_inputs(
+    urls: Iterable[str], quantities: Iterable
+) -> Tuple[List[str], List[int]]:
+    """Merge the duplicate URLs of a list, adding up their quantities.
+
+    Arguments:
+        urls (Iterable[str]): The URLs.
+        quantities (Iterable): The quantity to buy for each URL.
+
+    Returns:
+        tuple: The canonical URLs, each once, in the order they first appear, and
+            the quantity to buy of each.
+
+    """
+    merged: Dict[str, int] = {}
+    for url, quantity in zip(urls, quantities):
+        url = canonical_url(url)
+        merged[url] = merged.get(url, 0) + int(quantity)
+    return list(merged), list(merged.values())
+
+
+class UrlInput:
+    """URLs to scan, read lazily from a file or stdin, each once.
+
+    The file is read twice: a first pass, when the input is opened, validates the
+    lines and adds up the quantities of the URLs that are the same once made
+    canonical, keeping only a digest of each URL; then the URLs are read again
+    each time they are iterated over, so that large lists never need to be held
+    in memory. Stdin is copied to a temporary file, so that it can be read again;
+    each reading opens the file anew, so that the URLs and the quantities can be
+    iterated over at the same time.
+
+    Attributes:
+        source (str): The file, or `-` for stdin.
+        urls (UrlInputColumn): The URLs, in the order they first appear.
+        quantities (UrlInputColumn): The quantity to buy of each URL.
+
+    """
+
+    def __init__(self, source: str):
+        """Open the input and merge the quantities of the duplicate URLs.
+
+        Arguments:
+            source (str): The file, or `-` for stdin.
+
+        Raises:
+            ValueError: If a line is not valid.
+
+        """
+        self.source = source
+        # path of the copy of stdin, if any
+        self._spool: Optional[str] = None
+        self._quantities: Dict[bytes, int] = {}
+        try:
+            if source == "-":
+                with tempfile.NamedTemporaryFile(
+                    "w", encoding="utf-8", suffix=".txt", delete=False
+                ) as f:
+                    self._spool = f.name
+                    for line in sys.stdin:
+                        f.write(line)
+            for url, quantity in self._read():
+                key = _digest(url)
+                self._quantities[key] = self._quantities.get(key, 0) + quantity
+        except BaseException:
+            # the caller gets no input to close
+            self.close()
+            raise
+        self.urls = UrlInputColumn(self, 0)
+        self.quantities = UrlInputColumn(self, 1)
+
+    def _read(self) -> Iterator[Tuple[str, int]]:
+        with open(self._spool or self.source, "r", encoding="utf-8") as f:
+            for url, quantity in read_inputs(f):
+                yield canonical_url(url), quantity
+
+    def __len__(self) -> int:
+        """Return the number of distinct URLs."""
+        return len(self._quantities)
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        """Iterate over the distinct URLs, with their total quantity to buy."""
+        seen = set()
+        for url, _ in self._read():
+            key = _digest(url)
+            if key not in seen:
+                seen.add(key)
+                yield url, self._quantities[key]
+
+    def close(self) -> None:
+        """Remove the copy of stdin, if any."""
+        if self._spool is not None:
+            os.remove(self._spool)
+            self._spool = None
+
+
+class UrlInputColumn:
+    """The URLs or the quantities of a `UrlInput`, read lazily in order."""
+
+    def __init__(self, source: UrlInput, column: int):
+        """Initialize the column.
+
+        Arguments:
+            source (UrlInput): The input.
+            column (int): 0 for the URLs, 1 for the quantities.
+
+        """
+        self._source = source
+        self._column = column
+
+    def __len__(self) -> int:
+        """Return the number of distinct URLs."""
+        return len(self._source)
+
+    def __iter__(self) -> Iterator:
+        """Iterate over the URLs or the quantities."""
+        for entry in self._source:
+            yield entry[self._column]
@@ -2,11 +2,9 @@
 
 import os
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Alignment, Color, Font, NamedStyle
-
 from tpscanner.config import config
 from tpscanner.logger import logger
+from tpscanner.metrics import metrics
 
 
 def save_individual_deals(filename, individual_deals_items) -> None:
@@ -45,7 +43,7 @@ def save_individual_deals(filename, individual_deals_items) -> None:
     ]
     col_format_start_range = 4
     for name, items in individual_deals_items.items():
-        logger.info(f"Saving deals for `{name}`.")
+        logger.info("Saving deals for `%s`.", name, product=name, phase="export")
         _create_workbook(filename, name, headers, items, keys, col_format_start_range)
 
 
@@ -127,14 +125,64 @@ def save_best_cumulative_deals(filename, sheetname, best_deals_items) -> None:
     )
 
 
+def save_topups(filename, sheetname, topups) -> None:
+    """Save the free delivery top-ups to an Excel file.
+
+    Arguments:
+        filename (str): The name of the Excel file.
+        sheetname (str): The name of the sheet.
+        topups (list): The list of offers with the extra items reaching the free delivery threshold.
+
+    """
+    headers = [
+        "Product",
+        "Seller",
+        "Reviews",
+        "Rating",
+        "Quantity",
+        "Total Price",
+        "Free Delivery From",
+        "Add",
+        "Add Price",
+        "Delivery Price",
+        "Saving",
+        "See Offer",
+    ]
+    keys = [
+        "name",
+        "seller",
+        "seller_reviews",
+        "seller_rating",
+        "quantity",
+        "total_price",
+        "free_delivery",
+        "topup",
+        "topup_price",
+        "delivery_price",
+        "topup_saving",
+        "link",
+    ]
+    col_format_start_range = 6
+    _create_workbook(filename, sheetname, headers, topups, keys, col_format_start_range)
+
+
 def _create_workbook(filename, sheetname, headers, items, keys, col_format_start_range):
+    os.makedirs(config.output_dir, exist_ok=True)
     filename = os.path.join(config.output_dir, filename)
     # ensure that the sheet name is less than 31 characters
     if len(sheetname) > 31:
         sheetname = sheetname[:31]
+    with metrics.span("excel_save", sheet=sheetname):
+        _write_sheet(filename, sheetname, headers, items, keys, col_format_start_range)
+
+
+def _write_sheet(filename, sheetname, headers, items, keys, col_format_start_range):
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.styles import Alignment, Color, Font, NamedStyle
+
     # Check if the file already exists
     if os.path.exists(filename):
-        logger.info(f"File `{filename}` already exists. Opening it...")
+        logger.info("File `%s` already exists. Opening it...", filename)
         # If the file exists, open it
         workbook = load_workbook(filename)
         # create a new worksheet
@@ -142,7 +190,7 @@ def _create_workbook(filename, sheetname, headers, items, keys, col_format_start
         # find existing named style
         header_style = workbook._named_styles["header_style"]
     else:
-        logger.info(f"File `{filename}` does not exist. Creating it...")
+        logger.info("File `%s` does not exist. Creating it...", filename)
         # else create a workbook
         workbook = Workbook()
         # Use the active sheet as the new sheet
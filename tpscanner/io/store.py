@@ -0,0 +1,113 @@
+"""Module to store the offers found at each scan as JSON lines snapshots."""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from tpscanner.config import config
+
+
+def default_store_file() -> str:
+    """Return the path of the snapshot store set in the configuration.
+
+    Returns:
+        str: The path of the store file, relative to the output directory.
+
+    """
+    return os.path.join(config.output_dir, config.store_file or "snapshots.jsonl")
+
+
+class SnapshotStore:
+    """Append-only store of the offers found each time a product is scanned.
+
+    Each line of the file is a JSON object with the URL, the product name, the
+    quantity, the time of the scan and the list of offers. Appends are serialized,
+    so the store can be shared by several threads.
+
+    Attributes:
+        filename (str): The file where the snapshots are stored.
+        sync (bool): Whether each snapshot is flushed to disk as soon as it is appended.
+
+    """
+
+    sync: bool = False
+
+    def __init__(self, filename: Optional[str] = None):
+        """Initialize the store.
+
+        Arguments:
+            filename (str): The file where the snapshots are stored. If not
+                provided, it is taken from the configuration.
+
+        """
+        self.filename = filename or default_store_file()
+        self._lock = threading.Lock()
+
+    def append(
+        self,
+        url: str,
+        name: str,
+        quantity: int,
+        items: List[Dict],
+        timestamp: Optional[float] = None,
+    ) -> Dict:
+        """Append the snapshot of a scan.
+
+        Arguments:
+            url (str): The URL of the product.
+            name (str): The name of the product.
+            quantity (int): The quantity to buy.
+            items (list): The offers found.
+            timestamp (float): The time of the scan; the current time if not provided.
+
+        Returns:
+            dict: The stored snapshot.
+
+        """
+        snapshot = {
+            "url": url,
+            "name": name,
+            "quantity": quantity,
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "items": items,
+        }
+        line = json.dumps(snapshot) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+            with open(self.filename, "a") as f:
+                f.write(line)
+                if self.sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        return snapshot
+
+    def iter_snapshots(self, url: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate over the stored snapshots, oldest first.
+
+        Arguments:
+            url (str): Only return the snapshots of this URL, if provided.
+
+        Yields:
+            dict: The snapshots.
+
+        """
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                snapshot = json.loads(line)
+                if url is None or snapshot["url"] == url:
+                    yield snapshot
+
+    def latest(self) -> Dict[str, Dict]:
+        """Return the latest snapshot of each URL.
+
+        Returns:
+            dict: The latest snapshot, by URL.
+
+        """
+        return {snapshot["url"]: snapshot for snapshot in self.iter_snapshots()}
@@ -1,10 +1,9 @@
 """Logger class for logging messages with rich formatting."""
 
+import json
 import logging
 from enum import Enum
-from typing import ClassVar
-
-from rich.logging import RichHandler
+from typing import ClassVar, Optional
 
 
 class Format(Enum):
@@ -19,10 +18,102 @@ class Format(Enum):
     CRITICAL = ERROR
 
 
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "none": logging.CRITICAL + 1,
+}
+
+
+class MarkupFormatter(logging.Formatter):
+    """Formatter that wraps the message in the Rich markup of its `Format`.
+
+    The markup is added here rather than by the caller, so that it is only built
+    for records that are actually emitted to the console.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record, wrapping its message in the Rich markup.
+
+        Arguments:
+            record (LogRecord): The record to format.
+
+        Returns:
+            str: The formatted message.
+
+        """
+        message = super().format(record)
+        markup = getattr(record, "format_markup", None)
+        if markup:
+            return markup + message + "[/]"
+        return message
+
+
+class JsonLinesHandler(logging.Handler):
+    """Handler that writes each record as a JSON object on its own line.
+
+    The structured fields passed as keyword arguments to the `Logger` methods
+    (e.g., `url`, `product`, `phase`, `duration`) are written as top-level keys.
+    Records are buffered and written without any Rich formatting.
+    """
+
+    def __init__(self, filename: str, buffer_size: int = 1 << 16):
+        """Initialize the handler.
+
+        Arguments:
+            filename (str): The file to append the JSON lines to.
+            buffer_size (int): The size of the write buffer, in bytes.
+
+        """
+        super().__init__()
+        self.stream = open(filename, "a", buffering=buffer_size, encoding="utf-8")
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write the record as a JSON line.
+
+        Arguments:
+            record (LogRecord): The record to write.
+
+        """
+        try:
+            entry = {
+                "time": record.created,
+                "level": record.levelname.lower(),
+                "message": record.getMessage(),
+            }
+            entry.update(getattr(record, "fields", {}))
+            self.stream.write(json.dumps(entry, default=str) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Flush the write buffer."""
+        if self.stream and not self.stream.closed:
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        try:
+            self.flush()
+            self.stream.close()
+        finally:
+            super().close()
+
+
 class Logger(object):
-    """Singleton class for logging messages with rich formatting."""
+    """Singleton class for logging messages with rich formatting.
+
+    Messages are formatted lazily: positional arguments are interpolated with
+    `%`-style formatting only if the level is enabled, as in the standard `logging`
+    module. Keyword arguments are attached to the record as structured fields,
+    which are only written by the JSON lines sink.
+    """
 
     _instance: ClassVar = None
+    logger: logging.Logger
 
     def __new__(cls):
         """Create a new instance of the Logger class if it does not exist."""
@@ -31,94 +122,144 @@ class Logger(object):
             cls._instance.logger = logging.getLogger("rich")
         return cls._instance
 
-    def start(self, message: str) -> None:
+    def _log(self, level: int, fmt: Format, message: str, args, fields) -> None:
+        logger = self.logger
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
+                message,
+                *args,
+                extra={"format_markup": fmt.value, "fields": fields},
+                stacklevel=3,
+            )
+
+    def is_enabled(self, level: str) -> bool:
+        """Check whether messages of the given level would be logged.
+
+        Use it to skip computing expensive log arguments.
+
+        Arguments:
+            level (str): The logging level (debug, info, warning, error, critical).
+
+        Returns:
+            bool: True if the level is enabled.
+
+        """
+        return self.logger.isEnabledFor(LEVELS[level])
+
+    def start(self, message: str, *args, **fields) -> None:
         """Log the start of a process.
 
         Arguments:
             message (str): The message to be logged.
+            *args: The arguments to be merged into the message.
+            **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.info(Format.START.value + message + "[/]")
+        self._log(logging.INFO, Format.START, message, args, fields)
 
-    def end(self, message: str) -> None:
+    def end(self, message: str, *args, **fields) -> None:
         """Log the end of a process.
 
         Arguments:
         message (str): The message to be logged.
+        *args: The arguments to be merged into the message.
+        **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.info(Format.END.value + message + "[/]")
+        self._log(logging.INFO, Format.END, message, args, fields)
 
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args, **fields) -> None:
         """Log a debug message.
 
         Arguments:
         message (str): The message to be logged.
+        *args: The arguments to be merged into the message.
+        **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.debug(Format.DEBUG.value + message + "[/]")
+        self._log(logging.DEBUG, Format.DEBUG, message, args, fields)
 
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args, **fields) -> None:
         """Log an info message.
 
         Arguments:
         message (str): The message to be logged.
+        *args: The arguments to be merged into the message.
+        **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.info(Format.INFO.value + message + "[/]")
+        self._log(logging.INFO, Format.INFO, message, args, fields)
 
-    def warn(self, message: str) -> None:
+    def warn(self, message: str, *args, **fields) -> None:
         """Log a warning message.
 
         Arguments:
         message (str): The message to be logged.
+        *args: The arguments to be merged into the message.
+        **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.warning(Format.WARN.value + message + "[/]")
+        self._log(logging.WARNING, Format.WARN, message, args, fields)
 
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args, **fields) -> None:
         """Log an error message.
 
         Arguments:
         message (str): The message to be logged.
+        *args: The arguments to be merged into the message.
+        **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.error(Format.ERROR.value + message + "[/]")
+        self._log(logging.ERROR, Format.ERROR, message, args, fields)
 
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, *args, **fields) -> None:
         """Log a critical message.
 
         Arguments:
         message (str): The message to be logged.
+        *args: The arguments to be merged into the message.
+        **fields: The structured fields to attach to the record.
 
         """
-        self._instance.logger.critical(Format.CRITICAL.value + message + "[/]")
+        self._log(logging.CRITICAL, Format.CRITICAL, message, args, fields)
 
     @staticmethod
-    def set_log_level(level: int) -> None:
+    def set_log_level(
+        level: str, json_file: Optional[str] = None, json_level: str = "info"
+    ) -> None:
         """Set the logging level for the logger.
 
+        The JSON lines handler of a previous call, if any, is replaced.
+
         Arguments:
-            level (int): The logging level.
+            level (str): The logging level for the console.
+            json_file (str): The file where records are also written as JSON lines,
+                if any.
+            json_level (str): The logging level for the JSON lines file.
 
         """
-        if level == "debug":
-            level = logging.DEBUG
-        elif level == "info":
-            level = logging.INFO
-        elif level == "warning":
-            level = logging.WARNING
-        elif level == "error":
-            level = logging.ERROR
-        elif level == "critical":
-            level = logging.CRITICAL
-        elif level == "none":
-            level = logging.CRITICAL + 1
-        else:
-            level = logging.WARNING
+        console_level = LEVELS.get(level, logging.WARNING)
 
+        from rich.logging import RichHandler
+
+        rich_handler = RichHandler(rich_tracebacks=True, markup=True)
+        rich_handler.setLevel(console_level)
+        rich_handler.setFormatter(MarkupFormatter("%(message)s"))
         logging.basicConfig(
-            level=level,
+            level=console_level,
             format="%(message)s",
-            handlers=[RichHandler(rich_tracebacks=True, markup=True)],
+            handlers=[rich_handler],
         )
+
+        tps_logger = logging.getLogger("rich")
+        for handler in tps_logger.handlers[:]:
+            if isinstance(handler, JsonLinesHandler):
+                tps_logger.removeHandler(handler)
+                handler.close()
+        if json_file:
+            json_levelno = LEVELS.get(json_level, logging.INFO)
+            json_handler = JsonLinesHandler(json_file)
+            json_handler.setLevel(json_levelno)
+            tps_logger.addHandler(json_handler)
+            tps_logger.setLevel(min(console_level, json_levelno))
@@ -0,0 +1,5 @@
+"""This module is used to initialize the metrics collector."""
+
+from .metrics import Metrics
+
+metrics = Metrics()
@@ -0,0 +1,227 @@
+"""Metrics class for timing the phases of a run and counting the resources it uses."""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import ClassVar, Dict, Optional
+
+# counters that are always reported, even when they are never incremented
+COUNTERS = [
+    "pages",
+    "offers",
+    "retries",
+    "errors",
+    "driver_restarts",
+    "circuit_breaks",
+    "page_source_bytes",
+    "transfer_bytes",
+    "bytes_saved",
+    "ms_saved",
+    "sleep_seconds",
+]
+
+# maximum number of URLs broken down in the report, so that long-running
+# processes (the daemon, the API server) do not grow the metrics without bound
+MAX_URLS = 10_000
+
+
+class Metrics(object):
+    """Singleton class for collecting per-phase timings and per-run counters.
+
+    Spans are not kept: their durations are aggregated as they are recorded, by
+    phase and by URL, so that the memory used does not grow with the run.
+
+    Attributes:
+        counters (dict): The per-run counters.
+        started (float): The wall clock time when the run started.
+
+    """
+
+    _instance: ClassVar = None
+    counters: Dict[str, float] = {}
+    started: float = 0.0
+    _lock: threading.Lock
+    _phases: Dict[str, Dict]
+    _urls: Dict[str, Dict[str, float]]
+
+    def __new__(cls):
+        """Create a new instance of the Metrics class if it does not exist."""
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance.reset()
+        return cls._instance
+
+    def reset(self) -> None:
+        """Discard all the timings and counters and start a new run."""
+        with self._lock:
+            self.counters = defaultdict(float, {name: 0 for name in COUNTERS})
+            self._phases = {}
+            self._urls = {}
+            self.started = time.time()
+
+    @contextmanager
+    def span(self, phase: str, **labels):
+        """Time the enclosed block as a phase of the run.
+
+        The span is recorded even if the block raises, as an error of its phase.
+
+        Arguments:
+            phase (str): The name of the phase (e.g., `navigate`, `parse`).
+            **labels: The labels to attach to the span (e.g., `url`); only the
+                `url` is used, to break down the timings by URL.
+
+        """
+        error = False
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(phase, time.perf_counter() - start, error, labels.get("url"))
+
+    def record(
+        self,
+        phase: str,
+        duration: float,
+        error: bool = False,
+        url: Optional[str] = None,
+    ) -> None:
+        """Record a phase timed elsewhere, e.g. in another process.
+
+        Arguments:
+            phase (str): The name of the phase.
+            duration (float): The number of seconds spent in the phase.
+            error (bool): Whether the phase failed.
+            url (str): The URL the phase was run for, if any.
+
+        """
+        with self._lock:
+            stats = self._phases.setdefault(
+                phase, {"count": 0, "total": 0.0, "max": 0.0, "errors": 0}
+            )
+            stats["count"] += 1
+            stats["total"] += duration
+            stats["max"] = max(stats["max"], duration)
+            stats["errors"] += error
+            if url is not None and (url in self._urls or len(self._urls) < MAX_URLS):
+                url_phases = self._urls.setdefault(url, {})
+                url_phases[phase] = url_phases.get(phase, 0.0) + duration
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter.
+
+        Arguments:
+            name (str): The name of the counter.
+            value (float): The amount to add.
+
+        """
+        with self._lock:
+            self.counters[name] += value
+
+    def phases(self) -> Dict[str, Dict]:
+        """Get the timings of each phase.
+
+        Returns:
+            dict: The count, total and max duration and errors of each phase.
+
+        """
+        with self._lock:
+            return {phase: dict(stats) for phase, stats in self._phases.items()}
+
+    def urls(self) -> Dict[str, Dict]:
+        """Get the timings of each URL, for the first `MAX_URLS` URLs.
+
+        Returns:
+            dict: The total duration of each phase, for each scanned URL.
+
+        """
+        with self._lock:
+            return {url: dict(phases) for url, phases in self._urls.items()}
+
+    def snapshot(self) -> Dict[str, float]:
+        """Get a copy of the counters.
+
+        Returns:
+            dict: The current value of each counter.
+
+        """
+        with self._lock:
+            return dict(self.counters)
+
+    def report(self) -> Dict:
+        """Build the run report.
+
+        Returns:
+            dict: The run report, with counters, per-phase and per-URL timings.
+
+        """
+        finished = time.time()
+        return {
+            "started": self.started,
+            "finished": finished,
+            "duration": finished - self.started,
+            "counters": self.snapshot(),
+            "phases": self.phases(),
+            "urls": self.urls(),
+        }
+
+    def save_report(self, filename: str) -> None:
+        """Save the run report as a JSON file.
+
+        Arguments:
+            filename (str): The name of the JSON file.
+
+        """
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def save_prometheus(self, filename: str) -> None:
+        """Save the run metrics in the Prometheus text format.
+
+        The file is written atomically, so that it can be picked up by the
+        textfile collector of the node exporter at any time.
+
+        Arguments:
+            filename (str): The name of the `.prom` file.
+
+        """
+        report = self.report()
+        lines = [
+            "# HELP tpscanner_run_duration_seconds Duration of the last run.",
+            "# TYPE tpscanner_run_duration_seconds gauge",
+            f"tpscanner_run_duration_seconds {report['duration']:.6f}",
+            "# HELP tpscanner_run_finished_timestamp_seconds End time of the last run.",
+            "# TYPE tpscanner_run_finished_timestamp_seconds gauge",
+            f"tpscanner_run_finished_timestamp_seconds {report['finished']:.3f}",
+        ]
+        # the counters are reset at each run, so they are exported as gauges
+        for name, value in sorted(report["counters"].items()):
+            lines += [
+                f"# HELP tpscanner_{name} Value of the {name} counter in the last run.",
+                f"# TYPE tpscanner_{name} gauge",
+                f"tpscanner_{name} {value}",
+            ]
+        lines += [
+            "# HELP tpscanner_phase_seconds Time spent in each phase in the last run.",
+            "# TYPE tpscanner_phase_seconds gauge",
+        ]
+        for phase, stats in sorted(report["phases"].items()):
+            lines.append(
+                f'tpscanner_phase_seconds{{phase="{phase}"}} {stats["total"]:.6f}'
+            )
+        lines += [
+            "# HELP tpscanner_phase_count Number of times each phase ran in the last run.",
+            "# TYPE tpscanner_phase_count gauge",
+        ]
+        for phase, stats in sorted(report["phases"].items()):
+            lines.append(f'tpscanner_phase_count{{phase="{phase}"}} {stats["count"]}')
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_filename, filename)
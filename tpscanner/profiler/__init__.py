@@ -0,0 +1,5 @@
+"""This module is used to initialize the profiler."""
+
+from .profiler import Profiler
+
+profiler = Profiler()
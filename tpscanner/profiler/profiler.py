@@ -0,0 +1,229 @@
+"""Profiler class for recording CPU and memory profiles of the phases of a run."""
+
+import io
+import os
+from contextlib import contextmanager
+from typing import ClassVar, Dict, List, Optional
+
+# phases of a run that can be profiled separately
+PHASES = ["scan", "parse", "compute", "export"]
+
+
+class _RemoteProfile(object):
+    # the CPU profile of a phase run in another process, as read by `pstats`,
+    # which adds the other profiles to the statistics it is given
+    def __init__(self, stats: Dict):
+        self._stats = stats
+        self.stats: Dict = {}
+
+    def create_stats(self) -> None:
+        self.stats = dict(self._stats)
+
+
+class Profiler(object):
+    """Singleton class for profiling the CPU time and the memory allocations of each phase.
+
+    Profiling is disabled by default, in which case `phase()` does nothing. Once
+    enabled, each phase gets its own `cProfile` profile, which accumulates over
+    all the times the phase is entered, and its own memory statistics: the net
+    and peak size allocated while in the phase, which are cheap to read each
+    time, and the allocations by source line, computed as the difference between
+    the `tracemalloc` snapshots taken when the phase is entered and exited.
+    Snapshots are expensive for phases entered once per URL, so they are only
+    taken the first time a phase is entered and then every `snapshot_every` times.
+
+    Attributes:
+        enabled (bool): Whether profiling is enabled.
+        snapshot_every (int): How often the allocations by source line are sampled.
+        profiles (dict): The CPU profile of each phase.
+        remote_profiles (dict): The CPU profiles of each phase run in other
+            processes, e.g. by the parse pool.
+        memory (dict): The entries, sampled entries, net and peak size of each phase.
+        allocations (dict): The allocated size and count by source line, for each phase.
+        snapshots (dict): The last allocation snapshot taken at the end of each phase.
+
+    """
+
+    _instance: ClassVar = None
+    enabled: bool = False
+    snapshot_every: int = 10
+    profiles: Dict = {}
+    remote_profiles: Dict[str, List] = {}
+    memory: Dict[str, Dict] = {}
+    allocations: Dict[str, Dict] = {}
+    snapshots: Dict = {}
+    _active: Optional[str] = None
+
+    def __new__(cls):
+        """Create a new instance of the Profiler class if it does not exist."""
+        if cls._instance is None:
+            cls._instance = super(Profiler, cls).__new__(cls)
+            cls._instance.enabled = False
+            cls._instance.reset()
+        return cls._instance
+
+    def reset(self) -> None:
+        """Discard the profiles and the memory statistics of all the phases."""
+        self._active = None
+        self.profiles = {}
+        self.remote_profiles = {}
+        self.memory = {}
+        self.allocations = {}
+        self.snapshots = {}
+
+    def enable(self) -> None:
+        """Enable profiling and start tracing memory allocations."""
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Disable profiling and stop tracing memory allocations."""
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.enabled = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Profile the enclosed block as part of a phase.
+
+        Phases cannot be nested, because only one CPU profiler can be active at a
+        time; a phase entered while another is active is not profiled separately.
+
+        Arguments:
+            name (str): The name of the phase (scan, parse, compute, export).
+
+        """
+        if not self.enabled or self._active:
+            yield
+            return
+
+        import cProfile
+        import tracemalloc
+
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        memory = self.memory.setdefault(
+            name, {"entries": 0, "sampled": 0, "net": 0, "peak": 0}
+        )
+        sampled = memory["entries"] % self.snapshot_every == 0
+        memory["entries"] += 1
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        before = tracemalloc.take_snapshot().filter_traces(filters) if sampled else None
+        tracemalloc.reset_peak()
+        size, _ = tracemalloc.get_traced_memory()
+        self._active = name
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = None
+            current, peak = tracemalloc.get_traced_memory()
+            memory["net"] += current - size
+            memory["peak"] = max(memory["peak"], peak - size)
+            if before is not None:
+                memory["sampled"] += 1
+                after = tracemalloc.take_snapshot().filter_traces(filters)
+                self.snapshots[name] = after
+                allocations = self.allocations.setdefault(name, {})
+                for stat in after.compare_to(before, "lineno"):
+                    frame = stat.traceback[0]
+                    key = f"{frame.filename}:{frame.lineno}"
+                    size_diff, count = allocations.get(key, (0, 0))
+                    allocations[key] = (
+                        size_diff + stat.size_diff,
+                        count + stat.count_diff,
+                    )
+
+    def add_stats(self, name: str, stats: Dict) -> None:
+        """Add the CPU profile of a phase run in another process.
+
+        Arguments:
+            name (str): The name of the phase.
+            stats (dict): The statistics of the profile, as in `cProfile.Profile.stats`
+                after `create_stats()`.
+
+        """
+        self.remote_profiles.setdefault(name, []).append(_RemoteProfile(stats))
+
+    def _stats(self, name: str, stream=None):
+        import pstats
+
+        profiles = list(self.remote_profiles.get(name, []))
+        if name in self.profiles:
+            profiles.insert(0, self.profiles[name])
+        return pstats.Stats(*profiles, stream=stream)
+
+    def save(self, directory: str, suffix: str) -> list:
+        """Save the CPU profiles and the allocation snapshots of each phase.
+
+        CPU profiles are saved in the `pstats` format (`profile_<phase>_<suffix>.prof`),
+        which can be loaded with `pstats` or tools like snakeviz, and allocation
+        snapshots with `tracemalloc.Snapshot.dump()` (`memory_<phase>_<suffix>.snapshot`).
+
+        Arguments:
+            directory (str): The directory where to save the files.
+            suffix (str): The suffix added to the file names.
+
+        Returns:
+            list: The names of the saved files.
+
+        """
+        os.makedirs(directory, exist_ok=True)
+        filenames = []
+        for name in {**self.profiles, **self.remote_profiles}:
+            filename = os.path.join(directory, f"profile_{name}_{suffix}.prof")
+            self._stats(name).dump_stats(filename)
+            filenames.append(filename)
+        for name, snapshot in self.snapshots.items():
+            filename = os.path.join(directory, f"memory_{name}_{suffix}.snapshot")
+            snapshot.dump(filename)
+            filenames.append(filename)
+        return filenames
+
+    def summary(self, top: int = 10, phase: Optional[str] = None) -> str:
+        """Summarize the top CPU and memory hot spots of each phase.
+
+        Arguments:
+            top (int): The number of entries to show for each phase.
+            phase (str): The phase to summarize; all phases if not provided.
+
+        Returns:
+            str: The summary.
+
+        """
+        import pstats
+
+        output = io.StringIO()
+        profiled = {**self.profiles, **self.remote_profiles}
+        names = [phase] if phase else [p for p in PHASES if p in profiled]
+        for name in names:
+            output.write(
+                f"\n=== Phase `{name}`: top {top} functions by cumulative time\n"
+            )
+            stats = self._stats(name, stream=output)
+            stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+            memory = self.memory.get(name, {})
+            output.write(
+                f"=== Phase `{name}`: {memory.get('net', 0) / 1024:.1f} KiB net, "
+                f"{memory.get('peak', 0) / 1024:.1f} KiB peak over "
+                f"{memory.get('entries', 0)} entries\n"
+                f"=== Phase `{name}`: top {top} allocations by size, sampled on "
+                f"{memory.get('sampled', 0)} entries\n"
+            )
+            allocations = sorted(
+                self.allocations.get(name, {}).items(),
+                key=lambda x: x[1][0],
+                reverse=True,
+            )
+            for location, (size, count) in allocations[:top]:
+                output.write(f"{size / 1024:12.1f} KiB {count:9d} blocks  {location}\n")
+        return output.getvalue()
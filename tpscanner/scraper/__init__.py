@@ -1 +1,12 @@
-from .scraper import Scraper  # noqa F401
+"""Scraper of TPScanner and the fetchers downloading the pages without a browser."""
+
+from .fetchers import (
+    CacheFetcher,  # noqa F401
+    FakeFetcher,  # noqa F401
+    HttpFetcher,  # noqa F401
+    create_fetcher,  # noqa F401
+    fetcher_kind,  # noqa F401
+)
+from .replay import ReplayScraper  # noqa F401
+from .resilience import CircuitBreaker, Resilience, RetryPolicy  # noqa F401
+from .scraper import Fetcher, OfferParser, Scraper  # noqa F401
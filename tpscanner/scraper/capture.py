@@ -0,0 +1,189 @@
+"""Capture of the offers from the browser without serializing the whole page."""
+
+import json
+from typing import Dict, List, Optional
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+
+# what is read from the browser: the whole page, only the heading and listing
+# markup, or only the fields of the offers as JSON
+CAPTURE_MODES = ["page", "listing", "rows"]
+# classes of the price block of the offers, with shipping costs apart or included
+PRICE_CLASS = "item_price "
+PRICE_CLASS_SHIPPING_INCLUDED = "item_price total_price_sorting"
+# script returning the markup of the product heading and of the offers, wrapped
+# in a document, or null if the page has no listing
+LISTING_SCRIPT = """
+const listing = document.getElementById('listing');
+if (!listing) {
+    return null;
+}
+const headings = document.querySelectorAll(
+    'div[class="name_and_rating"], div[class="search_results_heading"]'
+);
+return '<html><body>'
+    + Array.from(headings, (h) => h.outerHTML).join('')
+    + listing.outerHTML
+    + '</body></html>';
+"""
+# script returning the raw fields of the offers, read with the same paths as the
+# XPath queries of the Scraper, or null if the page has no listing
+ROWS_SCRIPT = """
+const [priceClass, shippingIncluded, limit] = arguments;
+const listing = document.getElementById('listing');
+if (!listing) {
+    return null;
+}
+// the text before the first child element, as lxml's `element.text`
+const text = (el) => {
+    if (!el) {
+        return null;
+    }
+    let value = null;
+    for (const node of el.childNodes) {
+        if (node.nodeType !== Node.TEXT_NODE) {
+            break;
+        }
+        value = (value || '') + node.data;
+    }
+    return value;
+};
+const attr = (el, name) => (el ? el.getAttribute(name) : null);
+const headingSelector = shippingIncluded
+    ? 'div[class="name_and_rating"] > h1'
+    : 'div[class="name_and_rating"] > h1, div[class="search_results_heading"] > h1';
+const nameParts = [];
+for (const h1 of document.querySelectorAll(headingSelector)) {
+    const full = h1.parentElement.getAttribute('class') === 'name_and_rating';
+    for (const node of h1.childNodes) {
+        if (full && node.nodeType === Node.TEXT_NODE && node.data.trim()) {
+            nameParts.push(node.data);
+        } else if (node.nodeName === 'STRONG') {
+            for (const child of node.childNodes) {
+                if (child.nodeType === Node.TEXT_NODE) {
+                    nameParts.push(child.data);
+                }
+            }
+        }
+    }
+}
+const merchant = ':scope > div[class="item_info"] > div[class="item_merchant"]';
+const reviews = merchant + ' > div[class="wrap_merchant_reviews"]';
+const price = ':scope > div[class="' + priceClass + '"]';
+const rows = [];
+for (const li of listing.querySelectorAll(':scope > ul > li')) {
+    if (limit && rows.length >= limit) {
+        break;
+    }
+    const q = (selector) => li.querySelector(selector);
+    rows.push({
+        merchant: text(q(merchant + ' > div > a > span')),
+        merchant_link: attr(q(merchant + ' > div > a[href]'), 'href'),
+        merchant_reviews: text(q(reviews + ' > a[class="merchant_reviews"]')),
+        merchant_reviews_link: attr(q(reviews + ' > a[href]'), 'href'),
+        merchant_rating: attr(
+            q(reviews + ' > a[class^="merchant_reviews rating_image"]'), 'class'
+        ),
+        price: text(q(price + ' > div[class="item_basic_price"]')),
+        delivery_price: shippingIncluded
+            ? null
+            : text(q(price + ' > div[class="item_delivery_price "]')),
+        free_delivery: text(
+            q(price + ' > div[class="free_shipping_threshold"] > span > span > span')
+        ),
+        availability: attr(q(price + ' > div[class="item_availability"] > span[class]'), 'class'),
+        offer_link: attr(q(':scope > div[class="item_actions"] > a[href]'), 'href'),
+    });
+}
+return {name_parts: nameParts, rows: rows};
+"""
+
+
+def capture_mode(record: bool = False) -> str:
+    """Return the capture mode set in the configuration.
+
+    Recorded pages must be markup to be replayed, so when recording the `rows`
+    mode falls back to `listing`.
+
+    Arguments:
+        record (bool): Whether the captured pages are recorded.
+
+    Returns:
+        str: One of `page`, `listing` or `rows`.
+
+    Raises:
+        ValueError: If the configured mode is not valid.
+
+    """
+    mode = config.capture_mode or "page"
+    if mode not in CAPTURE_MODES:
+        raise ValueError(
+            f"Invalid capture mode `{mode}`, expected one of {', '.join(CAPTURE_MODES)}."
+        )
+    if record and mode == "rows":
+        logger.info("Capturing the listing markup, so that pages can be recorded.")
+        return "listing"
+    return mode
+
+
+def capture_listing(driver) -> Optional[str]:
+    """Return the markup of the product heading and of the offers of the current page.
+
+    Arguments:
+        driver (WebDriver): The browser.
+
+    Returns:
+        str: A document with only the heading and the listing, which the XPath
+            queries of the Scraper read as the whole page; None if the page has
+            no listing, e.g. when blocked.
+
+    """
+    return driver.execute_script(LISTING_SCRIPT)
+
+
+def capture_rows(
+    driver, shipping_included: bool = False, limit: int = 0
+) -> Optional[Dict]:
+    """Return the raw fields of the offers of the current page.
+
+    Arguments:
+        driver (WebDriver): The browser.
+        shipping_included (bool): Whether the prices include the shipping costs.
+        limit (int): The maximum number of offers to read; 0 to read all of them.
+
+    Returns:
+        dict: The parts of the product name (`name_parts`) and the raw fields of
+            each offer (`rows`), as strings; None if the page has no listing.
+
+    """
+    price_class = PRICE_CLASS_SHIPPING_INCLUDED if shipping_included else PRICE_CLASS
+    return driver.execute_script(ROWS_SCRIPT, price_class, shipping_included, limit)
+
+
+def captured_size(content) -> int:
+    """Return the size in bytes of captured content, as transferred by the driver.
+
+    Arguments:
+        content (str | dict): The page markup or the captured rows.
+
+    Returns:
+        int: The number of bytes.
+
+    """
+    if not isinstance(content, str):
+        content = json.dumps(content)
+    return len(content.encode("utf-8"))
+
+
+def product_name(name_parts: List[str]) -> str:
+    """Join the parts of the product name, as read by the XPath queries.
+
+    Arguments:
+        name_parts (list): The text of the heading, in document order.
+
+    Returns:
+        str: The name of the product.
+
+    """
+    return " ".join(part.strip() for part in name_parts)
@@ -0,0 +1,155 @@
+"""Conversion of the raw fields of the offers, a whole listing at a time."""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the columns are then computed in Python
+    np = None
+
+# prefix of the relative links of the website
+SITE_URL = "https://www.trovaprezzi.it"
+# numbers as shown on the website, e.g. `12,34`
+NUMBER_PATTERN = re.compile(r"\b\d+[,.]?\d*\b")
+# number of offers from which the price columns are computed with numpy
+NUMPY_MIN_ROWS = 256
+
+
+@lru_cache(maxsize=4096)
+def site_url(path: str) -> str:
+    """Return the absolute URL of a link of the website.
+
+    Links of the sellers repeat across the offers and the products, so they are
+    cached.
+
+    Arguments:
+        path (str): The relative link.
+
+    Returns:
+        str: The absolute URL.
+
+    """
+    return SITE_URL + path
+
+
+def parse_number(text: str) -> str:
+    """Return the first number in a text, as shown on the website.
+
+    Arguments:
+        text (str): The text, e.g. `+ Sped. 4,90 €`.
+
+    Returns:
+        str: The number, e.g. `4,90`.
+
+    Raises:
+        AttributeError: If the text contains no number.
+
+    """
+    match = NUMBER_PATTERN.search(text)
+    if match is None:
+        raise AttributeError(f"No number in `{text}`.")
+    return match.group()
+
+
+def parse_rating(rating_class: str) -> float:
+    """Return the rating of a seller from the class of its rating image.
+
+    Arguments:
+        rating_class (str): The class, e.g. `merchant_reviews rating_image rate45`.
+
+    Returns:
+        float: The rating, from 1 to 5 stars.
+
+    """
+    return int(rating_class.split(" ")[2].replace("rate", "")) / 10.0
+
+
+def _decimal(text: str) -> float:
+    return float(parse_number(text).replace(",", "."))
+
+
+def _totals(
+    prices: List[float],
+    quantity: int,
+    delivery_prices: List[float],
+    thresholds: List[Optional[float]],
+) -> tuple:
+    if np is not None and len(prices) >= NUMPY_MIN_ROWS:
+        total = np.asarray(prices, dtype=np.float64) * quantity
+        has_threshold = np.asarray([t is not None for t in thresholds])
+        threshold = np.asarray(
+            [np.nan if t is None else t for t in thresholds], dtype=np.float64
+        )
+        with np.errstate(invalid="ignore"):
+            free = has_threshold & (total >= threshold)
+        plus_delivery = np.where(
+            free, total, total + np.asarray(delivery_prices, dtype=np.float64)
+        )
+        return total.tolist(), plus_delivery.tolist()
+    totals = [price * quantity for price in prices]
+    return totals, [
+        total if threshold is not None and total >= threshold else total + delivery
+        for total, delivery, threshold in zip(totals, delivery_prices, thresholds)
+    ]
+
+
+def convert_rows(rows: List[Dict], quantity: int) -> List[Dict]:
+    """Convert the raw fields of the offers of a listing to the appropriate types.
+
+    The fields are converted column by column, and the total prices are computed
+    with numpy when it is installed and the listing is large enough. The offers
+    are the same as converted one at a time by the former
+    `Scraper._convert_data_types()`, kept as a reference in the benchmarks.
+
+    Arguments:
+        rows (list): The raw fields of each offer, as read from the page: merchant,
+            merchant_link, merchant_reviews, merchant_reviews_link, merchant_rating,
+            price, delivery_price, free_delivery, availability and offer_link.
+        quantity (int): The quantity of items to buy.
+
+    Returns:
+        list: The offers, as dicts with the converted fields.
+
+    """
+    reviews = [
+        int(parse_number(row["merchant_reviews"]).replace(".", "")) for row in rows
+    ]
+    ratings = [
+        parse_rating(row["merchant_rating"])
+        if row["merchant_rating"]
+        else row["merchant_rating"]
+        for row in rows
+    ]
+    prices = [_decimal(row["price"]) for row in rows]
+    delivery_prices = [
+        _decimal(row["delivery_price"]) if row["delivery_price"] else 0.0
+        for row in rows
+    ]
+    thresholds = [
+        _decimal(row["free_delivery"]) if row["free_delivery"] else None for row in rows
+    ]
+    totals, totals_plus_delivery = _totals(
+        prices, quantity, delivery_prices, thresholds
+    )
+    return [
+        {
+            "seller": row["merchant"],
+            "seller_link": site_url(row["merchant_link"]),
+            "seller_reviews": reviews[i],
+            "seller_reviews_link": site_url(row["merchant_reviews_link"]),
+            "seller_rating": ratings[i],
+            "price": prices[i],
+            "quantity": quantity,
+            "delivery_price": delivery_prices[i],
+            "total_price": totals[i],
+            "free_delivery": row["free_delivery"]
+            if thresholds[i] is None
+            else thresholds[i],
+            "total_price_plus_delivery": totals_plus_delivery[i],
+            "availability": row["availability"] == "available",
+            "link": SITE_URL + row["offer_link"],
+        }
+        for i, row in enumerate(rows)
+    ]
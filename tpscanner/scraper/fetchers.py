@@ -0,0 +1,423 @@
+"""Fetchers downloading the pages of the products without a browser, and their factory."""
+
+import hashlib
+import itertools
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, ClassVar, Optional
+
+from lxml import html
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+from tpscanner.utils import RateLimiter
+
+from .listings import generate_listing_html
+from .pagination import fetch_offers_pages, page_url_builder
+from .replay import ReplayScraper
+from .resilience import BlockedError, is_blocked
+from .scraper import (
+    Fetcher,
+    OfferParser,
+    Scraper,
+    more_page_filename,
+    page_filenames,
+    save_pages,
+)
+
+# kinds of fetchers: a browser driven by Selenium, plain HTTP requests, the pages
+# recorded with `--record`, or synthetic pages for load tests
+FETCHERS = ["browser", "http", "replay", "fake"]
+# fetchers that do not load the website, and thus need no pause between URLs
+OFFLINE_FETCHERS = {"replay", "fake"}
+# HTTP status codes returned by the website when it blocks the requests
+BLOCK_STATUSES = {403, 429}
+# XPath of the link showing more offers at the bottom of the listing
+MORE_OFFERS_XPATH = (
+    '//a[contains(concat(" ", normalize-space(@class), " "), " more_offers ")]/@href'
+)
+# User-Agent of the HTTP requests when none is set in the configuration
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+class TimeoutException(Exception):
+    """Raised when a page takes too long to download.
+
+    It is named after the exception of Selenium, so that `classify_error()`
+    retries it as a timeout.
+    """
+
+
+def fetcher_kind(kind: Optional[str] = None, replay_dir: Optional[str] = None) -> str:
+    """Return the kind of fetcher to use.
+
+    Arguments:
+        kind (str): The kind of fetcher; `fetcher` from the configuration if not
+            provided, and `browser` if not set.
+        replay_dir (str): The directory of the recorded pages, if any: recorded
+            pages are replayed, unless the fake fetcher serves them.
+
+    Returns:
+        str: One of `browser`, `http`, `replay` or `fake`.
+
+    Raises:
+        ValueError: If the kind of fetcher is not valid.
+
+    """
+    kind = kind or config.fetcher or "browser"
+    if kind not in FETCHERS:
+        raise ValueError(
+            f"Invalid fetcher `{kind}`, expected one of {', '.join(FETCHERS)}."
+        )
+    if replay_dir and kind != "fake":
+        return "replay"
+    return kind
+
+
+class HttpFetcher(Fetcher):
+    """Fetcher downloading the listing of each product with a plain HTTP request.
+
+    It needs neither a browser nor a display, but cannot sort the offers shipping
+    included: the second page is left empty, and the best offer shipping included
+    is found among the offers of the listing. Pages showing a captcha, or answered
+    with 403 or 429, raise a `BlockedError`.
+
+    Attributes:
+        timeout (float): The number of seconds to wait for each page.
+        headers (dict): The HTTP headers of the requests.
+
+    """
+
+    def __init__(
+        self,
+        wait: int,
+        headless: bool,
+        record_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Initialize the fetcher.
+
+        Arguments:
+            wait (int): Unused, kept for compatibility with the Scraper class.
+            headless (bool): Unused, kept for compatibility with the Scraper class.
+            record_dir (str): The directory where to save the downloaded pages.
+            timeout (float): The number of seconds to wait for each page;
+                `fetch_timeout` from the configuration if not provided.
+
+        """
+        self.record_dir = record_dir
+        self.parser = OfferParser()
+        self.timeout = float(timeout or config.fetch_timeout or 30)
+        self.headers = {
+            "User-Agent": random.choice(config.user_agents or [DEFAULT_USER_AGENT]),  # noqa S311
+            "Accept-Language": "it-IT,it;q=0.9",
+        }
+        self.full_offers = bool(config.full_offers)
+        self.page_workers = int(config.offers_page_workers or 4)
+        self.paging_limiter = RateLimiter(
+            config.offers_requests_per_minute or 30, burst=self.page_workers
+        )
+
+    def download_html(self, url: str, quantity: int = 1) -> tuple:
+        """Download the listing of the specified URL.
+
+        Arguments:
+            url (str): The URL to download the listing of.
+            quantity (int): The quantity to buy, used to stop loading more offers
+                once the best ones are found.
+
+        Returns:
+            tuple: A tuple containing the HTML content of the page with prices plus
+                shipping costs, an empty page with prices shipping included and the
+                further offers pages downloaded, if any.
+
+        Raises:
+            BlockedError: If the website blocked the request.
+            TimeoutException: If the page did not download in time.
+
+        """
+        request = urllib.request.Request(url, headers=self.headers)  # noqa S310
+        with metrics.span("navigate", url=url):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:  # noqa S310
+                    data = response.read()
+            except urllib.error.HTTPError as e:
+                if e.code in BLOCK_STATUSES:
+                    raise BlockedError(f"Blocked while loading {url}: {e}") from e
+                raise
+            except urllib.error.URLError as e:
+                if isinstance(e.reason, TimeoutError):
+                    raise TimeoutException(f"Timed out loading {url}") from e
+                raise
+            except TimeoutError as e:
+                raise TimeoutException(f"Timed out loading {url}") from e
+        page = data.decode("utf-8", errors="replace")
+        metrics.incr("pages")
+        metrics.incr("page_source_bytes", len(data))
+        metrics.incr("transfer_bytes", len(data))
+        if is_blocked(page):
+            raise BlockedError(f"Blocked while loading {url}")
+        more_pages = (
+            self._load_more_pages(url, quantity, page) if self.full_offers else []
+        )
+        if self.record_dir:
+            save_pages(self.record_dir, url, page, "", *more_pages)
+        return page, "", *more_pages
+
+    def _load_more_pages(self, url: str, quantity: int, page: str) -> list:
+        links = html.fromstring(page).xpath(MORE_OFFERS_XPATH)
+        page_url = page_url_builder(links[0] if links else None, url)
+        if page_url is None:
+            return []
+        with metrics.span("paging", url=url):
+            return fetch_offers_pages(
+                self.parser,
+                url,
+                quantity,
+                self.parser.extract_prices_plus_shipping(page, quantity)[1],
+                dict(self.headers, Referer=url),
+                page_url,
+                int(config.offers_top_k or 1),
+                int(config.offers_max_pages or 20),
+                self.page_workers,
+                self.paging_limiter,
+            )
+
+
+class CacheFetcher(ReplayScraper):
+    """Fetcher serving the pages downloaded less than `ttl` seconds ago from disk.
+
+    The pages are kept in the format of `--record`. Once they are older than
+    `ttl`, they are downloaded again by the wrapped fetcher, which records them;
+    the wrapped fetcher, e.g. its browser, is only created when a page is missing
+    from the cache.
+
+    Attributes:
+        factory (Callable): The function creating the wrapped fetcher.
+        fetcher (Fetcher): The wrapped fetcher, None until a page is downloaded.
+        ttl (float): The number of seconds the pages are served from the cache.
+
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Fetcher],
+        cache_dir: str,
+        ttl: Optional[float] = None,
+    ):
+        """Initialize the cache.
+
+        Arguments:
+            factory (Callable): The function creating the fetcher that downloads
+                the pages not in the cache, recording them in `cache_dir`.
+            cache_dir (str): The directory of the cached pages.
+            ttl (float): The number of seconds the pages are served from the cache;
+                `fetch_cache_ttl` from the configuration if not provided.
+
+        """
+        super().__init__(0, False, cache_dir)
+        self.factory = factory
+        self.fetcher: Optional[Fetcher] = None
+        self.ttl = float(ttl or config.fetch_cache_ttl or 3600)
+
+    def download_html(self, url: str, quantity: int = 1) -> tuple:
+        """Read the pages of the specified URL from the cache, or download them.
+
+        Arguments:
+            url (str): The URL to read the pages of.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: The pages, as returned by the wrapped fetcher.
+
+        """
+        filename = page_filenames(self.replay_dir, url)[0]
+        try:
+            age = time.time() - os.path.getmtime(filename)
+        except OSError:
+            age = None
+        if age is not None and age < self.ttl:
+            metrics.incr("fetch_cache_hits")
+            return super().download_html(url, quantity)
+        # drop the further offers pages of the previous download, if any
+        page = 2
+        while os.path.exists(more_page_filename(self.replay_dir, url, page)):
+            os.remove(more_page_filename(self.replay_dir, url, page))
+            page += 1
+        if self.fetcher is None:
+            self.fetcher = self.factory()
+            # the page of the browser is checked for captchas when a download fails
+            self.driver = self.fetcher.driver
+        return self.fetcher.download_html(url, quantity)
+
+    def _save_screenshot(self) -> None:
+        if self.fetcher is not None:
+            self.fetcher._save_screenshot()
+
+    def quit(self) -> None:
+        """Close the wrapped fetcher, if any."""
+        if self.fetcher is not None:
+            self.fetcher.quit()
+            self.fetcher = None
+        self.driver = None
+
+
+class FakeFetcher(Fetcher):
+    """Fetcher serving synthetic or recorded listings, with latency and failures.
+
+    It does not load the website, so that the scanner, the daemon scheduler, the
+    retries and the exporters can be tested with thousands of URLs. Each URL
+    always gets the same synthetic listing, or its recorded pages if `replay_dir`
+    is set. Each download waits for a random latency, and can fail as a timeout,
+    a captcha or a driver crash, which are then handled as the real ones.
+
+    Attributes:
+        replay_dir (str): The directory of the recorded pages to serve, if any.
+        offers (int): The number of offers of the synthetic listings.
+        latency (float): The mean number of seconds of each download.
+        failure_rate (float): The probability that a download times out.
+        block_rate (float): The probability that a download shows a captcha.
+        crash_rate (float): The probability that a download crashes the driver.
+
+    """
+
+    # number of fetchers created, so that the fetchers created with the same seed
+    # after a driver crash do not fail at the same downloads
+    _created: ClassVar = itertools.count()
+
+    def __init__(
+        self,
+        wait: int,
+        headless: bool,
+        replay_dir: Optional[str] = None,
+        offers: Optional[int] = None,
+        latency: Optional[float] = None,
+        failure_rate: Optional[float] = None,
+        block_rate: Optional[float] = None,
+        crash_rate: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        """Initialize the fetcher, with defaults taken from the configuration.
+
+        Arguments:
+            wait (int): Unused, kept for compatibility with the Scraper class.
+            headless (bool): Unused, kept for compatibility with the Scraper class.
+            replay_dir (str): The directory of the recorded pages to serve; None
+                for synthetic listings.
+            offers (int): The number of offers of the synthetic listings.
+            latency (float): The mean number of seconds of each download.
+            failure_rate (float): The probability that a download times out.
+            block_rate (float): The probability that a download shows a captcha.
+            crash_rate (float): The probability that a download crashes the driver.
+            seed (int): The seed of the latencies and failures; None for a random one.
+
+        """
+        self.replay_dir = replay_dir
+        self.offers = int(offers or config.fake_offers or 40)
+        self.latency = float((config.fake_latency or 0) if latency is None else latency)
+        self.failure_rate = float(
+            (config.fake_failure_rate or 0) if failure_rate is None else failure_rate
+        )
+        self.block_rate = float(
+            (config.fake_block_rate or 0) if block_rate is None else block_rate
+        )
+        self.crash_rate = float(
+            (config.fake_crash_rate or 0) if crash_rate is None else crash_rate
+        )
+        seed = config.fake_seed if seed is None else seed
+        self._random = random.Random(  # noqa S311
+            None if seed is None else f"{seed}-{next(FakeFetcher._created)}"
+        )
+        self._replay = ReplayScraper(wait, headless, replay_dir) if replay_dir else None
+
+    def download_html(self, url: str, quantity: int = 1) -> tuple:
+        """Serve the pages of the specified URL, after a random latency.
+
+        Arguments:
+            url (str): The URL to serve the pages of.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: The pages with prices plus shipping costs and with prices
+                shipping included, synthetic or recorded.
+
+        Raises:
+            TimeoutException: With probability `failure_rate`.
+            BlockedError: With probability `block_rate`.
+            ConnectionRefusedError: With probability `crash_rate`, as when the
+                driver is gone.
+
+        """
+        with metrics.span("navigate", url=url):
+            if self.latency > 0:
+                time.sleep(self._random.expovariate(1 / self.latency))
+            draw = self._random.random()
+            if draw < self.crash_rate:
+                raise ConnectionRefusedError(f"Fake driver crash loading {url}")
+            draw -= self.crash_rate
+            if draw < self.block_rate:
+                raise BlockedError(f"Fake captcha loading {url}")
+            draw -= self.block_rate
+            if draw < self.failure_rate:
+                raise TimeoutException(f"Fake timeout loading {url}")
+        if self._replay is not None:
+            return self._replay.download_html(url, quantity)
+        seed = int.from_bytes(
+            hashlib.blake2b(url.encode(), digest_size=4).digest(), "big"
+        )
+        pages = (
+            generate_listing_html(self.offers, seed=seed, name=f"Product {seed}"),
+            generate_listing_html(self.offers, seed=seed, shipping_included=True),
+        )
+        metrics.incr("pages", len(pages))
+        metrics.incr("page_source_bytes", sum(len(page) for page in pages))
+        logger.debug("Served a synthetic listing.", url=url, phase="navigate")
+        return pages
+
+
+def create_fetcher(
+    kind: str,
+    wait: int,
+    headless: bool,
+    record_dir: Optional[str] = None,
+    replay_dir: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> Fetcher:
+    """Create a fetcher of the given kind.
+
+    Arguments:
+        kind (str): The kind of fetcher, as returned by `fetcher_kind()`.
+        wait (int): The number of seconds to wait for the pages to load.
+        headless (bool): The headless mode of the browser.
+        record_dir (str): The directory where to record the downloaded pages.
+        replay_dir (str): The directory of the recorded pages to replay.
+        cache_dir (str): The directory where the downloaded pages are cached, for
+            the `browser` and `http` fetchers; `fetch_cache_dir` from the
+            configuration if not provided, and no cache if not set.
+
+    Returns:
+        Fetcher: The fetcher, e.g. a `Scraper` driving the browser.
+
+    Raises:
+        ValueError: If the `replay` fetcher is not given the recorded pages.
+
+    """
+    if kind == "replay":
+        if not replay_dir:
+            raise ValueError("The replay fetcher needs the directory of the pages.")
+        return ReplayScraper(wait, headless, replay_dir)
+    if kind == "fake":
+        return FakeFetcher(wait, headless, replay_dir)
+    cache_dir = cache_dir or config.fetch_cache_dir
+    fetcher_class = HttpFetcher if kind == "http" else Scraper
+    if cache_dir:
+        # the pages are recorded in the cache as they are downloaded
+        return CacheFetcher(lambda: fetcher_class(wait, headless, cache_dir), cache_dir)
+    return fetcher_class(wait, headless, record_dir)
@@ -0,0 +1,195 @@
+"""Lean page loads, skipping the resources that are not needed to read the offers."""
+
+from fnmatch import fnmatch
+from typing import Dict, List, Optional
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+
+# resources blocked when the configuration does not set `lean_block_urls`
+DEFAULT_BLOCK_URLS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.avif",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.mp4",
+    "*.webm",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*adservice.google.*",
+    "*facebook.net*",
+    "*criteo.*",
+    "*hotjar.com*",
+]
+# Chrome preferences of the lean profile: no notifications, popups or plugins
+LEAN_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.popups": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+}
+# script returning the bytes transferred and the timings of the current page
+PAGE_STATS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const resources = performance.getEntriesByType('resource');
+return {
+    bytes: (nav.transferSize || 0) + resources.reduce((s, r) => s + (r.transferSize || 0), 0),
+    requests: resources.length + 1,
+    dom_ms: nav.domContentLoadedEventEnd || 0,
+    load_ms: nav.loadEventEnd || 0,
+};
+"""
+
+
+def blocked_url_patterns() -> List[str]:
+    """Return the URL patterns to block, from the block and allow lists of the configuration.
+
+    Patterns of the block list (`lean_block_urls`) that match a pattern of the
+    allow list (`lean_allow_urls`) are not blocked, so that single entries of the
+    default block list can be re-enabled without copying it.
+
+    Returns:
+        list: The URL patterns, with `*` wildcards, to block.
+
+    """
+    block = config.lean_block_urls or DEFAULT_BLOCK_URLS
+    allow = config.lean_allow_urls or []
+    return [
+        pattern
+        for pattern in block
+        if not any(fnmatch(pattern, allowed) for allowed in allow)
+    ]
+
+
+def configure_lean_options(chrome_options) -> None:
+    """Set the lean profile on the Chrome options.
+
+    The page load strategy is set to `eager`, so that navigation returns as soon
+    as the DOM is ready, without waiting for the images and the other subresources.
+
+    Arguments:
+        chrome_options (ChromeOptions): The options of the browser.
+
+    """
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_experimental_option("prefs", LEAN_PREFS)
+
+
+def set_blocked_urls(driver, patterns: List[str]) -> None:
+    """Block the requests to the URLs matching the patterns, through DevTools.
+
+    Arguments:
+        driver (WebDriver): The browser.
+        patterns (list): The URL patterns to block; an empty list unblocks all.
+
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def page_stats(driver) -> Optional[Dict]:
+    """Return the bytes transferred and the load timings of the current page.
+
+    Arguments:
+        driver (WebDriver): The browser.
+
+    Returns:
+        dict: The bytes, the number of requests and the milliseconds to the DOM
+            ready and load events; None if they are not available.
+
+    """
+    try:
+        return driver.execute_script(PAGE_STATS_SCRIPT)
+    except Exception:
+        logger.debug("Page statistics are not available.")
+        return None
+
+
+class LoadSavings:
+    """Estimate of the bytes and milliseconds saved by the lean page loads.
+
+    The first page is also loaded in full, with nothing blocked and waiting for
+    the load event, to get a reference; each lean page is then compared with it.
+
+    Attributes:
+        reference (dict): The statistics of the reference full page load.
+
+    """
+
+    def __init__(self):
+        """Initialize the estimate, without a reference yet."""
+        self.reference: Optional[Dict] = None
+
+    def calibrate(self, driver, url: str, wait: int, patterns: List[str]) -> None:
+        """Load the page in full to get the reference statistics.
+
+        Arguments:
+            driver (WebDriver): The browser.
+            url (str): The URL of the page.
+            wait (int): The maximum number of seconds to wait for the load event.
+            patterns (list): The URL patterns to block again afterwards.
+
+        """
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        set_blocked_urls(driver, [])
+        try:
+            with metrics.span("lean_calibration", url=url):
+                driver.get(url)
+                try:
+                    WebDriverWait(driver, wait).until(
+                        lambda d: (
+                            d.execute_script("return document.readyState") == "complete"
+                        )
+                    )
+                except Exception:
+                    logger.warn(
+                        "The full page did not load in time, the savings are underestimated.",
+                        url=url,
+                        phase="lean_calibration",
+                    )
+            self.reference = page_stats(driver)
+        finally:
+            set_blocked_urls(driver, patterns)
+
+    def record(self, driver, url: str) -> None:
+        """Record the savings of the lean load of the current page.
+
+        Arguments:
+            driver (WebDriver): The browser.
+            url (str): The URL of the page.
+
+        """
+        stats = page_stats(driver)
+        if not stats:
+            return
+        metrics.incr("transfer_bytes", stats["bytes"])
+        if not self.reference:
+            return
+        bytes_saved = max(0, self.reference["bytes"] - stats["bytes"])
+        ms_saved = max(0, self.reference["load_ms"] - stats["dom_ms"])
+        metrics.incr("bytes_saved", bytes_saved)
+        metrics.incr("ms_saved", ms_saved)
+        logger.info(
+            "Lean load of `%s`: %d KiB, %.0f ms (saved about %d KiB, %.0f ms).",
+            url,
+            stats["bytes"] // 1024,
+            stats["dom_ms"],
+            bytes_saved // 1024,
+            ms_saved,
+            url=url,
+            phase="navigate",
+            bytes_saved=bytes_saved,
+            ms_saved=ms_saved,
+        )
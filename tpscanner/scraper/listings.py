@@ -0,0 +1,165 @@
+"""Generator of synthetic TrovaPrezzi listings for the fake fetcher, benchmarks and tests."""
+
+import random
+from typing import Dict, List, Optional
+
+# rating classes used by the website, from 1 to 5 stars in half-star steps
+RATINGS = [10, 15, 20, 25, 30, 35, 40, 45, 50]
+# thresholds for free delivery commonly set by the sellers
+FREE_DELIVERY_THRESHOLDS = [19, 29, 39, 49, 59, 69, 99]
+
+
+def _format_number(value: float, decimals: int = 2) -> str:
+    """Format a number as shown on the website, e.g. `1.234,56`."""
+    formatted = f"{value:,.{decimals}f}"
+    return formatted.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def generate_raw_offers(
+    offers: int,
+    sellers: int = 50,
+    missing_rate: float = 0.1,
+    seed: Optional[int] = 0,
+) -> List[Dict]:
+    """Generate the raw fields of the offers of a listing, as read from the page.
+
+    Offers are sorted by price, as on the website. Each seller always has the same
+    name, links, reviews and rating, and each optional field (rating, delivery price,
+    free delivery threshold, availability) is missing with the given probability.
+
+    Arguments:
+        offers (int): The number of offers.
+        sellers (int): The number of distinct sellers.
+        missing_rate (float): The probability that an optional field is missing.
+        seed (int): The seed of the random generator, for reproducible listings.
+
+    Returns:
+        list: A list of dicts with the raw fields of each offer.
+
+    """
+    rng = random.Random(seed)  # noqa S311
+    seller_pool = []
+    for i in range(max(1, sellers)):
+        seller_pool.append(
+            {
+                "merchant": f"Seller {i:05d}",
+                "merchant_link": f"/negozi/seller-{i}",
+                "merchant_reviews": f"{_format_number(rng.randint(1, 50000), 0)} recensioni",
+                "merchant_reviews_link": f"/recensioni/seller-{i}",
+                "merchant_rating": None
+                if rng.random() < missing_rate
+                else f"merchant_reviews rating_image rate{rng.choice(RATINGS)}",
+                "delivery_price": None
+                if rng.random() < missing_rate
+                else f"+ Sped. {_format_number(rng.uniform(0, 12))} €",
+                "free_delivery": None
+                if rng.random() < missing_rate
+                else f"{_format_number(rng.choice(FREE_DELIVERY_THRESHOLDS))} €",
+            }
+        )
+    prices = sorted(rng.uniform(1, 999) for _ in range(offers))
+    rows = []
+    for i, price in enumerate(prices):
+        row = dict(rng.choice(seller_pool))
+        row["price"] = f"{_format_number(price)} €"
+        row["availability"] = (
+            "not available"
+            if rng.random() < missing_rate
+            else rng.choice(["available", "available", "available", "limited"])
+        )
+        row["offer_link"] = f"/goto/{i}"
+        rows.append(row)
+    return rows
+
+
+def _render_offer(row: Dict, shipping_included: bool) -> str:
+    price_class = (
+        "item_price total_price_sorting" if shipping_included else "item_price "
+    )
+    rating = (
+        f'<a class="{row["merchant_rating"]}" href="{row["merchant_reviews_link"]}"></a>'
+        if row["merchant_rating"]
+        else ""
+    )
+    delivery = (
+        f'<div class="item_delivery_price ">{row["delivery_price"]}</div>'
+        if row["delivery_price"] and not shipping_included
+        else ""
+    )
+    free_delivery = (
+        '<div class="free_shipping_threshold"><span>Spedizione gratuita da '
+        f"<span><span>{row['free_delivery']}</span></span></span></div>"
+        if row["free_delivery"]
+        else ""
+    )
+    availability = (
+        '<div class="item_availability">'
+        f'<span class="{row["availability"]}">Disponibile</span></div>'
+        if row["availability"] != "not available"
+        else ""
+    )
+    return (
+        "<li>"
+        '<div class="item_info"><div class="item_merchant">'
+        f'<div><a href="{row["merchant_link"]}"><span>{row["merchant"]}</span></a></div>'
+        '<div class="wrap_merchant_reviews">'
+        f'<a class="merchant_reviews" href="{row["merchant_reviews_link"]}">'
+        f"{row['merchant_reviews']}</a>{rating}</div>"
+        "</div></div>"
+        f'<div class="{price_class}">'
+        f'<div class="item_basic_price">{row["price"]}</div>'
+        f"{delivery}{free_delivery}{availability}</div>"
+        f'<div class="item_actions"><a href="{row["offer_link"]}">Vai al negozio</a></div>'
+        "</li>"
+    )
+
+
+def render_listing_html(
+    name: str, rows: List[Dict], shipping_included: bool = False
+) -> str:
+    """Render the raw offers as the HTML of a TrovaPrezzi listing page.
+
+    Arguments:
+        name (str): The name of the product.
+        rows (list): The raw offers, as returned by `generate_raw_offers()`.
+        shipping_included (bool): Whether to render the page sorted by price
+            shipping included.
+
+    Returns:
+        str: The HTML of the page.
+
+    """
+    offers = "".join(_render_offer(row, shipping_included) for row in rows)
+    return (
+        "<!DOCTYPE html><html><head><title>TrovaPrezzi</title></head><body>"
+        f'<div class="name_and_rating"><h1><strong>{name}</strong></h1></div>'
+        f'<div id="listing"><ul>{offers}</ul></div>'
+        "</body></html>"
+    )
+
+
+def generate_listing_html(
+    offers: int,
+    sellers: int = 50,
+    missing_rate: float = 0.1,
+    seed: Optional[int] = 0,
+    name: str = "Synthetic product",
+    shipping_included: bool = False,
+) -> str:
+    """Generate the HTML of a realistic TrovaPrezzi listing page.
+
+    Arguments:
+        offers (int): The number of offers on the page.
+        sellers (int): The number of distinct sellers.
+        missing_rate (float): The probability that an optional field is missing.
+        seed (int): The seed of the random generator, for reproducible listings.
+        name (str): The name of the product.
+        shipping_included (bool): Whether to render the page sorted by price
+            shipping included.
+
+    Returns:
+        str: The HTML of the page.
+
+    """
+    rows = generate_raw_offers(offers, sellers, missing_rate, seed)
+    return render_listing_html(name, rows, shipping_included)
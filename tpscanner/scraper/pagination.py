@@ -0,0 +1,182 @@
+"""Loading of the offers beyond the first page of a listing."""
+
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from lxml import html
+
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+
+from .capture import captured_size
+
+# CSS selector of the link showing more offers at the bottom of the listing
+MORE_OFFERS_SELECTOR = "a.more_offers"
+
+
+def page_url_builder(href: Optional[str], base_url: str) -> Optional[Callable]:
+    """Return a function building the URL of each offers page, if pages have one.
+
+    Pages can be addressed directly when the link to more offers is a real URL
+    with a query parameter set to 2, i.e. the number of the next page.
+
+    Arguments:
+        href (str): The link to more offers.
+        base_url (str): The URL of the first page, against which `href` is resolved.
+
+    Returns:
+        Callable: A function returning the URL of the given page number; None if
+            the pages can only be loaded by clicking the link in the browser.
+
+    """
+    if not href or href.startswith(("#", "javascript:")):
+        return None
+    parts = urlsplit(urljoin(base_url, href))
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for i, (key, value) in enumerate(query):
+        if value == "2":
+            break
+    else:
+        return None
+
+    def page_url(page: int) -> str:
+        page_query = list(query)
+        page_query[i] = (key, str(page))
+        return urlunsplit(parts._replace(query=urlencode(page_query)))
+
+    return page_url
+
+
+def can_stop(items: List[Dict], quantity: int, top_k: int) -> bool:
+    """Tell whether the offers not loaded yet cannot be among the best ones.
+
+    The offers are listed by increasing price, so every offer not loaded yet costs
+    at least the last price seen times the quantity, plus a delivery price that
+    cannot be negative.
+
+    Arguments:
+        items (list): The offers loaded so far, in the order of the listing.
+        quantity (int): The quantity to buy.
+        top_k (int): The number of best offers that must be found.
+
+    Returns:
+        bool: True if the `top_k` best offers are already loaded.
+
+    """
+    if not items or len(items) < top_k:
+        return False
+    totals = sorted(item["total_price_plus_delivery"] for item in items)
+    lower_bound = max(item["price"] for item in items) * quantity
+    return totals[top_k - 1] <= lower_bound
+
+
+def has_offers(page: Optional[str]) -> bool:
+    """Tell whether a page lists any offer.
+
+    Arguments:
+        page (str): The HTML content of the page.
+
+    Returns:
+        bool: False if the page is missing or its listing is empty.
+
+    """
+    if not page:
+        return False
+    return bool(html.fromstring(page).xpath('//*[@id="listing"]/ul/li'))
+
+
+def fetch_pages(
+    urls: List[str],
+    headers: Dict[str, str],
+    workers: int,
+    limiter,
+    timeout: float = 30,
+) -> List[Optional[str]]:
+    """Download several offers pages at the same time, within the rate limit.
+
+    Arguments:
+        urls (list): The URLs of the pages.
+        headers (dict): The HTTP headers of the requests, e.g. the user agent and
+            the cookies of the browser.
+        workers (int): The maximum number of pages downloaded at the same time.
+        limiter (RateLimiter): The rate limiter shared by the downloads.
+        timeout (float): The number of seconds to wait for each page.
+
+    Returns:
+        list: The HTML content of each page, in order; None for the pages that
+            could not be downloaded.
+
+    """
+
+    def fetch(url: str) -> Optional[str]:
+        limiter.acquire()
+        request = urllib.request.Request(url, headers=headers)  # noqa S310
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:  # noqa S310
+                return response.read().decode("utf-8", errors="replace")
+        except Exception as e:
+            logger.warn("Could not download `%s`: %s", url, e, url=url, phase="paging")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(fetch, urls))
+
+
+def fetch_offers_pages(
+    parser,
+    url: str,
+    quantity: int,
+    items: list,
+    headers: Dict[str, str],
+    page_url: Callable,
+    top_k: int,
+    max_pages: int,
+    workers: int,
+    limiter,
+) -> list:
+    """Download the offers pages after the first, until the best offers are found.
+
+    Arguments:
+        parser (OfferParser): The parser extracting the offers of each page.
+        url (str): The URL of the product.
+        quantity (int): The quantity to buy.
+        items (list): The offers found so far, extended with the ones of each page.
+        headers (dict): The HTTP headers of the requests.
+        page_url (Callable): The function returning the URL of each page number,
+            as returned by `page_url_builder()`.
+        top_k (int): The number of best offers to find.
+        max_pages (int): The maximum number of pages.
+        workers (int): The maximum number of pages downloaded at the same time.
+        limiter (RateLimiter): The rate limiter shared by the downloads.
+
+    Returns:
+        list: The HTML content of the pages downloaded.
+
+    """
+    pages = []
+    page = 2
+    while page <= max_pages and not can_stop(items, quantity, top_k):
+        numbers = range(page, min(page + workers, max_pages + 1))
+        contents = fetch_pages(
+            [page_url(n) for n in numbers], headers, workers, limiter
+        )
+        page += len(numbers)
+        for content in contents:
+            if content is None or not has_offers(content):
+                # past the last page, or a page that could not be downloaded
+                page = max_pages + 1
+                break
+            metrics.incr("pages")
+            metrics.incr("page_source_bytes", captured_size(content))
+            pages.append(content)
+            items.extend(parser.extract_prices_plus_shipping(content, quantity)[1])
+    logger.info(
+        "Downloaded %d more offers pages for `%s`.",
+        len(pages),
+        url,
+        url=url,
+        phase="paging",
+    )
+    return pages
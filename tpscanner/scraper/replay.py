@@ -0,0 +1,57 @@
+"""This module contains the ReplayScraper class that replays pages recorded by the Scraper."""
+
+import os
+
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+
+from .scraper import Fetcher, more_page_filename, page_filenames
+
+
+class ReplayScraper(Fetcher):
+    """Scraper that reads the pages recorded with `--record` instead of using a browser.
+
+    Replayed runs do not depend on the website, so they are reproducible and can
+    be used to profile and benchmark the parsing and the rest of the pipeline.
+    """
+
+    def __init__(self, wait: int, headless: bool, replay_dir: str):
+        """Initialize the ReplayScraper object with the directory of the recorded pages.
+
+        Arguments:
+            wait (int): Unused, kept for compatibility with the Scraper class.
+            headless (bool): Unused, kept for compatibility with the Scraper class.
+            replay_dir (str): The directory of the recorded pages.
+
+        """
+        self.replay_dir = replay_dir
+
+    def download_html(self, url: str, quantity: int = 1) -> tuple:
+        """Read the recorded HTML content of the specified URL.
+
+        Arguments:
+            url (str): The URL to read the HTML content of.
+            quantity (int): Unused, kept for compatibility with the Scraper class.
+
+        Returns:
+            tuple: A tuple containing the HTML content of the pages, including the
+                further offers pages that were recorded, if any.
+
+        """
+        filenames = list(page_filenames(self.replay_dir, url))
+        number = 2
+        while os.path.exists(more_page_filename(self.replay_dir, url, number)):
+            filenames.append(more_page_filename(self.replay_dir, url, number))
+            number += 1
+        pages = []
+        for filename in filenames:
+            try:
+                with open(filename, "r", encoding="utf-8") as f:
+                    page = f.read()
+            except FileNotFoundError:
+                logger.critical("No recorded page found for %s.", url, url=url)
+                raise
+            metrics.incr("pages")
+            metrics.incr("page_source_bytes", len(page.encode("utf-8")))
+            pages.append(page)
+        return tuple(pages)
@@ -0,0 +1,310 @@
+"""Retries, driver recycling, circuit breaker and quarantine around the Scraper."""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+
+# kinds of errors that can go away by trying again
+RETRYABLE = {"timeout", "captcha", "driver_crash"}
+# markers of the pages shown instead of the offers when the scraper is blocked
+BLOCK_MARKERS = [
+    "px-captcha",
+    "g-recaptcha",
+    "h-captcha",
+    "cf-challenge",
+    "captcha-delivery",
+]
+# fragments of the WebDriver error messages raised when the browser is gone
+CRASH_MESSAGES = [
+    "invalid session id",
+    "chrome not reachable",
+    "disconnected",
+    "no such window",
+    "session deleted",
+    "target window already closed",
+    "connection refused",
+]
+
+
+class BlockedError(Exception):
+    """Raised when the website shows a captcha or block page instead of the offers."""
+
+
+def is_blocked(page_source: str) -> bool:
+    """Tell whether a page is a captcha or block page instead of a listing.
+
+    Arguments:
+        page_source (str): The HTML content of the page.
+
+    Returns:
+        bool: True if the page contains one of the block markers.
+
+    """
+    return any(marker in page_source for marker in BLOCK_MARKERS)
+
+
+def classify_error(error: Exception, scraper=None) -> str:
+    """Classify an error raised while scanning a URL.
+
+    Selenium is not imported here: its exceptions are recognized by name, so that
+    errors of the replay scraper can be classified without loading it.
+
+    Arguments:
+        error (Exception): The error raised.
+        scraper (Scraper): The scraper that raised it, whose current page is
+            checked for block markers.
+
+    Returns:
+        str: One of `timeout`, `captcha`, `driver_crash`, `layout` or `unknown`.
+
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    message = str(error).lower()
+    if "BlockedError" in names:
+        return "captcha"
+    if "MaxRetryError" in names or "ConnectionRefusedError" in names:
+        return "driver_crash"
+    if "WebDriverException" in names and any(m in message for m in CRASH_MESSAGES):
+        return "driver_crash"
+    driver = getattr(scraper, "driver", None)
+    if driver is not None:
+        try:
+            if is_blocked(driver.page_source):
+                return "captcha"
+        except Exception:
+            return "driver_crash"
+    if "TimeoutException" in names:
+        return "timeout"
+    if names & {"NoSuchElementException", "IndexError", "AttributeError", "ValueError"}:
+        return "layout"
+    return "unknown"
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter between the attempts to scan a URL.
+
+    Attributes:
+        max_attempts (int): The maximum number of attempts for each URL.
+        base_delay (float): The number of seconds to wait after the first failure.
+        max_delay (float): The maximum number of seconds to wait between two attempts.
+
+    """
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+    ):
+        """Initialize the policy, with defaults taken from the configuration.
+
+        Arguments:
+            max_attempts (int): The maximum number of attempts for each URL.
+            base_delay (float): The number of seconds to wait after the first failure.
+            max_delay (float): The maximum number of seconds to wait between two attempts.
+
+        """
+        self.max_attempts = int(max_attempts or config.retry_max_attempts or 3)
+        if base_delay is None:
+            base_delay = config.retry_base_delay
+        self.base_delay = float(5 if base_delay is None else base_delay)
+        self.max_delay = float(max_delay or config.retry_max_delay or 120)
+
+    def delay(self, attempt: int) -> float:
+        """Return the number of seconds to wait after a failed attempt.
+
+        Arguments:
+            attempt (int): The number of the attempt that failed, starting from 1.
+
+        Returns:
+            float: The delay, doubled at each attempt, with up to 50% of jitter.
+
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1)  # noqa S311
+
+
+class CircuitBreaker:
+    """Pause the scan when too many of the recent pages are blocked.
+
+    The breaker opens when at least `threshold` of the last `window` attempts were
+    blocked by a captcha; then every scan waits `cooldown` seconds before going
+    on, and the window starts over. The breaker can be shared by several threads.
+
+    Attributes:
+        window (int): The number of recent attempts considered.
+        threshold (float): The fraction of blocked attempts that opens the breaker.
+        cooldown (float): The number of seconds the scan is paused for.
+
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        threshold: Optional[float] = None,
+        cooldown: Optional[float] = None,
+    ):
+        """Initialize the breaker, with defaults taken from the configuration.
+
+        Arguments:
+            window (int): The number of recent attempts considered.
+            threshold (float): The fraction of blocked attempts that opens the breaker.
+            cooldown (float): The number of seconds the scan is paused for.
+
+        """
+        self.window = int(window or config.breaker_window or 10)
+        self.threshold = float(threshold or config.breaker_threshold or 0.5)
+        if cooldown is None:
+            cooldown = config.breaker_cooldown
+        self.cooldown = float(300 if cooldown is None else cooldown)
+        self._results: Deque[bool] = deque(maxlen=self.window)
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, blocked: bool) -> None:
+        """Record the outcome of an attempt.
+
+        Arguments:
+            blocked (bool): Whether the attempt was blocked by a captcha.
+
+        """
+        with self._lock:
+            self._results.append(blocked)
+            # a few blocks at the start of the run are not enough to decide
+            if len(self._results) < min(self.window, 3):
+                return
+            if sum(self._results) / len(self._results) >= self.threshold:
+                self._open_until = time.monotonic() + self.cooldown
+                self._results.clear()
+                metrics.incr("circuit_breaks")
+                logger.warn(
+                    "Too many blocked pages, pausing the scan for %d seconds.",
+                    self.cooldown,
+                    phase="circuit_breaker",
+                )
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the scan is paused."""
+        return time.monotonic() < self._open_until
+
+    def wait(self) -> None:
+        """Wait until the breaker is closed again."""
+        delay = self._open_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            metrics.incr("sleep_seconds", delay)
+
+
+class Resilience:
+    """Scan URLs with retries, restarting the driver when it crashes.
+
+    The scraper is created on the first scan, and again after a driver crash.
+    Errors are classified: timeouts, captchas and driver crashes are retried with
+    exponential backoff, while layout changes and unknown errors are not. URLs
+    that still fail are quarantined, and the scan goes on with the next URL.
+
+    Attributes:
+        factory (Callable): The function creating a new scraper.
+        policy (RetryPolicy): The retry policy.
+        breaker (CircuitBreaker): The circuit breaker, possibly shared.
+        scraper (Scraper): The current scraper, None until the first scan.
+        quarantined (dict): The kind of error, last error message and number of
+            attempts of each quarantined URL.
+
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """Initialize the resilience layer.
+
+        Arguments:
+            factory (Callable): The function creating a new scraper.
+            policy (RetryPolicy): The retry policy; the configured one if not provided.
+            breaker (CircuitBreaker): The circuit breaker; a new one if not provided.
+
+        """
+        self.factory = factory
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.scraper: Any = None
+        self.quarantined: Dict[str, Dict] = {}
+
+    def call(self, func: Callable, url: str):
+        """Call `func(scraper)` to scan a URL, retrying it if it fails.
+
+        Arguments:
+            func (Callable): The function scanning the URL with the given scraper.
+            url (str): The URL, used to report and quarantine it.
+
+        Returns:
+            The result of `func`, None if the URL was quarantined.
+
+        """
+        for attempt in range(1, self.policy.max_attempts + 1):
+            self.breaker.wait()
+            scraper = self.scraper
+            try:
+                # a browser that fails to start is retried as a crashed one
+                if scraper is None:
+                    scraper = self.scraper = self.factory()
+                result = func(scraper)
+            except Exception as e:
+                kind = classify_error(e, scraper) if scraper else "driver_crash"
+                metrics.incr("errors")
+                self.breaker.record(kind == "captcha")
+                logger.error(
+                    "Attempt %d to scan `%s` failed (%s): %s",
+                    attempt,
+                    url,
+                    kind,
+                    e,
+                    url=url,
+                    phase="scan",
+                    error=kind,
+                )
+                if kind == "driver_crash":
+                    self.restart()
+                elif scraper is not None:
+                    scraper._save_screenshot()
+                if kind not in RETRYABLE or attempt == self.policy.max_attempts:
+                    self.quarantined[url] = {
+                        "kind": kind,
+                        "error": str(e),
+                        "attempts": attempt,
+                    }
+                    return None
+                metrics.incr("retries")
+                delay = self.policy.delay(attempt)
+                time.sleep(delay)
+                metrics.incr("sleep_seconds", delay)
+            else:
+                self.breaker.record(False)
+                return result
+        return None
+
+    def restart(self) -> None:
+        """Close the current scraper, so that a new one is created on the next scan."""
+        if self.scraper is not None:
+            metrics.incr("driver_restarts")
+            try:
+                self.scraper.quit()
+            except Exception:
+                logger.debug("The crashed driver could not be closed.")
+            self.scraper = None
+
+    def close(self) -> None:
+        """Close the current scraper, if any."""
+        if self.scraper is not None:
+            self.scraper.quit()
+            self.scraper = None
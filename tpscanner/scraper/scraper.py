@@ -1,37 +1,165 @@
 """This module contains the Scraper class that is responsible for scraping the Trovaprezzi website."""
 
+import abc
+import hashlib
+import os
 import random
-import re
+import threading
+from typing import Any, Callable, ClassVar, Dict, Optional, Union
 
-import undetected_chromedriver as uc
 from lxml import html
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 
 from tpscanner.config import config
 from tpscanner.logger import logger
-from tpscanner.utils import sleep
+from tpscanner.metrics import metrics
+from tpscanner.utils import RateLimiter, sleep
+
+from .capture import (
+    capture_listing,
+    capture_mode,
+    capture_rows,
+    captured_size,
+    product_name,
+)
+from .convert import convert_rows
+from .lean import (
+    LoadSavings,
+    blocked_url_patterns,
+    configure_lean_options,
+    set_blocked_urls,
+)
+from .pagination import (
+    MORE_OFFERS_SELECTOR,
+    can_stop,
+    fetch_offers_pages,
+    page_url_builder,
+)
+from .resilience import BlockedError, is_blocked
+
+# CSS selector of the button accepting the cookies in the iubenda banner
+COOKIE_BUTTON_SELECTOR = ".iubenda-cs-accept-btn.iubenda-cs-btn-primary"
+# prefix of the cookies where iubenda stores the consent
+CONSENT_COOKIE_PREFIX = "_iub_cs-"
+# script that accepts the cookies as soon as the banner appears, without polling,
+# and returns right away if the consent is already stored
+COOKIE_BANNER_SCRIPT = """
+const [selector, prefix, timeout, done] = arguments;
+if (document.cookie.split('; ').some((c) => c.startsWith(prefix))) {
+    return done('consented');
+}
+const accept = (button) => { button.click(); done('accepted'); };
+const button = document.querySelector(selector);
+if (button) {
+    return accept(button);
+}
+const observer = new MutationObserver(() => {
+    const button = document.querySelector(selector);
+    if (button) {
+        observer.disconnect();
+        clearTimeout(timer);
+        accept(button);
+    }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true});
+const timer = setTimeout(() => { observer.disconnect(); done('absent'); }, timeout);
+"""
+
+
+class Fetcher(abc.ABC):
+    """Interface of the fetchers downloading the pages of the products.
+
+    The `Scanner` only depends on this interface: the `Scraper` implements it
+    with a browser, the other fetchers without one, e.g. with plain HTTP requests
+    or from the recorded pages. The pages are then parsed by an `OfferParser`.
+
+    Attributes:
+        driver: The browser, checked for a captcha when a download fails; None
+            for the fetchers without one.
+
+    """
+
+    driver: Any = None
+
+    @abc.abstractmethod
+    def download_html(self, url: str, quantity: int = 1) -> tuple:
+        """Download the pages of the specified URL.
 
+        Arguments:
+            url (str): The URL to download the pages of.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: A tuple containing the HTML content of the page with prices plus
+                shipping costs, of the page with prices shipping included and of the
+                further offers pages downloaded, if any.
+
+        """
 
-class Scraper:
-    """Scraper class for scraping the Trovaprezzi website."""
+    def quit(self) -> None:
+        """Release the resources of the fetcher, e.g. its browser; nothing by default."""
 
-    def __init__(self, wait: int, headless: bool):
+    def _save_screenshot(self) -> None:
+        """Save a screenshot of the current page, for the fetchers showing one."""
+
+
+class Scraper(Fetcher):
+    """Fetcher downloading the pages of the Trovaprezzi website with a browser."""
+
+    # browser profile directories in use, which cannot be shared by two browsers
+    _profiles_in_use: ClassVar[set] = set()
+    _profiles_lock: ClassVar = threading.Lock()
+
+    def __init__(self, wait: int, headless: bool, record_dir: Optional[str] = None):
         """Initialize the Scraper object with the specified wait time and headless mode.
 
         Arguments:
             wait (int): The wait time for the WebDriver to wait for an element to be clickable.
             headless (bool): A boolean value indicating whether to run the WebDriver in headless mode.
+            record_dir (str): The directory where to save the downloaded pages, so that they can be replayed later.
+
+        If `lean_loading` is set in the configuration, e.g. with `--lean`, images,
+        fonts, ads and analytics are not loaded, as set by the block and allow lists
+        in the configuration, and navigation does not wait for the subresources.
+
+        If `user_data_dir` is set in the configuration, e.g. with `--user-data-dir`,
+        the browser profile is kept there, so the cookie consent and the HTTP cache
+        survive across URLs and runs. Scrapers running at the same time use
+        separate subdirectories.
+
+        The `capture_mode` in the configuration, e.g. set with `--capture`, sets what
+        is read from the browser: the whole page (`page`), only the markup of the
+        product heading and of the offers (`listing`), or only the fields of the
+        offers, as JSON (`rows`).
+
+        If `full_offers` is set in the configuration, e.g. with `--all-offers`, the
+        offers beyond the first page are loaded too, until the `offers_top_k` best
+        offers are found: when the offers pages have their own URL they are
+        downloaded at the same time, otherwise they are loaded in the browser.
 
         """
         self.wait = wait
         self.headless = headless
-        self.driver = self._setup_driver()
+        self.record_dir = record_dir
+        self.lean = bool(config.lean_loading)
+        self.capture = capture_mode(record=bool(record_dir))
+        self.full_offers = bool(config.full_offers)
+        self.page_workers = int(config.offers_page_workers or 4)
+        self.paging_limiter = RateLimiter(
+            config.offers_requests_per_minute or 30, burst=self.page_workers
+        )
+        self.savings = LoadSavings()
+        self.parser = OfferParser(headless, on_error=self._save_screenshot)
+        self.profile_dir = self._acquire_profile_dir()
+        with metrics.span("driver_setup", headless=headless):
+            self.driver = self._setup_driver()
 
     def _setup_driver(self):
+        # selenium and undetected_chromedriver are slow to import, so they are
+        # only loaded when a browser is actually needed
+        import undetected_chromedriver as uc
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service as ChromeService
+
         chrome_options = None
         if self.headless:
             chrome_options = uc.ChromeOptions()
@@ -52,6 +180,8 @@ class Scraper:
             chrome_options.add_argument("--no-first-run")
         chrome_options.add_argument("--start-maximized")
         chrome_options.add_argument("--ignore-certificate-errors")
+        if self.lean:
+            configure_lean_options(chrome_options)
 
         driver = None
         if self.headless:
@@ -61,71 +191,328 @@ class Scraper:
                 use_subprocess=False,
                 options=chrome_options,
                 version_main=config.chrome_version,
+                user_data_dir=self.profile_dir,
             )
         else:
             logger.info("Using regular chromedriver for non-headless mode.")
+            if self.profile_dir:
+                chrome_options.add_argument(f"--user-data-dir={self.profile_dir}")
             driver = webdriver.Chrome(service=ChromeService(), options=chrome_options)
+        if self.lean:
+            set_blocked_urls(driver, blocked_url_patterns())
         return driver
 
+    def _acquire_profile_dir(self):
+        base = config.user_data_dir
+        if not base:
+            return None
+        base = os.path.abspath(os.path.expanduser(base))
+        with Scraper._profiles_lock:
+            profile_dir = base
+            n = 1
+            while profile_dir in Scraper._profiles_in_use:
+                profile_dir = f"{base}-{n}"
+                n += 1
+            Scraper._profiles_in_use.add(profile_dir)
+        os.makedirs(profile_dir, exist_ok=True)
+        logger.debug("Using the browser profile in `%s`.", profile_dir)
+        return profile_dir
+
+    def quit(self) -> None:
+        """Close the browser, if any, and release its profile directory."""
+        try:
+            if self.driver:
+                self.driver.quit()
+        finally:
+            self.driver = None
+            if self.profile_dir:
+                with Scraper._profiles_lock:
+                    Scraper._profiles_in_use.discard(self.profile_dir)
+                self.profile_dir = None
+
+    def _accept_cookies(self, url: str) -> None:
+        self.driver.set_script_timeout(self.wait + 5)
+        with metrics.span("cookie_banner", url=url):
+            outcome = self.driver.execute_async_script(
+                COOKIE_BANNER_SCRIPT,
+                COOKIE_BUTTON_SELECTOR,
+                CONSENT_COOKIE_PREFIX,
+                self.wait * 1000,
+            )
+        if outcome == "absent":
+            logger.warn(
+                "The cookie message did not appear, trying to move on without accepting.",
+                url=url,
+                phase="cookie_banner",
+            )
+        else:
+            logger.debug("Cookie banner: %s.", outcome, url=url, phase="cookie_banner")
+
     def _navigate_to_url(self, url):
-        self.driver.get(url)
+        if self.lean and config.lean_calibrate and self.savings.reference is None:
+            # load the first page in full once, to estimate the savings
+            self.savings.calibrate(self.driver, url, self.wait, blocked_url_patterns())
+        with metrics.span("navigate", url=url):
+            self.driver.get(url)
+        if self.lean:
+            self.savings.record(self.driver, url)
         # wait seconds before next URL to avoid being blocked and captcha
         sleep(config.sleep_rate_limit)
         try:
-            WebDriverWait(self.driver, self.wait).until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, ".iubenda-cs-accept-btn.iubenda-cs-btn-primary")
-                )
-            ).click()
+            self._accept_cookies(url)
         except Exception:
             logger.warn(
-                "The cookie message did not appear, trying to move on without accepting."
+                "The cookie message could not be accepted, trying to move on without accepting.",
+                url=url,
+                phase="cookie_banner",
             )
 
-    def download_html(self, url: str) -> tuple:
+    def download_html(self, url: str, quantity: int = 1) -> tuple:
         """Download the HTML content of the specified URL.
 
         Arguments:
             url (str): The URL to download the HTML content from.
+            quantity (int): The quantity to buy, used to stop loading more offers
+                once the best ones are found.
 
         Returns:
-            tuple: A tuple containing the HTML content of the page.
+            tuple: A tuple containing the HTML content of the page with prices plus
+                shipping costs, of the page with prices shipping included and of the
+                further offers pages downloaded, if any.
 
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         self._navigate_to_url(url)
-        # Click on show more offers button
-        # while True:
-        #     try:
-        #         WebDriverWait(driver, wait).until(EC.element_to_be_clickable((By.XPATH, "//a[@class='more_offers button link-arrow data-link']"))).click()
-        #     except Exception:
-        #         # no more offers (the button is not present anymore)
-        #         break
-        html_content_plus_shipping = self.driver.page_source
+        more_pages = self._load_more_offers(url, quantity) if self.full_offers else []
+        html_content_plus_shipping = self._capture()
+        if isinstance(html_content_plus_shipping, str) and is_blocked(
+            html_content_plus_shipping
+        ):
+            raise BlockedError(f"Blocked while loading {url}")
         # wait seconds before next URL to avoid being blocked and captcha
         sleep(config.sleep_rate_limit)
         try:
-            WebDriverWait(self.driver, self.wait).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, ".include_shipping"))
-            ).click()
+            with metrics.span("include_shipping", url=url):
+                WebDriverWait(self.driver, self.wait).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, ".include_shipping"))
+                ).click()
         except Exception:
-            logger.critical("An error occurred while scraping the page.")
-            self.driver.save_screenshot("error.png")
+            logger.critical(
+                "An error occurred while scraping the page.",
+                url=url,
+                phase="include_shipping",
+            )
+            self._save_screenshot()
             raise
-        html_content_including_hipping = self.driver.page_source
-        return html_content_plus_shipping, html_content_including_hipping
+        html_content_including_hipping = self._capture(shipping_included=True)
+        if self.record_dir:
+            save_pages(
+                self.record_dir,
+                url,
+                html_content_plus_shipping,
+                html_content_including_hipping,
+                *more_pages,
+            )
+        return html_content_plus_shipping, html_content_including_hipping, *more_pages
+
+    def _load_more_offers(self, url: str, quantity: int) -> list:
+        from selenium.webdriver.common.by import By
+
+        links = self.driver.find_elements(By.CSS_SELECTOR, MORE_OFFERS_SELECTOR)
+        if not links:
+            return []
+        top_k = int(config.offers_top_k or 1)
+        max_pages = int(config.offers_max_pages or 20)
+        page_url = page_url_builder(
+            links[0].get_dom_attribute("href"), self.driver.current_url
+        )
+        with metrics.span("paging", url=url):
+            if page_url:
+                return self._fetch_more_offers(
+                    url, quantity, page_url, top_k, max_pages
+                )
+            self._click_more_offers(url, quantity, top_k, max_pages)
+        return []
+
+    def _current_offers(self, quantity: int) -> list:
+        captured = capture_rows(self.driver)
+        return self.parser.extract_rows(captured, quantity)[1] if captured else []
+
+    def _fetch_more_offers(
+        self, url: str, quantity: int, page_url, top_k: int, max_pages: int
+    ) -> list:
+        headers = {
+            "User-Agent": self.driver.execute_script("return navigator.userAgent"),
+            "Cookie": "; ".join(
+                f"{c['name']}={c['value']}" for c in self.driver.get_cookies()
+            ),
+            "Referer": self.driver.current_url,
+        }
+        return fetch_offers_pages(
+            self.parser,
+            url,
+            quantity,
+            self._current_offers(quantity),
+            headers,
+            page_url,
+            top_k,
+            max_pages,
+            self.page_workers,
+            self.paging_limiter,
+        )
+
+    def _click_more_offers(
+        self, url: str, quantity: int, top_k: int, max_pages: int
+    ) -> None:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        clicks = 0
+        while clicks < max_pages - 1:
+            items = self._current_offers(quantity)
+            if can_stop(items, quantity, top_k):
+                break
+            links = self.driver.find_elements(By.CSS_SELECTOR, MORE_OFFERS_SELECTOR)
+            if not links or not links[0].is_displayed():
+                # no more offers
+                break
+            self.paging_limiter.acquire()
+            try:
+                links[0].click()
+                WebDriverWait(self.driver, self.wait).until(
+                    lambda d: (
+                        len(d.find_elements(By.CSS_SELECTOR, "#listing > ul > li"))
+                        > len(items)
+                    )
+                )
+            except Exception:
+                logger.warn(
+                    "No more offers loaded, going on with %d offers.",
+                    len(items),
+                    url=url,
+                    phase="paging",
+                )
+                break
+            clicks += 1
+        logger.info(
+            "Loaded %d more offers pages for `%s`.",
+            clicks,
+            url,
+            url=url,
+            phase="paging",
+        )
+
+    def _save_screenshot(self) -> None:
+        if self.driver:
+            try:
+                self.driver.save_screenshot("error.png")
+            except Exception:
+                logger.debug("Could not save the screenshot of the error.")
+
+    def _capture(self, shipping_included: bool = False):
+        content: Union[str, Dict, None] = None
+        if self.capture == "listing":
+            content = capture_listing(self.driver)
+        elif self.capture == "rows":
+            # only the best offer is read from the page with shipping included
+            content = capture_rows(
+                self.driver, shipping_included, limit=1 if shipping_included else 0
+            )
+        if content is None:
+            # no listing, e.g. a block page: read the whole page to find out why
+            content = self.driver.page_source
+        metrics.incr("pages")
+        metrics.incr("page_source_bytes", captured_size(content))
+        return content
+
+
+class OfferParser:
+    """Parser extracting the offers from the downloaded pages of a product.
+
+    The pages are parsed the same way whatever fetcher downloaded them, be they
+    HTML or the offers captured with the `rows` capture mode.
+
+    Attributes:
+        headless (bool): Whether the pages were loaded by a headless browser, to
+            suggest running it with a window when a page cannot be parsed.
+        on_error (Callable): Called when a page cannot be parsed, e.g. to save a
+            screenshot of the browser; None to only log the error.
+
+    """
+
+    def __init__(
+        self, headless: bool = False, on_error: Optional[Callable[[], None]] = None
+    ):
+        """Initialize the parser.
+
+        Arguments:
+            headless (bool): Whether the pages are loaded by a headless browser.
+            on_error (Callable): Called when a page cannot be parsed.
+
+        """
+        self.headless = headless
+        self.on_error = on_error
+
+    def _failed(self) -> None:
+        if self.on_error is not None:
+            self.on_error()
+
+    def extract_rows(self, captured: dict, quantity: int) -> tuple:
+        """Extract the offers captured with the `rows` capture mode.
+
+        Arguments:
+            captured (dict): The name and the rows of the offers, as captured.
+            quantity (int): The quantity of items to buy.
+
+        Returns:
+            tuple: A tuple containing the item name and a list of items.
+
+        """
+        try:
+            item_name = product_name(captured["name_parts"])
+            rows = [
+                dict(
+                    row,
+                    merchant=row["merchant"].strip(),
+                    merchant_reviews=row["merchant_reviews"].strip(),
+                    price=row["price"].strip(),
+                    delivery_price=row["delivery_price"]
+                    and row["delivery_price"].strip(),
+                    free_delivery=row["free_delivery"] and row["free_delivery"].strip(),
+                    availability=row["availability"] or "not available",
+                )
+                for row in captured["rows"]
+            ]
+            results = convert_rows(rows, quantity)
+        except Exception:
+            logger.critical("Error during scraping of the captured offers.")
+            self._failed()
+            raise
+        return item_name, results
 
     def extract_prices_plus_shipping(self, html_content: str, quantity: int) -> tuple:
         """Extract the prices of the items plus shipping cost from the HTML content.
 
         Arguments:
-            html_content (str): The HTML content to extract the prices from.
+            html_content (str): The HTML content to extract the prices from, or the
+                offers captured with the `rows` capture mode.
             quantity (int): The quantity of items to buy.
 
         Returns:
             tuple: A tuple containing the item name and a list of items.
 
         """
+        if isinstance(html_content, dict):
+            item_name, results = self.extract_rows(html_content, quantity)
+            if not item_name:
+                logger.error("No item name found, going with default.")
+                raise Exception("No item name found.")
+            return item_name, results
         results = []
+        rows = []
         item_name = ""
         try:
             tree = html.fromstring(html_content)
@@ -182,21 +569,22 @@ class Scraper:
                 except Exception:
                     availability = "not available"
                 offer_link = element.xpath('div[@class="item_actions"]/a/@href')[0]
-                # convert item values to the appropriate data types
-                item = self._convert_data_types(
-                    merchant,
-                    merchant_link,
-                    merchant_reviews,
-                    merchant_reviews_link,
-                    merchant_rating,
-                    price,
-                    quantity,
-                    delivery_price,
-                    free_delivery,
-                    availability,
-                    offer_link,
+                rows.append(
+                    {
+                        "merchant": merchant,
+                        "merchant_link": merchant_link,
+                        "merchant_reviews": merchant_reviews,
+                        "merchant_reviews_link": merchant_reviews_link,
+                        "merchant_rating": merchant_rating,
+                        "price": price,
+                        "delivery_price": delivery_price,
+                        "free_delivery": free_delivery,
+                        "availability": availability,
+                        "offer_link": offer_link,
+                    }
                 )
-                results.append(item)
+            # convert item values to the appropriate data types, for all the items at once
+            results = convert_rows(rows, quantity)
         except Exception as e:
             message = (
                 "Error during scraping. "
@@ -205,7 +593,7 @@ class Scraper:
                 else ""
             )
             logger.critical(message)
-            self.driver.save_screenshot("error.png")
+            self._failed()
             raise e
 
         return item_name, results
@@ -216,13 +604,17 @@ class Scraper:
         """Extract the best price of the item shipping included from the HTML content.
 
         Arguments:
-            html_content (str): The HTML content to extract the prices from.
+            html_content (str): The HTML content to extract the prices from, or the
+                offers captured with the `rows` capture mode.
             quantity (int): The quantity of items to buy.
 
         Returns:
             tuple: A tuple containing the item name and the best price item.
 
         """
+        if isinstance(html_content, dict):
+            item_name, results = self.extract_rows(html_content, quantity)
+            return item_name, results[0]
         item = {}
         item_name = ""
         try:
@@ -275,19 +667,23 @@ class Scraper:
                 availability = "not available"
             offer_link = element.xpath('div[@class="item_actions"]/a/@href')[0]
             # convert item values to the appropriate data types
-            item = self._convert_data_types(
-                merchant,
-                merchant_link,
-                merchant_reviews,
-                merchant_reviews_link,
-                merchant_rating,
-                price,
+            item = convert_rows(
+                [
+                    {
+                        "merchant": merchant,
+                        "merchant_link": merchant_link,
+                        "merchant_reviews": merchant_reviews,
+                        "merchant_reviews_link": merchant_reviews_link,
+                        "merchant_rating": merchant_rating,
+                        "price": price,
+                        "delivery_price": delivery_price,
+                        "free_delivery": free_delivery,
+                        "availability": availability,
+                        "offer_link": offer_link,
+                    }
+                ],
                 quantity,
-                delivery_price,
-                free_delivery,
-                availability,
-                offer_link,
-            )
+            )[0]
         except Exception as e:
             message = (
                 "Error during scraping. "
@@ -296,60 +692,71 @@ class Scraper:
                 else ""
             )
             logger.critical(message)
-            self.driver.save_screenshot("error.png")
+            self._failed()
             raise e
 
         return item_name, item
 
-    def _convert_data_types(
-        self,
-        merchant,
-        merchant_link,
-        merchant_reviews,
-        merchant_reviews_link,
-        merchant_rating,
-        price,
-        quantity,
-        delivery_price,
-        free_delivery,
-        availability,
-        offer_link,
-    ):
-        number_pattern = re.compile(r"\b\d+[,.]?\d*\b")
-        item = {}
 
-        item["seller"] = merchant
-        item["seller_link"] = "https://www.trovaprezzi.it" + merchant_link
-        merchant_reviews = number_pattern.search(merchant_reviews).group()
-        item["seller_reviews"] = int(merchant_reviews.replace(".", ""))
-        item["seller_reviews_link"] = (
-            "https://www.trovaprezzi.it" + merchant_reviews_link
-        )
-        price = number_pattern.search(price).group()
-        if merchant_rating:
-            merchant_rating = merchant_rating.split(" ")[2].replace("rate", "")
-            merchant_rating = int(merchant_rating) / 10.0
-        item["seller_rating"] = merchant_rating
-        item["price"] = float(price.replace(",", "."))
-        item["quantity"] = quantity
-        if delivery_price:
-            delivery_price = number_pattern.search(delivery_price).group()
-            item["delivery_price"] = float(delivery_price.replace(",", "."))
-        else:
-            item["delivery_price"] = 0.0
-        item["total_price"] = item["price"] * quantity
-        if free_delivery:
-            free_delivery = number_pattern.search(free_delivery).group()
-            item["free_delivery"] = float(free_delivery.replace(",", "."))
-        else:
-            item["free_delivery"] = free_delivery
-        if free_delivery and item["total_price"] >= item["free_delivery"]:
-            item["total_price_plus_delivery"] = item["total_price"]
-        else:
-            item["total_price_plus_delivery"] = (
-                item["total_price"] + item["delivery_price"]
-            )
-        item["availability"] = True if availability == "available" else False
-        item["link"] = "https://www.trovaprezzi.it" + offer_link
-
-        return item
+def page_filenames(directory: str, url: str) -> tuple:
+    """Return the names of the files where the pages of a URL are recorded.
+
+    Arguments:
+        directory (str): The directory of the recorded pages.
+        url (str): The URL of the pages.
+
+    Returns:
+        tuple: The file names of the page with prices plus shipping costs and of the
+            page with prices shipping included.
+
+    """
+    key = hashlib.sha1(url.encode("utf-8"), usedforsecurity=False).hexdigest()[:16]
+    return (
+        os.path.join(directory, f"{key}_plus_shipping.html"),
+        os.path.join(directory, f"{key}_shipping_included.html"),
+    )
+
+
+def more_page_filename(directory: str, url: str, page: int) -> str:
+    """Return the name of the file where a further offers page of a URL is recorded.
+
+    Arguments:
+        directory (str): The directory of the recorded pages.
+        url (str): The URL of the pages.
+        page (int): The number of the offers page, starting from 2.
+
+    Returns:
+        str: The file name of the page.
+
+    """
+    plus_shipping = page_filenames(directory, url)[0]
+    return plus_shipping.replace(".html", f"_{page}.html")
+
+
+def save_pages(
+    directory: str,
+    url: str,
+    html_plus_shipping: str,
+    html_shipping_included: str,
+    *more_pages: str,
+) -> None:
+    """Record the downloaded pages of a URL, so that they can be replayed later.
+
+    Arguments:
+        directory (str): The directory of the recorded pages.
+        url (str): The URL of the pages.
+        html_plus_shipping (str): The page with prices plus shipping costs.
+        html_shipping_included (str): The page with prices shipping included.
+        more_pages (str): The further offers pages, with prices plus shipping costs.
+
+    """
+    os.makedirs(directory, exist_ok=True)
+    filenames = page_filenames(directory, url) + tuple(
+        more_page_filename(directory, url, page)
+        for page in range(2, len(more_pages) + 2)
+    )
+    for filename, content in zip(
+        filenames, (html_plus_shipping, html_shipping_included, *more_pages)
+    ):
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(content)
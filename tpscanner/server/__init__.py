@@ -0,0 +1,10 @@
+"""Local HTTP API server of TPScanner."""
+
+from .api import ApiServer, create_server, parse_products  # noqa F401
+from .service import (
+    LatencyStats,  # noqa F401
+    ResultCache,  # noqa F401
+    ScanFailed,  # noqa F401
+    ScanService,  # noqa F401
+    ServiceBusy,  # noqa F401
+)
@@ -0,0 +1,201 @@
+"""Local HTTP API answering scan and basket requests with the scan service."""
+
+import json
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+
+from .service import ScanFailed, ScanService, ServiceBusy
+
+
+class ApiError(Exception):
+    """Raised when a request cannot be answered, with the HTTP status to return."""
+
+    def __init__(self, status: int, message: str):
+        """Initialize the error.
+
+        Arguments:
+            status (int): The HTTP status code.
+            message (str): The error message.
+
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def parse_products(data) -> Dict[str, int]:
+    """Parse the products of a basket request.
+
+    The products are either a mapping of each URL to the quantity to buy, or a
+    list of URLs to buy one of, as in the baskets file, e.g.
+    `{"products": {"https://...": 2, "https://...": 1}}`.
+
+    Arguments:
+        data: The JSON body of the request.
+
+    Returns:
+        dict: The quantity to buy of each URL.
+
+    Raises:
+        ValueError: If the request has no products.
+
+    """
+    products = data.get("products") if isinstance(data, dict) else None
+    if isinstance(products, list):
+        products = {url: 1 for url in products}
+    if not isinstance(products, dict) or not products:
+        raise ValueError("Expected the `products` of the basket.")
+    return {str(url): int(quantity) for url, quantity in products.items()}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Handler of the requests to the API.
+
+    Endpoints:
+        GET /scan?url=...&quantity=n: The offers of a product.
+        POST /basket: The best individual and cumulative deals of the products
+            given as JSON, e.g. `{"products": {"https://...": 2}}`.
+        GET /metrics: The latencies of each endpoint and the cache statistics.
+        GET /health: Whether the server is up.
+
+    """
+
+    server: "ApiServer"
+
+    def do_GET(self):  # noqa: N802
+        """Answer a GET request."""
+        self._handle("GET")
+
+    def do_POST(self):  # noqa: N802
+        """Answer a POST request."""
+        self._handle("POST")
+
+    def _handle(self, method: str) -> None:
+        service = self.server.service
+        parts = urlsplit(self.path)
+        route = self.server.routes.get((method, parts.path))
+        start = time.perf_counter()
+        try:
+            if route is None:
+                raise ApiError(404, f"No endpoint {method} {parts.path}.")
+            status, body = route(self, parse_qs(parts.query))
+        except ApiError as e:
+            status, body = e.status, {"error": str(e)}
+        except ServiceBusy as e:
+            status, body = 503, {"error": str(e)}
+        except ScanFailed as e:
+            status, body = 502, {"error": str(e)}
+        except FutureTimeoutError:
+            status, body = 504, {"error": "The scan did not finish in time."}
+        except Exception as e:
+            logger.error(
+                "Request %s %s failed: %s", method, self.path, e, phase="serve"
+            )
+            status, body = 500, {"error": str(e)}
+        self._send(status, body)
+        # unknown paths are not recorded, so that they cannot grow the metrics
+        if route is not None:
+            service.record(parts.path, time.perf_counter() - start, status >= 400)
+
+    def _send(self, status: int, body: Dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 503:
+            self.send_header("Retry-After", "5")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except ValueError as e:
+            raise ApiError(400, f"Invalid JSON: {e}") from e
+
+    def scan(self, query: Dict) -> Tuple[int, Dict]:
+        """Answer `GET /scan` with the offers of a product."""
+        if not query.get("url"):
+            raise ApiError(400, "Expected the `url` of the product.")
+        try:
+            quantity = int(query.get("quantity", ["1"])[0])
+        except ValueError as e:
+            raise ApiError(400, f"Invalid quantity: {e}") from e
+        product, cached = self.server.service.scan(query["url"][0], quantity)
+        return 200, dict(product._asdict(), cached=cached)
+
+    def basket(self, query: Dict) -> Tuple[int, Dict]:
+        """Answer `POST /basket` with the best deals of the products of a basket."""
+        try:
+            products = parse_products(self._read_json())
+        except (ValueError, TypeError) as e:
+            raise ApiError(400, str(e)) from e
+        return 200, self.server.service.basket(products)
+
+    def metrics(self, query: Dict) -> Tuple[int, Dict]:
+        """Answer `GET /metrics` with the statistics of the service."""
+        return 200, self.server.service.stats()
+
+    def health(self, query: Dict) -> Tuple[int, Dict]:
+        """Answer `GET /health`."""
+        return 200, {"status": "ok"}
+
+    def log_message(self, format: str, *args) -> None:
+        """Log the requests at debug level instead of printing them to stderr."""
+        logger.debug(format, *args, phase="serve")
+
+
+class ApiServer(ThreadingHTTPServer):
+    """HTTP server of the API, answering each request in its own thread.
+
+    Attributes:
+        service (ScanService): The service scanning the products.
+        routes (dict): The handler method of each method and path.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: ScanService):
+        """Initialize the server and bind it to its address.
+
+        Arguments:
+            address (tuple): The host and port to listen on; port 0 for any free port.
+            service (ScanService): The service scanning the products.
+
+        """
+        super().__init__(address, ApiRequestHandler)
+        self.service = service
+        self.routes = {
+            ("GET", "/scan"): ApiRequestHandler.scan,
+            ("POST", "/basket"): ApiRequestHandler.basket,
+            ("GET", "/metrics"): ApiRequestHandler.metrics,
+            ("GET", "/health"): ApiRequestHandler.health,
+        }
+
+
+def create_server(
+    service: ScanService, host: Optional[str] = None, port: Optional[int] = None
+) -> ApiServer:
+    """Create the API server with the address set in the configuration.
+
+    Arguments:
+        service (ScanService): The service scanning the products.
+        host (str): The host to listen on; `server_host` from the configuration
+            if not provided.
+        port (int): The port to listen on; `server_port` from the configuration
+            if not provided.
+
+    Returns:
+        ApiServer: The server, bound to its address but not yet serving.
+
+    """
+    host = host or config.server_host or "127.0.0.1"
+    port = (config.server_port or 8080) if port is None else port
+    return ApiServer((host, int(port)), service)
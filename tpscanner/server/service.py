@@ -0,0 +1,454 @@
+"""Scan service answering the requests of the API server from a cache and warm browsers."""
+
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from tpscanner.config import config
+from tpscanner.logger import logger
+from tpscanner.metrics import metrics
+from tpscanner.utils import RateLimiter
+
+# number of latencies kept for each endpoint to compute the percentiles
+LATENCY_SAMPLES = 1024
+
+
+class ServiceBusy(Exception):
+    """Raised when the queue of the products to scan is full."""
+
+
+class ScanFailed(Exception):
+    """Raised when a product could not be scanned, even after the retries."""
+
+
+class ResultCache:
+    """Least recently used cache of the products scanned, each fresh for a while.
+
+    Attributes:
+        size (int): The maximum number of products kept.
+        ttl (float): The number of seconds a product is served from the cache.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups of products missing or expired.
+
+    """
+
+    def __init__(self, size: int, ttl: float):
+        """Initialize the cache.
+
+        Arguments:
+            size (int): The maximum number of products kept.
+            ttl (float): The number of seconds a product is served from the cache.
+
+        """
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        """Return a product if it is in the cache and still fresh.
+
+        Arguments:
+            key (Hashable): The key of the product.
+
+        Returns:
+            The product, None if it is missing or expired.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value) -> None:
+        """Add a product to the cache, evicting the least recently used if full.
+
+        Arguments:
+            key (Hashable): The key of the product.
+            value: The product.
+
+        """
+        if self.size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Return the number of products in the cache, fresh or not."""
+        return len(self._entries)
+
+
+class LatencyStats:
+    """Latencies of the requests to an endpoint.
+
+    Only the last `LATENCY_SAMPLES` latencies are kept to compute the
+    percentiles, so that a long-running server uses constant memory.
+
+    Attributes:
+        count (int): The number of requests.
+        errors (int): The number of requests that failed.
+        total (float): The total number of seconds spent in the requests.
+        max (float): The longest request, in seconds.
+
+    """
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, duration: float, error: bool = False) -> None:
+        """Record the latency of a request.
+
+        Arguments:
+            duration (float): The number of seconds the request took.
+            error (bool): Whether the request failed.
+
+        """
+        self.count += 1
+        self.errors += error
+        self.total += duration
+        self.max = max(self.max, duration)
+        self._samples.append(duration)
+
+    def summary(self) -> Dict[str, float]:
+        """Summarize the latencies.
+
+        Returns:
+            dict: The count, errors, mean, max and 50th, 95th and 99th percentile
+                of the latencies, in seconds.
+
+        """
+        samples = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+        }
+
+
+class ScanService:
+    """Service scanning products on request, with caching and request coalescing.
+
+    A product scanned less than `ttl` seconds ago is answered from the cache.
+    Otherwise, if the same product, for the same quantity, is already being
+    scanned for another request, the request waits for that scan instead of
+    starting a new one. The remaining products are queued to a fixed number of
+    worker threads, each keeping its own scraper, and thus its own browser, open
+    for the whole life of the service; all workers share the same rate limit. A
+    full queue is reported to the caller instead of growing without bounds.
+
+    Attributes:
+        scanner (Scanner): The scanner used to scan each product.
+        workers (int): The number of worker threads.
+        cache (ResultCache): The cache of the products scanned.
+        rate_limiter (RateLimiter): The rate limit shared by all the workers.
+        timeout (float): The number of seconds a request waits for a scan.
+        coalesced (int): The number of requests that waited for a scan in progress.
+        latencies (dict): The `LatencyStats` of each endpoint.
+
+    """
+
+    def __init__(
+        self,
+        scanner,
+        workers: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        queue_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        requests_per_minute: Optional[float] = None,
+    ):
+        """Initialize the service.
+
+        Arguments:
+            scanner (Scanner): The scanner used to scan each product.
+            workers (int): The number of worker threads; `server_workers` from the
+                configuration if not provided.
+            cache_size (int): The maximum number of products cached;
+                `server_cache_size` from the configuration if not provided.
+            cache_ttl (float): The number of seconds a product is cached;
+                `server_cache_ttl` from the configuration if not provided.
+            queue_size (int): The maximum number of products waiting for a worker;
+                `server_queue_size` from the configuration if not provided.
+            timeout (float): The number of seconds a request waits for a scan;
+                `server_timeout` from the configuration if not provided.
+            requests_per_minute (float): The global rate limit; `requests_per_minute`
+                from the configuration if not provided.
+
+        """
+        self.scanner = scanner
+        self.workers = int(workers or config.server_workers or 2)
+        self.cache = ResultCache(
+            int(
+                (config.server_cache_size or 1000) if cache_size is None else cache_size
+            ),
+            float((config.server_cache_ttl or 900) if cache_ttl is None else cache_ttl),
+        )
+        self.rate_limiter = RateLimiter(
+            requests_per_minute or config.requests_per_minute or 20
+        )
+        self.timeout = float(timeout or config.server_timeout or 120)
+        self.coalesced = 0
+        self.latencies: Dict[str, LatencyStats] = {}
+        self._queue: queue.Queue = queue.Queue(
+            int(queue_size or config.server_queue_size or 100)
+        )
+        self._inflight: Dict[Tuple[str, int], Future] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads, each opening its browser right away."""
+        from tpscanner.scraper import CircuitBreaker
+
+        breaker = CircuitBreaker()
+        self._threads = [
+            threading.Thread(
+                target=self._work, args=(breaker,), name=f"server-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Scan service started with %d workers.", self.workers)
+
+    def stop(self) -> None:
+        """Stop the worker threads once the scans in progress are done."""
+        # set under the lock, so that no product is queued after the queue is emptied
+        with self._lock:
+            self._stop.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join()
+        # fail the requests still waiting for a worker
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                self._finish(task[0], task[1], exception=ScanFailed("Server stopped."))
+        logger.info("Scan service stopped.")
+
+    def submit(self, url: str, quantity: int = 1) -> Tuple[Future, bool]:
+        """Get the offers of a product, from the cache or by scanning it.
+
+        Arguments:
+            url (str): The URL of the product.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: The future of the `ProductOffers` of the product, and whether it
+                was served from the cache.
+
+        Raises:
+            ServiceBusy: If the product must be scanned and the queue is full.
+            ScanFailed: If the product must be scanned and the service is stopped.
+
+        """
+        from tpscanner.io import canonical_url
+
+        key = (canonical_url(url), int(quantity))
+        # the cache is looked up under the same lock as the scans in progress, so
+        # that a scan finishing in between is not started again
+        with self._lock:
+            product = self.cache.get(key)
+            if product is not None:
+                cached: Future = Future()
+                cached.set_result(product)
+                return cached, True
+            if self._stop.is_set():
+                raise ScanFailed("Server stopped.")
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.coalesced += 1
+                return inflight, False
+            future: Future = Future()
+            try:
+                self._queue.put_nowait((key, future))
+            except queue.Full:
+                raise ServiceBusy(
+                    f"{self._queue.maxsize} products already waiting to be scanned."
+                ) from None
+            self._inflight[key] = future
+        return future, False
+
+    def scan(self, url: str, quantity: int = 1):
+        """Get the offers of a product, waiting for the scan if needed.
+
+        Arguments:
+            url (str): The URL of the product.
+            quantity (int): The quantity to buy.
+
+        Returns:
+            tuple: The `ProductOffers` of the product, and whether it was served
+                from the cache.
+
+        Raises:
+            ServiceBusy: If the product must be scanned and the queue is full.
+            ScanFailed: If the product could not be scanned.
+            TimeoutError: If the scan did not finish in `timeout` seconds.
+
+        """
+        future, cached = self.submit(url, quantity)
+        return future.result(self.timeout), cached
+
+    def basket(self, products: Dict[str, int]) -> Dict:
+        """Get the best deals of a basket of products, scanning them concurrently.
+
+        Arguments:
+            products (dict): The quantity to buy of each URL.
+
+        Returns:
+            dict: The `products` found, each with its URL, name, quantity and
+                offers, the `best_individual_deals` and the `best_cumulative_deals`.
+
+        Raises:
+            ServiceBusy: If a product must be scanned and the queue is full.
+            ScanFailed: If a product could not be scanned.
+            TimeoutError: If the scans did not finish in `timeout` seconds.
+
+        """
+        from tpscanner.core import best_individual_deals, cumulative_deals
+
+        futures = [self.submit(url, quantity)[0] for url, quantity in products.items()]
+        deadline = time.monotonic() + self.timeout
+        found = [
+            future.result(max(0.0, deadline - time.monotonic())) for future in futures
+        ]
+        # the cached offers are shared, so the deals are computed on copies
+        offers = [(p.name, [dict(item) for item in p.items]) for p in found]
+        return {
+            "products": [p._asdict() for p in found],
+            "best_individual_deals": list(best_individual_deals(offers)),
+            "best_cumulative_deals": cumulative_deals(offers)
+            if len(offers) > 1
+            else [],
+        }
+
+    def record(self, endpoint: str, duration: float, error: bool = False) -> None:
+        """Record the latency of a request to an endpoint.
+
+        Arguments:
+            endpoint (str): The endpoint, e.g. `/scan`.
+            duration (float): The number of seconds the request took.
+            error (bool): Whether the request failed.
+
+        """
+        with self._lock:
+            stats = self.latencies.get(endpoint)
+            if stats is None:
+                stats = self.latencies[endpoint] = LatencyStats()
+            stats.record(duration, error)
+
+    def stats(self) -> Dict:
+        """Return the statistics of the service.
+
+        Returns:
+            dict: The latencies of each endpoint, the cache hits and misses, the
+                coalesced requests, the products queued and being scanned, and the
+                run counters.
+
+        """
+        with self._lock:
+            endpoints = {
+                endpoint: stats.summary() for endpoint, stats in self.latencies.items()
+            }
+            inflight = len(self._inflight)
+        return {
+            "endpoints": endpoints,
+            "cache": {
+                "size": len(self.cache),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+            "coalesced": self.coalesced,
+            "queued": self._queue.qsize(),
+            "inflight": inflight,
+            "counters": metrics.snapshot(),
+        }
+
+    def _finish(
+        self, key: Tuple[str, int], future: Future, product=None, exception=None
+    ):
+        with self._lock:
+            if product is not None:
+                # cached before the scan is done, so that no request scans it again
+                self.cache.put(key, product)
+            self._inflight.pop(key, None)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(product)
+
+    def _work(self, breaker) -> None:
+        from tpscanner.core import ProductOffers
+        from tpscanner.scraper import Resilience
+
+        resilience = Resilience(self.scanner.create_scraper, breaker=breaker)
+        try:
+            # warm up the browser before the first request
+            resilience.scraper = self.scanner.create_scraper()
+        except Exception as e:
+            logger.error("Could not start the browser: %s", e, phase="serve")
+        try:
+            while not self._stop.is_set():
+                task = self._queue.get()
+                if task is None:
+                    break
+                (url, quantity), future = task
+                if not self.rate_limiter.acquire(self._stop):
+                    self._finish(
+                        (url, quantity), future, exception=ScanFailed("Server stopped.")
+                    )
+                    break
+                try:
+                    result = resilience.call(
+                        lambda scraper: self.scanner.scan_url(scraper, url, quantity),
+                        url,
+                    )
+                except Exception as e:
+                    self._finish((url, quantity), future, exception=e)
+                    continue
+                if result is None:
+                    failure = resilience.quarantined.pop(url, {})
+                    error = f"Could not scan `{url}`: {failure.get('error', 'unknown error')}."
+                    self._finish((url, quantity), future, exception=ScanFailed(error))
+                    continue
+                name, items = result
+                product = ProductOffers(url, name, quantity, items)
+                self._finish((url, quantity), future, product)
+        finally:
+            resilience.close()
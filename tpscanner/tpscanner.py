@@ -1,12 +1,17 @@
 """Main module for the TPscanner application."""
 
 import argparse
+import os
 from datetime import datetime
+from typing import Iterable
 
 from tpscanner import io
+from tpscanner.config import config, configure_pretty_errors
 from tpscanner.core import Scanner
 from tpscanner.logger import logger
-from tpscanner.ui import Console
+from tpscanner.metrics import metrics
+from tpscanner.profiler import profiler
+from tpscanner.utils import safe_filename
 
 banner = """
 :.........................................................................:
@@ -27,20 +32,31 @@ def main():
     parser = setup_cli_parser()
 
     # Parse command line arguments
-    (
-        level,
-        urls,
-        quantities,
-        includena,
-        wait,
-        headless,
-        console_out,
-        excel_out,
-    ) = parse_command_line(parser)
+    args = parse_command_line(parser)
+
+    # Only load the console UI and error formatting once the arguments are valid
+    from tpscanner.ui import Console
+
+    configure_pretty_errors()
 
     # Set the logging level
-    logger.set_log_level(level)
-    logger.info(f"Logging level: {level}")
+    logger.set_log_level(args.level, json_file=args.log_json)
+    logger.info("Logging level: %s", args.level)
+
+    if args.lean:
+        config.lean_loading = True
+    if args.user_data_dir:
+        config.user_data_dir = args.user_data_dir
+    if args.capture:
+        config.capture_mode = args.capture
+    if args.all_offers:
+        config.full_offers = True
+    if args.parse_workers is not None:
+        config.parse_workers = args.parse_workers
+    if args.fetcher:
+        config.fetcher = args.fetcher
+    if args.fetch_cache:
+        config.fetch_cache_dir = args.fetch_cache
 
     # Save current date and time in the desired format
     formatted_datetime = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
@@ -49,55 +65,323 @@ def main():
     # Start the scanner
     console.print(message=banner, level="banner")
     console.print(message="TrovaPrezzi Scanner", level="start")
-    scanner = Scanner(level, urls, quantities, wait, headless, console_out, excel_out)
+    if args.profile:
+        profiler.enable()
+    try:
+        if args.daemon:
+            run_daemon(args)
+        elif args.worker:
+            run_worker(args)
+        elif args.serve:
+            run_server(args)
+        else:
+            run(args, console, formatted_datetime)
+    finally:
+        save_metrics(args, formatted_datetime)
+        if args.profile:
+            save_profiles(args, console, formatted_datetime)
+        # remove the copy of stdin, if any
+        if args.inputs is not None:
+            args.inputs.close()
+    console.print(message="Done", level="end")
+
+
+def run(args: argparse.Namespace, console, formatted_datetime: str) -> None:
+    """Scan the URLs, then find, save and display the best deals.
+
+    Arguments:
+        args (Namespace): The parsed command line arguments.
+        console (Console): The console used to display the results.
+        formatted_datetime (str): The date and time used to name the output files.
+
+    """
+    scanner = Scanner(
+        args.level,
+        args.urls,
+        args.quantities,
+        args.wait,
+        args.headless,
+        args.console,
+        args.excel,
+        record_dir=args.record,
+        replay_dir=args.replay,
+        checkpoint=io.Checkpoint(args.checkpoint, resume=args.resume),
+    )
     logger.info("Scanning the deals for each item.")
-    scanner.scan()
+    if args.queue:
+        from tpscanner.distributed import Coordinator, WorkQueue
+
+        Coordinator(WorkQueue(args.queue)).scan(scanner)
+    else:
+        scanner.scan()
+    if scanner.quarantined:
+        report_quarantine(scanner.quarantined, console, formatted_datetime)
+    if args.alerts:
+        check_alerts(scanner, args)
+    if args.baskets:
+        from tpscanner.core import basket_scanner
+
+        for name, products in args.baskets.items():
+            logger.info("Finding the best deals for basket `%s`.", name)
+            report_deals(
+                basket_scanner(scanner, name, products),
+                args,
+                console,
+                f"results_{safe_filename(name)}_{formatted_datetime}.xlsx",
+                f"{name}: ",
+            )
+    else:
+        report_deals(scanner, args, console, f"results_{formatted_datetime}.xlsx")
+
+
+def report_deals(
+    scanner: Scanner, args: argparse.Namespace, console, filename: str, title: str = ""
+) -> None:
+    """Find, save and display the best deals of the products scanned.
+
+    Arguments:
+        scanner (Scanner): The scanner, after the scan.
+        args (Namespace): The parsed command line arguments.
+        console (Console): The console used to display the results.
+        filename (str): The name of the Excel file of the results.
+        title (str): The prefix of the titles of the tables, e.g. the basket name.
+
+    """
     logger.info("Saving individual deals.")
-    io.save_individual_deals(
-        f"results_{formatted_datetime}.xlsx", scanner.individual_deals
-    )
-    if not includena:
+    with profiler.phase("export"):
+        io.save_individual_deals(filename, scanner.individual_deals)
+    if not args.includena:
         logger.info("Removing items marked as not available.")
-        count = scanner.remove_unavailable_items()
-        logger.info(f"{count} items removed.")
+        with profiler.phase("compute"):
+            count = scanner.remove_unavailable_items()
+        logger.info("%d items removed.", count)
     logger.info("Finding best individual deals.")
-    scanner.find_best_individual_deals()
-    logger.info(f"Found {len(scanner.best_individual_deals)} individual best deals.")
+    with metrics.span("compute", step="individual"), profiler.phase("compute"):
+        scanner.find_best_individual_deals()
+    logger.info("Found %d individual best deals.", len(scanner.best_individual_deals))
 
     if scanner.best_individual_deals:
-        if excel_out:
+        if args.excel:
             logger.info("Saving best individual deals.")
-            io.save_best_individual_deals(
-                f"results_{formatted_datetime}.xlsx",
-                "Best individual deals",
-                scanner.best_individual_deals,
-            )
-        if console_out:
+            with profiler.phase("export"):
+                io.save_best_individual_deals(
+                    filename,
+                    "Best individual deals",
+                    scanner.best_individual_deals,
+                )
+        if args.console:
             logger.info("Displaying best individual deals in console.")
             console.display_best_individual_deals(
                 scanner.best_individual_deals,
-                f"Individual deals unlocking free delivery ({len(scanner.best_individual_deals)})",
+                f"{title}Individual deals unlocking free delivery ({len(scanner.best_individual_deals)})",
             )
 
-    if len(urls) > 1:
+    if args.topups:
+        logger.info("Finding the extra items reaching free delivery.")
+        with metrics.span("compute", step="topups"), profiler.phase("compute"):
+            scanner.find_topups()
+        logger.info("Found %d top-ups.", len(scanner.topups))
+        if scanner.topups:
+            if args.excel:
+                logger.info("Saving free delivery top-ups.")
+                with profiler.phase("export"):
+                    io.save_topups(filename, "Free delivery top-ups", scanner.topups)
+            if args.console:
+                logger.info("Displaying free delivery top-ups in console.")
+                console.display_topups(
+                    scanner.topups,
+                    f"{title}Extra items unlocking free delivery ({len(scanner.topups)})",
+                )
+
+    if len(scanner.urls) > 1:
         logger.info("Finding the best cumulative deals.")
-        scanner.find_best_cumulative_deals()
-        logger.info(f"Found {len(scanner.best_cumulative_deals)} best deals.")
-        if excel_out:
+        with metrics.span("compute", step="cumulative"), profiler.phase("compute"):
+            scanner.find_best_cumulative_deals()
+        logger.info("Found %d best deals.", len(scanner.best_cumulative_deals))
+        if args.excel:
             logger.info("Saving best cumulative deals.")
-            io.save_best_cumulative_deals(
-                f"results_{formatted_datetime}.xlsx",
-                "Best cumulative deals",
-                scanner.best_cumulative_deals,
-            )
-        if console_out:
+            with profiler.phase("export"):
+                io.save_best_cumulative_deals(
+                    filename,
+                    "Best cumulative deals",
+                    scanner.best_cumulative_deals,
+                )
+        if args.console:
             logger.info("Displaying best cumulative deals in console.")
             console.display_best_cumulative_deals(
                 scanner.best_cumulative_deals,
-                f"Best cumulative deals ({len(scanner.best_cumulative_deals)})",
+                f"{title}Best cumulative deals ({len(scanner.best_cumulative_deals)})",
             )
 
-    console.print(message="Done", level="end")
+
+def check_alerts(scanner: Scanner, args: argparse.Namespace) -> None:
+    """Evaluate the price alerts against the offers found by the scan.
+
+    The unavailable offers are left out unless --includena is given, as for the
+    best deals.
+
+    Arguments:
+        scanner (Scanner): The scanner, after the scan.
+        args (Namespace): The parsed command line arguments.
+
+    """
+    from tpscanner.alerts import create_alert_engine
+    from tpscanner.core import available_items
+
+    engine = create_alert_engine(args.alerts, args.baskets)
+    alerts = []
+    for url in scanner.urls:
+        name = scanner.product_names.get(url)
+        if name is not None:
+            items = scanner.individual_deals[name]
+            if not args.includena:
+                items = available_items(items)
+            alerts += engine.observe(url, name, items)
+    engine.save()
+    logger.info("%d alerts sent, %d products unchanged.", len(alerts), engine.skipped)
+
+
+def report_quarantine(quarantined: dict, console, formatted_datetime: str) -> None:
+    """Report the URLs that could not be scanned, and save them to a JSON file.
+
+    Arguments:
+        quarantined (dict): The kind of error, error and attempts of each URL.
+        console (Console): The console used to display the report.
+        formatted_datetime (str): The date and time used to name the output file.
+
+    """
+    import json
+
+    os.makedirs(config.output_dir, exist_ok=True)
+    filename = os.path.join(config.output_dir, f"quarantine_{formatted_datetime}.json")
+    with open(filename, "w") as f:
+        json.dump(quarantined, f, indent=2)
+    for url, failure in quarantined.items():
+        console.print(
+            message=f"Skipped {url} after {failure['attempts']} attempts ({failure['kind']}): {failure['error']}",
+            level="warning",
+        )
+    logger.warn("%d URLs could not be scanned, see `%s`.", len(quarantined), filename)
+
+
+def run_daemon(args: argparse.Namespace) -> None:
+    """Rescan the products of the watchlist until the daemon is stopped.
+
+    Arguments:
+        args (Namespace): The parsed command line arguments.
+
+    """
+    from tpscanner.alerts import create_alert_engine
+    from tpscanner.daemon import Daemon
+
+    daemon = Daemon(
+        args.file,
+        args.wait,
+        args.headless,
+        excel_out=args.excel,
+        record_dir=args.record,
+        replay_dir=args.replay,
+        workers=args.workers,
+        adaptive=args.adaptive,
+        alerts=create_alert_engine(args.alerts) if args.alerts else None,
+    )
+    logger.info("Watching the products in `%s`.", args.file)
+    daemon.run()
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    """Scan the URLs leased from the shared queue until the worker is stopped.
+
+    Arguments:
+        args (Namespace): The parsed command line arguments.
+
+    """
+    from tpscanner.distributed import Worker, WorkQueue
+
+    scanner = Scanner(
+        args.level,
+        [],
+        [],
+        args.wait,
+        args.headless,
+        False,
+        False,
+        record_dir=args.record,
+        replay_dir=args.replay,
+    )
+    Worker(WorkQueue(args.queue), scanner).run()
+
+
+def run_server(args: argparse.Namespace) -> None:
+    """Answer the requests to the local HTTP API until the server is stopped.
+
+    Arguments:
+        args (Namespace): The parsed command line arguments.
+
+    """
+    import signal
+    import threading
+
+    from tpscanner.server import ScanService, create_server
+
+    scanner = Scanner(
+        args.level,
+        wait=args.wait,
+        headless=args.headless,
+        record_dir=args.record,
+        replay_dir=args.replay,
+    )
+    service = ScanService(scanner, workers=args.workers)
+    server = create_server(service, port=args.port)
+    if threading.current_thread() is threading.main_thread():
+        # shutdown() waits for serve_forever() to return, so it cannot run in its thread
+        signal.signal(
+            signal.SIGTERM,
+            lambda *_: threading.Thread(target=server.shutdown, daemon=True).start(),
+        )
+    service.start()
+    host, port = server.server_address[:2]
+    logger.info("Serving the API on http://%s:%d.", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+def save_metrics(args: argparse.Namespace, formatted_datetime: str) -> None:
+    """Save the run report and the Prometheus metrics, if requested.
+
+    Arguments:
+        args (Namespace): The parsed command line arguments.
+        formatted_datetime (str): The date and time used to name the output files.
+
+    """
+    if args.metrics:
+        os.makedirs(config.output_dir, exist_ok=True)
+        filename = os.path.join(config.output_dir, f"metrics_{formatted_datetime}.json")
+        logger.info("Saving run report to `%s`.", filename)
+        metrics.save_report(filename)
+    if args.prometheus:
+        logger.info("Saving Prometheus metrics to `%s`.", args.prometheus)
+        metrics.save_prometheus(args.prometheus)
+
+
+def save_profiles(args: argparse.Namespace, console, formatted_datetime: str) -> None:
+    """Save the CPU and memory profiles of each phase and display their summary.
+
+    Arguments:
+        args (Namespace): The parsed command line arguments.
+        console (Console): The console used to display the summary.
+        formatted_datetime (str): The date and time used to name the output files.
+
+    """
+    profiler.disable()
+    filenames = profiler.save(config.output_dir, formatted_datetime)
+    logger.info("Saved %d profile files to `%s`.", len(filenames), config.output_dir)
+    console.display_profile(profiler.summary(args.profile_top))
 
 
 def setup_cli_parser() -> argparse.ArgumentParser:
@@ -108,9 +392,18 @@ def setup_cli_parser() -> argparse.ArgumentParser:
 
     """
     parser = argparse.ArgumentParser(description="TrovaPrezzi Scanner")
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("-u", "--url", nargs="+", help="List of URLs to scan")
-    group.add_argument("-f", "--file", help="File containing URLs to scan")
+    group.add_argument(
+        "-f",
+        "--file",
+        help="File containing URLs to scan, optionally with quantities or as JSON lines; - for stdin",
+    )
+    group.add_argument(
+        "--baskets",
+        metavar="FILE",
+        help="JSON file of named baskets: scan their products once, report each basket",
+    )
     parser.add_argument(
         "-l", "--level", help="Logging level (debug, info, warning, error, critical)"
     )
@@ -131,6 +424,52 @@ def setup_cli_parser() -> argparse.ArgumentParser:
         "-w", "--wait", type=int, help="Wait time between URLs requests", required=False
     )
     parser.add_argument("--headless", action="store_true", help="Run in headless mode")
+    parser.add_argument(
+        "--user-data-dir",
+        metavar="DIR",
+        help="Keep the browser profile in DIR, to reuse cookie consent and cache across runs",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        metavar="N",
+        help="Parse the pages in N processes while the browser loads the next ones",
+    )
+    parser.add_argument(
+        "--all-offers",
+        action="store_true",
+        help="Load the offers beyond the first page, until the best ones are found",
+    )
+    parser.add_argument(
+        "--capture",
+        choices=["page", "listing", "rows"],
+        help="Read the whole page, only the listing markup, or only the offers as JSON",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Do not load images, fonts, ads and analytics (see lean_block_urls in config)",
+    )
+    parser.add_argument(
+        "--fetcher",
+        choices=["browser", "http", "fake"],
+        help="Download the pages with the browser, plain HTTP requests, or serve fake listings",
+    )
+    parser.add_argument(
+        "--fetch-cache",
+        metavar="DIR",
+        help="Keep the downloaded pages in DIR and reuse them for fetch_cache_ttl seconds",
+    )
+    parser.add_argument(
+        "--alerts",
+        metavar="FILE",
+        help="JSON file of the target prices of products and baskets to be alerted of",
+    )
+    parser.add_argument(
+        "--topups",
+        action="store_true",
+        help="Find the cheapest extra items reaching the free delivery threshold",
+    )
     parser.add_argument(
         "-c",
         "--console",
@@ -140,89 +479,243 @@ def setup_cli_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "-x", "--excel", action="store_true", help="Save output to Excel file"
     )
+    parser.add_argument(
+        "--log-json",
+        metavar="FILE",
+        help="Also write log records with structured fields to FILE as JSON lines",
+    )
+    parser.add_argument(
+        "-m",
+        "--metrics",
+        action="store_true",
+        help="Save a JSON report with per-phase timings and counters",
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="FILE",
+        help="Save the run metrics to FILE in the Prometheus text format",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record CPU and memory profiles of the scan, parse, compute and export phases",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=15,
+        metavar="N",
+        help="Number of hot spots to show for each profiled phase (default 15)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and rescan the products of the watchlist given with -f when due",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Number of browsers used by the daemon or the server (default from config)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Let the daemon rescan more often the products whose prices change more",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run, skipping the URLs already scanned",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="Save the products scanned to FILE, to resume the run (default from the input)",
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="DB",
+        help="Scan the URLs on the workers sharing the SQLite queue DB",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run as a worker scanning the URLs leased from the queue given with --queue",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run a local HTTP API answering scan and basket requests",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        metavar="PORT",
+        help="Port of the HTTP API started with --serve (default from config)",
+    )
+    replay_group = parser.add_mutually_exclusive_group()
+    replay_group.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Save the downloaded pages to DIR, so that the run can be replayed",
+    )
+    replay_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Read the pages recorded in DIR instead of using the browser",
+    )
     return parser
 
 
-def parse_command_line(parser: argparse.ArgumentParser) -> tuple:
+def parse_command_line(parser: argparse.ArgumentParser) -> argparse.Namespace:
     """Parse the command line arguments.
 
     Arguments:
         parser (ArgumentParser): The command line parser.
 
     Returns:
-        tuple: A tuple containing the following elements:
+        Namespace: The parsed arguments, including the following normalized elements:
             - level (str): The logging level.
-            - urls (list): The list of URLs to scan.
-            - quantities (list): The list of quantities to buy for each URL.
+            - urls (list): The list of URLs to scan, each once; read lazily with -f.
+            - inputs (UrlInput): The input the URLs are read from with -f, if any.
+            - baskets (dict): The quantity of each URL in each basket, if --baskets is given.
+            - alerts (dict): The target prices of the products and baskets, if --alerts is given.
+            - quantities (list): The list of quantities to buy for each URL, added up for duplicates.
             - includena (bool): Whether to include items marked as not available.
             - wait (int): The wait time between URLs requests.
             - headless (bool): Whether to run in headless mode.
-            - console_out (bool): Whether to show output in console.
-            - excel_out (bool): Whether to save output to Excel file.
+            - user_data_dir (str): The directory of the persistent browser profile, if any.
+            - parse_workers (int): The number of processes parsing the pages, if set.
+            - all_offers (bool): Whether to load the offers beyond the first page.
+            - capture (str): What is read from the browser for each page, if set.
+            - lean (bool): Whether to skip the resources not needed to read the offers.
+            - fetcher (str): The kind of fetcher downloading the pages, if set.
+            - fetch_cache (str): The directory where the downloaded pages are cached, if any.
+            - console (bool): Whether to show output in console.
+            - excel (bool): Whether to save output to Excel file.
+            - log_json (str): The file where to write JSON log records, if any.
+            - metrics (bool): Whether to save the JSON run report.
+            - prometheus (str): The file where to write Prometheus metrics, if any.
+            - profile (bool): Whether to profile the phases of the run.
+            - profile_top (int): The number of hot spots to show for each phase.
+            - record (str): The directory where to record the downloaded pages, if any.
+            - replay (str): The directory of the recorded pages to replay, if any.
+            - daemon (bool): Whether to run as a daemon watching the file given with -f.
+            - workers (int): The number of browsers used by the daemon or the server, if set.
+            - adaptive (bool): Whether the daemon adapts the rescan intervals to price changes.
+            - resume (bool): Whether to resume the previous run from its checkpoint.
+            - checkpoint (str): The checkpoint file, named after the input if not set.
+            - queue (str): The SQLite queue shared with the workers, if any.
+            - worker (bool): Whether to run as a worker of the queue.
+            - serve (bool): Whether to run the local HTTP API.
+            - port (int): The port of the HTTP API, if set.
 
     """
     args = parser.parse_args()
+    args.inputs = None
 
     # Retrieve the logging level
-    level = args.level or ""
+    args.level = (args.level or "").lower()
+
+    # Retrieve the wait time between URLs requests
+    if not args.wait:
+        args.wait = 5
+
+    # A worker gets its URLs from the queue
+    if args.worker:
+        if not args.queue:
+            parser.error("--worker requires the queue given with --queue.")
+        args.urls = []
+        args.quantities = []
+        return args
+
+    # The server gets its URLs from the requests
+    if args.serve:
+        args.urls = []
+        args.quantities = []
+        return args
+
+    if not (args.url or args.file or args.baskets):
+        parser.error("one of the arguments -u/--url -f/--file --baskets is required")
+
+    if args.alerts:
+        from tpscanner.alerts import load_alert_rules
+
+        try:
+            args.alerts = load_alert_rules(args.alerts)
+        except (OSError, ValueError) as e:
+            parser.error(f"Invalid alerts file: {e}")
+
+    # The daemon reads the watchlist file itself, and reloads it when it changes
+    if args.daemon:
+        if not args.file:
+            parser.error("--daemon requires the watchlist file given with -f/--file.")
+        # the baskets cannot be given with the watchlist, so neither their alerts
+        if args.alerts and args.alerts["baskets"]:
+            parser.error("--daemon only supports the alerts of products, not baskets.")
+        args.urls = []
+        args.quantities = []
+        return args
+
+    # Each input gets its own checkpoint, so that runs of different inputs can be
+    # resumed separately, and run at the same time
+    if not args.checkpoint:
+        if args.baskets:
+            source = "baskets:" + os.path.abspath(args.baskets)
+        elif args.url:
+            source = "urls:" + " ".join(map(str, args.url + (args.quantity or [])))
+        else:
+            source = "file:" + (
+                args.file if args.file == "-" else os.path.abspath(args.file)
+            )
+        args.checkpoint = io.default_checkpoint_file(source)
 
     # Retrieve the list of URLs provided from the command line
     urls = args.url
-    if urls:
+    quantities: Iterable[int]
+    if args.baskets:
+        from tpscanner.core import basket_union, load_baskets
+
+        try:
+            args.baskets = load_baskets(args.baskets)
+        except (OSError, ValueError) as e:
+            parser.error(f"Invalid baskets file: {e}")
+        # the products shared by several baskets are scanned once
+        urls, quantities = basket_union(args.baskets)
+    elif urls:
         # Retrieve also the list of quantities for each URL provided from the command line
-        quantities = args.quantity
+        if args.quantity and len(args.quantity) != len(urls):
+            parser.error(
+                f"Expected a quantity for each of the {len(urls)} URLs, found {len(args.quantity)}."
+            )
+        quantities = args.quantity or [1] * len(urls)
+        # the same product is scanned once, for the total quantity
+        urls, quantities = io.merge_inputs(urls, quantities)
     else:
-        # Read the URLs and quantities from the file provided
-        quantities = []
-        urls = []
-        with open(args.file, "r") as f:
-            lines = f.read().splitlines()
-        for line in lines:
-            # remove any trailing or leading whitespaces
-            line = line.strip()
-            # if line contains whitespaces in between, split and retrieve the quantity
-            if " " in line:
-                url, q = line.split()
-                urls.append(url)
-                quantities.append(q)
-            else:
-                urls.append(line)
-    # final check in case no quantities were provided in the file or command line
-    if not quantities:
-        quantities = [1] * len(urls)
-
-    # Whether to include items marked as not available
-    includena = args.includena
-
-    # Retrieve the wait time between URLs requests
-    wait = args.wait
-    if not wait:
-        wait = 5
-
-    # Whether to run in headless mode
-    headless = args.headless
-
-    # Whether to show output in console
-    console_out = args.console
-
-    # Whether to save output to Excel file
-    excel_out = args.excel
+        # Read the URLs and quantities lazily from the file provided, or stdin
+        try:
+            args.inputs = io.UrlInput(args.file)
+        except (OSError, ValueError) as e:
+            parser.error(f"Invalid URLs file: {e}")
+        urls, quantities = args.inputs.urls, args.inputs.quantities
+    args.urls = urls
+    args.quantities = quantities
+
+    # The basket alerts are evaluated on the baskets given with --baskets
+    if args.alerts:
+        unknown = set(args.alerts["baskets"]) - set(args.baskets or {})
+        if unknown:
+            parser.error(
+                f"No baskets {', '.join(sorted(unknown))} given with --baskets for the alerts."
+            )
 
     if not (args.console or args.excel):
         parser.error(
             "No output format selected, add -c/--console or -x/--excel or both."
         )
 
-    return (
-        level.lower(),
-        urls,
-        quantities,
-        includena,
-        wait,
-        headless,
-        console_out,
-        excel_out,
-    )
+    return args
 
 
 if __name__ == "__main__":
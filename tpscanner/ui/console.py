@@ -1,8 +1,9 @@
 """This module contains the Console class for displaying formatted output using the Rich library."""
 
-from typing import ClassVar, Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from rich.console import Console as RichConsole
+from rich.console import RenderableType
 from rich.rule import Rule
 from rich.table import Table
 from rich.theme import Theme
@@ -15,6 +16,7 @@ class Console:
         console (RichConsole): The RichConsole object used for printing formatted output.
         columns_individual (list): List of tuples representing the columns for individual deals table.
         columns_cumulative (list): List of tuples representing the columns for cumulative deals table.
+        columns_topups (list): List of tuples representing the columns for free delivery top-ups table.
 
     Methods:
         __init__(): Initializes the Console object with a RichConsole instance and sets the column configurations.
@@ -22,12 +24,15 @@ class Console:
         _create_table(title, columns): Creates a Rich Table object with the specified title and column configurations.
         display_best_individual_deals(best_individual_deals, title): Displays the best individual deals in a formatted table.
         display_best_cumulative_deals(best_cumulative_deals, title): Displays the best cumulative deals in a formatted table.
+        display_topups(topups, title): Displays the free delivery top-ups in a formatted table.
+        display_profile(summary): Displays the summary of the profiled phases.
 
     """
 
-    console: ClassVar = None
+    console: RichConsole
     columns_individual: List[Dict] = []
     columns_cumulative: List[Dict] = []
+    columns_topups: List[Dict] = []
 
     def __init__(self):
         """Initialize the Console object with a RichConsole instance and sets the column configurations."""
@@ -70,6 +75,18 @@ class Console:
             ("Avail.", "white", "center", 7),
         ]
 
+        self.columns_topups = [
+            ("Product", "cyan", "left", 16),
+            ("Q.ty", "cyan", "center", 5),
+            ("Seller", "blue", "left", 16),
+            ("Total Price", "magenta", "center", 10),
+            ("Free Delivery from", "blue", "center", 10),
+            ("Add", "cyan", "left", 20),
+            ("Add Price", "magenta", "center", 10),
+            ("Delivery Price", "blue", "center", 10),
+            ("Saving", "magenta", "center", 10),
+        ]
+
     def print(self, message: str, level: str = "info") -> None:
         """Print a message with the specified level of styling.
 
@@ -162,11 +179,44 @@ class Console:
         print("\n")
         self._rich_print(best_cumulative_deals_table)
 
-    def _rich_print(self, message: str, style: Optional[str] = None) -> None:
+    def display_topups(self, topups: Iterable[Dict], title: str) -> None:
+        """Display the free delivery top-ups.
+
+        Arguments:
+            topups (Iterable[Dict]): A list of offers, each with the extra items reaching the free delivery threshold.
+            title (str): The title of the table.
+
+        """
+        topups_table = self._create_table(title, self.columns_topups)
+        for item in topups:
+            topups_table.add_row(
+                item["name"],
+                str(item["quantity"]),
+                item["seller"],
+                format(item["total_price"], ".2f") + " €",
+                format(item["free_delivery"], ".2f") + " €",
+                item["topup"],
+                format(item["topup_price"], ".2f") + " €",
+                format(item["delivery_price"], ".2f") + " €",
+                format(item["topup_saving"], ".2f") + " €",
+            )
+        print("\n")
+        self._rich_print(topups_table)
+
+    def display_profile(self, summary: str) -> None:
+        """Display the summary of the profiled phases.
+
+        Arguments:
+            summary (str): The summary, printed as is, without Rich markup.
+
+        """
+        self.console.print(summary, markup=False, highlight=False)
+
+    def _rich_print(self, message: RenderableType, style: Optional[str] = None) -> None:
         """Print a message with the specified style using the Rich library.
 
         Arguments:
-            message (str): The message to be printed.
+            message (RenderableType): The message, or the rule or table, to be printed.
             style (str): The style to be applied to the message.
 
         """
@@ -1 +1 @@
-from .utils import sleep  # noqa F401
+from .utils import RateLimiter, safe_filename, sleep  # noqa F401
@@ -1,7 +1,12 @@
 """Utility functions for the TPScanner."""
 
 import random
+import re
+import threading
 import time
+from typing import Optional
+
+from tpscanner.metrics import metrics
 
 
 def sleep(interval: int) -> None:
@@ -11,4 +16,72 @@ def sleep(interval: int) -> None:
         interval (int): The interval to sleep for.
 
     """
-    time.sleep(interval + random.randint(0, 1))  # noqa S311
+    duration = interval + random.randint(0, 1)  # noqa S311
+    time.sleep(duration)
+    metrics.incr("sleep_seconds", duration)
+
+
+def safe_filename(name: str) -> str:
+    """Return a name that can be used in a file name.
+
+    Arguments:
+        name (str): The name, e.g. of a basket.
+
+    Returns:
+        str: The name, with the characters other than letters, digits, dots and
+            dashes replaced by underscores.
+
+    """
+    return re.sub(r"[^\w.-]+", "_", name)
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests shared by several threads.
+
+    Attributes:
+        rate (float): The number of requests allowed per second.
+        burst (int): The maximum number of requests that can be made back to back.
+
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        """Initialize the rate limiter.
+
+        Arguments:
+            requests_per_minute (float): The number of requests allowed per minute.
+            burst (int): The maximum number of requests that can be made back to back.
+
+        """
+        self.rate = requests_per_minute / 60
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Wait until a request can be made within the rate budget.
+
+        Arguments:
+            stop (Event): An event that interrupts the wait when set.
+
+        Returns:
+            bool: True if the request can be made, False if the wait was interrupted.
+
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                delay = (1 - self._tokens) / self.rate
+            metrics.incr("sleep_seconds", delay)
+            if stop is not None:
+                if stop.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)